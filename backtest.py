@@ -0,0 +1,355 @@
+# backtest.py - Replay stored candle history through the bot strategies
+import argparse
+import csv
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+import pocketoptionapi.global_value as global_value
+from pocketoptionapi.candle_store import RECORD, CandleStore
+import strategies
+from strategies import CLAUDE_STRATEGIES, FCBStrategy, claude_signal, claude_signals
+
+STRATEGIES = ['fcb'] + ['claude%d' % n for n in sorted(CLAUDE_STRATEGIES)]
+TRADE_FIELDS = ['strategy', 'asset', 'time', 'direction', 'entry', 'exit', 'result', 'pnl']
+RESULT_KEYS = {'win': 'wins', 'loss': 'losses', 'tie': 'ties'}
+# Assets written by --synthetic
+SYNTHETIC_ASSETS = ['synthetic1', 'synthetic2']
+
+
+def make_strategy(name, config=None):
+    """Return `signal(df, pair)` -> 'call', 'put' or None for a strategy name in STRATEGIES."""
+    if name == 'fcb':
+        fcb = FCBStrategy(config)
+        return lambda df, pair: fcb(df, pair)[0]
+    if name.startswith('claude') and name[6:].isdigit() and int(name[6:]) in CLAUDE_STRATEGIES:
+        if strategies.qtpylib is None:
+            raise ImportError("claude_strat strategies need freqtrade's qtpylib")
+        number = int(name[6:])
+        return lambda df, pair: claude_signal(df, number)
+    raise ValueError(f"Unknown strategy: {name}")
+
+
+def bar_signals(name, frame, window, start, stop, pair, config=None):
+    """Per-bar mode: call the live strategy once per row with the frame it would see."""
+    signal = make_strategy(name, config)
+    out = np.zeros(len(frame), dtype=np.int8)
+    for i in range(start, stop):
+        direction = signal(frame.iloc[max(0, i + 1 - window):i + 1], pair)
+        if direction is not None:
+            out[i] = 1 if direction == 'call' else -1
+    return out
+
+
+def full_signals(name, frame, window, start, stop, pair, config=None):
+    """Full-series mode: every row's signal in one vectorized pass (see FCBStrategy.signals).
+
+    The claude strategies are computed once over the whole frame, which is
+    what they give on a frame growing from its first row; on a sliding
+    window their Heikin Ashi, supertrend and EMA recurrences start at the
+    frame head instead, so 'bar' is their default mode.
+    """
+    make_strategy(name, config)
+    if name == 'fcb':
+        out = FCBStrategy(config).signals(frame, window, start)
+    else:
+        out = claude_signals(frame, int(name[6:]))
+    out[stop:] = 0
+    return out
+
+
+SIGNAL_MODES = {'bar': bar_signals, 'full': full_signals}
+
+
+def default_mode(name):
+    """Signal mode a strategy runs in unless --mode is given: 'full' only where it matches 'bar'."""
+    return 'full' if name == 'fcb' else 'bar'
+
+
+def settle(direction, entry, exit_price, amount, payout):
+    """Fixed expiry binary option outcome: (result, pnl) with payout in percent."""
+    if exit_price == entry:
+        return 'tie', 0.0
+    if (exit_price > entry) == (direction == 'call'):
+        return 'win', amount * payout / 100
+    return 'loss', -amount
+
+
+def trade_bars(signals, times, first, stop, period, expiration, cooldown=0):
+    """(entry bars, settle bars) of the trades taken on `signals[first:stop]`.
+
+    A signal enters at the close of its bar and settles against the close of
+    the last bar ending by `expiration` seconds later, which must close
+    within one period of it; the settle bar is -1 when the history ends
+    first. Signals within `cooldown` seconds of the previous entry are
+    skipped.
+    """
+    bars = np.flatnonzero(signals[first:stop]) + first
+    entry_times = times[bars] + period
+    if cooldown and len(bars):
+        keep = np.zeros(len(bars), dtype=bool)
+        last_entry = None
+        for k, entry_time in enumerate(entry_times.tolist()):
+            if last_entry is None or entry_time - last_entry >= cooldown:
+                keep[k] = True
+                last_entry = entry_time
+        bars, entry_times = bars[keep], entry_times[keep]
+    expiry = entry_times + expiration
+    exits = np.searchsorted(times, expiry - period, side='right') - 1
+    unsettled = (exits <= bars) | (times[np.maximum(exits, 0)] + period <= expiry - period)
+    exits[unsettled] = -1
+    return bars, exits
+
+
+def candle_frame(records):
+    df = pd.DataFrame({name: records[name] for name in ('time', 'open', 'high', 'low', 'close')})
+    df['time'] = pd.to_datetime(df['time'], unit='s')
+    return df
+
+
+def load_job(job):
+    """(records, frame, first, stop) of a job; rows first..stop-1 are the bars it evaluates."""
+    store = CandleStore(os.path.join(job['history'], str(job['asset']), str(job['period'])))
+    # Warm up bars before the range, and the bars its last trades settle on after it
+    records = store.read(job['start'] - job['window'] * job['period'],
+                         job['end'] + job['expiration'] + job['period'])
+    first = max(int(np.searchsorted(records['time'], job['start'])), 1)
+    stop = int(np.searchsorted(records['time'], job['end']))
+    return records, candle_frame(records), first, stop
+
+
+def parity_job(job):
+    """Compare the per-bar and full-series signals of a job. Returns a summary of both."""
+    records, frame, first, stop = load_job(job)
+    timings, results = {}, {}
+    for mode, signals in SIGNAL_MODES.items():
+        started = time.perf_counter()
+        results[mode] = signals(job['strategy'], frame, job['window'], first, stop, job['asset'], job.get('config'))
+        timings[mode] = time.perf_counter() - started
+    mismatched = np.flatnonzero(results['bar'][first:stop] != results['full'][first:stop]) + first
+    return {'strategy': job['strategy'], 'asset': job['asset'], 'bars': max(0, stop - first),
+            'exact': default_mode(job['strategy']) == 'full',
+            'signals': int(np.count_nonzero(results['bar'][first:stop])),
+            'mismatches': len(mismatched),
+            'first_mismatch': int(records['time'][mismatched[0]]) if len(mismatched) else None,
+            'bar_seconds': timings['bar'], 'full_seconds': timings['full']}
+
+
+def parity_report(summaries):
+    """Print the per-bar vs full-series comparison.
+
+    Returns True when every signal matched for the strategies that default
+    to full mode; the others (bar by default) are only reported.
+    """
+    print(f"{'strategy':<10} {'asset':<10} {'bars':>9} {'signals':>8} {'mismatch':>8} "
+          f"{'bar bars/s':>11} {'full bars/s':>12}")
+    for s in sorted(summaries, key=lambda s: (s['strategy'], s['asset'])):
+        print(f"{s['strategy']:<10} {s['asset']:<10} {s['bars']:>9,} {s['signals']:>8,} {s['mismatches']:>8,} "
+              f"{s['bars'] / s['bar_seconds'] if s['bar_seconds'] else 0:>11,.0f} "
+              f"{s['bars'] / s['full_seconds'] if s['full_seconds'] else 0:>12,.0f}"
+              f"{'' if s['exact'] else '  (bar mode by default)'}")
+        if s['mismatches']:
+            print(f"  first mismatch at {s['first_mismatch']}")
+    return not any(s['mismatches'] for s in summaries if s['exact'])
+
+
+def run_job(job):
+    """Replay one (strategy, asset, date range) job. Returns its summary and trades.
+
+    Every closed bar from `start` to `end` gets the signal the strategy gives
+    with it as the last row of a frame of up to `window` bars, the way the
+    bots see their CandleBuilder frame; bars before `start` only warm the
+    strategy up. In 'bar' mode the strategy is called once per bar, in
+    'full' mode all signals come from one vectorized pass. Trades are
+    settled as trade_bars describes; those whose expiry is past the stored
+    history are counted as unsettled.
+    """
+    period = job['period']
+    records, frame, first, stop = load_job(job)
+    times = records['time']
+    closes = records['close']
+    summary = {key: job[key] for key in ('strategy', 'asset', 'start', 'end')}
+    summary.update(bars=0, seconds=0.0, wins=0, losses=0, ties=0, unsettled=0, pnl=0.0)
+    trades = []
+    started = time.perf_counter()
+    signals = SIGNAL_MODES[job.get('mode', 'full')](job['strategy'], frame, job['window'], first, stop,
+                                                    job['asset'], job.get('config'))
+    bars, exits = trade_bars(signals, times, first, stop, period, job['expiration'], job['cooldown'])
+    for i, j in zip(bars.tolist(), exits.tolist()):
+        if j < 0:
+            summary['unsettled'] += 1
+            continue
+        direction = 'call' if signals[i] > 0 else 'put'
+        result, pnl = settle(direction, closes[i], closes[j], job['amount'], job['payout'])
+        summary[RESULT_KEYS[result]] += 1
+        summary['pnl'] += pnl
+        trades.append({'strategy': job['strategy'], 'asset': job['asset'], 'time': int(times[i]) + period,
+                       'direction': direction, 'entry': float(closes[i]), 'exit': float(closes[j]),
+                       'result': result, 'pnl': pnl})
+    summary['bars'] = max(0, stop - first)
+    summary['seconds'] = time.perf_counter() - started
+    return summary, trades
+
+
+def write_synthetic(history, period, days, assets=SYNTHETIC_ASSETS, start=1_700_006_400, seed=0):
+    """Store `days` of seeded random walk candles per asset under `history`."""
+    rng = np.random.default_rng(seed)
+    count = int(days * 86400) // period
+    for asset in assets:
+        closes = 1.1 * np.exp(np.cumsum(rng.normal(0, 2e-4, count)))
+        opens = np.concatenate([[closes[0]], closes[:-1]])
+        records = np.empty(count, dtype=RECORD)
+        records['time'] = start + np.arange(count) * period
+        records['open'], records['close'] = opens, closes
+        records['high'] = np.maximum(opens, closes) + rng.random(count) * 2e-4
+        records['low'] = np.minimum(opens, closes) - rng.random(count) * 2e-4
+        CandleStore(os.path.join(history, asset, str(period))).write(records)
+
+
+def stored_assets(history, period):
+    """Asset ids that have a candle store for `period` under the history dir."""
+    if not os.path.isdir(history):
+        return []
+    return sorted(name for name in os.listdir(history)
+                  if os.path.isdir(os.path.join(history, name, str(period))))
+
+
+def load_payouts(path):
+    """{asset id: payout} from a saved updateAssets payload (global_value.PayoutData)."""
+    with open(path) as f:
+        assets = json.load(f)
+    return {str(a[0]): a[5] for a in assets if isinstance(a, list) and len(a) > 5}
+
+
+def parse_time(value):
+    if value is None:
+        return None
+    if value.isdigit():
+        return int(value)
+    return int(datetime.strptime(value, '%Y-%m-%d').replace(tzinfo=timezone.utc).timestamp())
+
+
+def build_jobs(args):
+    payouts = load_payouts(args.assets_file) if args.assets_file else {}
+    jobs = []
+    for asset in args.assets or stored_assets(args.history, args.period):
+        store = CandleStore(os.path.join(args.history, asset, str(args.period)))
+        first, last = store.first_time(), store.last_time()
+        if first is None:
+            continue
+        start = max(first, parse_time(args.start) or first)
+        end = min(last + 1, parse_time(args.end) or last + 1)
+        step = max(int(args.chunk_days * 86400), args.period) if args.chunk_days else end - start
+        for chunk in range(start, end, step):
+            for strategy in args.strategy:
+                jobs.append({
+                    'strategy': strategy, 'asset': asset, 'history': args.history,
+                    'period': args.period, 'start': chunk, 'end': min(end, chunk + step),
+                    'window': args.window, 'expiration': args.expiration,
+                    'amount': args.amount, 'payout': payouts.get(asset, args.payout),
+                    'cooldown': args.cooldown, 'mode': args.mode or default_mode(strategy),
+                })
+    return jobs
+
+
+def report(summaries, wall):
+    """Print per strategy results and throughput."""
+    totals = {}
+    for s in summaries:
+        t = totals.setdefault(s['strategy'], dict.fromkeys(
+            ('jobs', 'bars', 'seconds', 'wins', 'losses', 'ties', 'unsettled', 'pnl'), 0))
+        t['jobs'] += 1
+        for key in ('bars', 'seconds', 'wins', 'losses', 'ties', 'unsettled', 'pnl'):
+            t[key] += s[key]
+    print(f"{'strategy':<10} {'bars':>10} {'bars/s':>10} {'trades':>7} {'win %':>6} "
+          f"{'ties':>5} {'unsettled':>9} {'pnl':>10}")
+    for name, t in sorted(totals.items()):
+        trades = t['wins'] + t['losses'] + t['ties']
+        rate = t['bars'] / t['seconds'] if t['seconds'] else 0.0
+        win = 100 * t['wins'] / trades if trades else 0.0
+        print(f"{name:<10} {t['bars']:>10,} {rate:>10,.0f} {trades:>7,} {win:>6.1f} "
+              f"{t['ties']:>5,} {t['unsettled']:>9,} {t['pnl']:>10,.2f}")
+    bars = sum(t['bars'] for t in totals.values())
+    print(f"{len(summaries)} jobs, {bars:,} bars in {wall:.1f}s wall ({bars / wall if wall else 0:,.0f} bars/s)")
+    return totals
+
+
+def add_job_arguments(parser):
+    """Options shared with sweep.py that select the history and how trades are taken."""
+    parser.add_argument('--assets', nargs='*', help='asset ids (default: every stored asset)')
+    parser.add_argument('--period', type=int, default=60)
+    parser.add_argument('--start', help='YYYY-MM-DD (UTC) or epoch seconds')
+    parser.add_argument('--end', help='YYYY-MM-DD (UTC) or epoch seconds, exclusive')
+    parser.add_argument('--expiration', type=int, default=180)
+    parser.add_argument('--amount', type=float, default=1.0)
+    parser.add_argument('--payout', type=float, default=80, help='payout %% for assets without one')
+    parser.add_argument('--assets-file', help='saved updateAssets payload with per asset payouts')
+    parser.add_argument('--cooldown', type=int, default=0, help='seconds between entries on one asset')
+    parser.add_argument('--window', type=int, default=1000, help='bars in the frame handed to the strategy')
+    parser.add_argument('--chunk-days', type=float, default=1, help='split date ranges into jobs (0: one per asset)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--history', default=global_value.dp)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest the bot strategies on stored candle history")
+    parser.add_argument('--strategy', action='append', choices=STRATEGIES,
+                        help='strategy to run (repeatable, default: all)')
+    add_job_arguments(parser)
+    parser.add_argument('--mode', choices=sorted(SIGNAL_MODES),
+                        help="'full': vectorized signals for the whole range, 'bar': one strategy call per bar "
+                             "(default: full for fcb, bar for the claude strategies)")
+    parser.add_argument('--parity', action='store_true',
+                        help='compare the bar and full signal modes instead of trading')
+    parser.add_argument('--synthetic', type=float, metavar='DAYS',
+                        help='run on DAYS of seeded random walk candles in a temporary history dir')
+    parser.add_argument('--trades-out', help='write every trade to this CSV file')
+    args = parser.parse_args()
+    args.strategy = args.strategy or STRATEGIES
+    for name in args.strategy:
+        try:
+            make_strategy(name)
+        except ImportError as e:
+            parser.error(f"{name}: {e}")
+
+    if args.synthetic:
+        synthetic = tempfile.TemporaryDirectory()
+        args.history, args.assets = synthetic.name, None
+        write_synthetic(args.history, args.period, args.synthetic)
+
+    jobs = build_jobs(args)
+    if not jobs:
+        print(f"No candle history for period {args.period} under {args.history}")
+        return
+    if args.parity:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            matched = parity_report(list(pool.map(parity_job, jobs)))
+        print("Signals identical" if matched else "Signals differ")
+        raise SystemExit(0 if matched else 1)
+
+    summaries, trades = [], []
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(run_job, job) for job in jobs]
+        for future in as_completed(futures):
+            summary, job_trades = future.result()
+            summaries.append(summary)
+            trades.extend(job_trades)
+    report(summaries, time.perf_counter() - started)
+
+    if args.trades_out:
+        trades.sort(key=lambda t: (t['time'], t['asset'], t['strategy']))
+        with open(args.trades_out, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=TRADE_FIELDS)
+            writer.writeheader()
+            writer.writerows(trades)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+# bench_candle_store.py - CandleStore against the JSON set_cache/get_cache files for a week of candles
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pocketoptionapi.candle_store import CandleStore
+
+
+def make_candles(count, period, start=1_700_000_040):
+    return [{'time': start + i * period, 'open': 1.1 + i * 1e-6, 'high': 1.1002 + i * 1e-6,
+             'low': 1.0998 + i * 1e-6, 'close': 1.1001 + i * 1e-6} for i in range(count)]
+
+
+def timed(fn, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def legacy_set_cache(path, value):
+    """The previous global_value.set_cache: delete and rewrite indented JSON."""
+    if os.path.exists(path):
+        os.remove(path)
+    with open(path, 'w') as k:
+        json.dump({'value': value}, k, indent=4)
+
+
+def legacy_range(path, start, end):
+    with open(path) as k:
+        candles = json.load(k)['value']
+    return [c for c in candles if start <= c['time'] <= end]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--period', type=int, default=60)
+    parser.add_argument('--days', type=int, default=7)
+    args = parser.parse_args()
+
+    count = args.days * 86400 // args.period
+    candles = make_candles(count, args.period)
+    start, end = candles[count // 2]['time'], candles[count // 2 + 100]['time']
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, 'legacy.json')
+        old = timed(lambda: legacy_set_cache(json_path, candles), 3)
+        new = timed(lambda: CandleStore(os.path.join(tmp, 'store', str(time.perf_counter()))).write(candles), 3)
+        print(f"write {count:,} candles   json {old * 1e3:8.1f} ms   store {new * 1e3:7.2f} ms   ({old / new:,.0f}x)")
+        print(f"size                   json {os.path.getsize(json_path) / 1e6:8.2f} MB   "
+              f"store {count * 40 / 1e6:7.2f} MB")
+
+        store = CandleStore(os.path.join(tmp, 'store', 'main'))
+        store.write(candles)
+        old = timed(lambda: legacy_range(json_path, start, end), 3)
+        new = timed(lambda: CandleStore(store.directory).read(start, end), 100)
+        print(f"cold range (101 bars)  json {old * 1e3:8.1f} ms   store {new * 1e3:7.3f} ms   ({old / new:,.0f}x)")
+        new = timed(lambda: store.read(start, end), 1000)
+        print(f"warm range (101 bars)  store {new * 1e6:7.1f} us")
+
+        update = [dict(candles[-1], close=1.2)]
+        new = timed(lambda: store.write(update), 1000)
+        print(f"refresh last bar       store {new * 1e6:7.1f} us")
+
+        store.compact(candles[-1]['time'] - 86400)
+        packed = sum(os.path.getsize(path) for day, path in store.segments())
+        new = timed(lambda: CandleStore(store.directory).read(start, end), 100)
+        print(f"compacted              store {packed / 1e6:7.2f} MB on disk, cold range {new * 1e3:.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+# bench_dashboard_deltas.py - Delta broadcast cost and snapshot/delta/resync behaviour of the dashboard
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.chdir(tempfile.mkdtemp())  # dashboard_server creates its log directory on import
+import dashboard_server as server
+
+broadcaster = server.broadcaster
+
+
+def received(client, names):
+    """Events named in `names` that reached the test client since the last call, in order."""
+    return [(e['name'], e['args'][0]) for e in client.get_received() if e['name'] in names]
+
+
+class Client:
+    """What trading_bot_dashboard.html does with the events: seq ordered deltas over a snapshot."""
+
+    def __init__(self):
+        self.seq = None
+        self.stats = {}
+        self.logs = []
+        self.gaps = 0
+
+    def snapshot(self, snapshot):
+        self.seq = snapshot['seq']
+        self.stats = dict(snapshot['stats'])
+        self.logs = list(snapshot.get('logs', []))
+
+    def delta(self, delta):
+        if self.seq is None or delta['seq'] <= self.seq:
+            return True
+        if delta['seq'] != self.seq + 1:
+            self.gaps += 1
+            return False
+        self.seq = delta['seq']
+        self.stats.update(delta['stats'])
+        self.logs.extend(delta.get('logs', []))
+        return True
+
+    def handle(self, events):
+        for name, payload in events:
+            if name == 'snapshot':
+                self.snapshot(payload)
+            elif name == 'delta':
+                self.delta(payload)
+            elif name == 'deltas':
+                for delta in payload:
+                    self.delta(delta)
+
+
+def produce(count, logs_per_delta=1):
+    for _ in range(count):
+        for _ in range(logs_per_delta):
+            server.add_log("bench line")
+        server.bot_stats['signals_today'] += 1
+        broadcaster.flush()
+
+
+def check(name, ok, detail=''):
+    print(f"{'ok  ' if ok else 'FAIL'} {name}{': ' + detail if detail else ''}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--deltas', type=int, default=5000)
+    parser.add_argument('--logs-per-delta', type=int, default=10)
+    args = parser.parse_args()
+    server.logger.disabled = True
+    history = broadcaster.history.maxlen
+    results = []
+
+    live = server.socketio.test_client(server.app)
+    client = Client()
+    client.handle(received(live, ('snapshot',)))
+    results.append(check("snapshot on connect", client.seq == broadcaster.seq))
+
+    # One delta per flush however many items were queued
+    before = broadcaster.seq
+    for _ in range(5):
+        server.add_log("coalesced")
+    broadcaster.flush()
+    events = received(live, ('delta',))
+    results.append(check("appends coalesce into one delta", len(events) == 1 and broadcaster.seq == before + 1
+                         and len(events[0][1]['logs']) == 5))
+    client.handle(events)
+
+    # request_data answers with a snapshot inside the protocol
+    live.emit('request_data')
+    events = received(live, ('snapshot', 'stats_update', 'trades_update', 'logs_update'))
+    results.append(check("request_data replies with a snapshot",
+                         [n for n, _ in events] == ['snapshot'] and events[0][1]['seq'] == broadcaster.seq))
+    client.handle(events)
+
+    # A client that stops reading at seq `left` and resyncs later
+    for missed in (history - 1, history, history + 1):
+        left = broadcaster.seq
+        produce(missed)
+        live.get_received()
+        live.emit('resync', {'seq': left})
+        events = received(live, ('deltas', 'snapshot'))
+        kind = events[0][0] if len(events) == 1 else None
+        expected = 'deltas' if missed <= history else 'snapshot'
+        detail = f"missed {missed} with history {history} -> {kind}"
+        if kind == 'deltas':
+            seqs = [d['seq'] for d in events[0][1]]
+            ok = seqs == list(range(left + 1, broadcaster.seq + 1))
+        else:
+            ok = kind == 'snapshot' and events[0][1]['seq'] == broadcaster.seq
+        results.append(check(f"resync after {missed} deltas", ok and kind == expected, detail))
+
+        client.handle(events)
+        latest = broadcaster.snapshot()
+        logs_ok = (client.logs[-len(latest['logs']):] if kind == 'deltas' else client.logs) == latest['logs']
+        results.append(check(f"state after resync ({missed})", client.seq == latest['seq'] and logs_ok
+                             and all(client.stats.get(k) == v for k, v in latest['stats'].items())))
+
+    # A delta arriving after a gap is not applied
+    gap = Client()
+    gap.snapshot(broadcaster.snapshot())
+    produce(2)
+    events = received(live, ('delta',))
+    results.append(check("gap detected", not gap.delta(events[-1][1]) and gap.gaps == 1
+                         and gap.seq == events[-1][1]['seq'] - 2))
+
+    # Resync from a seq the server never sent (server restarted) gets a snapshot
+    live.emit('resync', {'seq': broadcaster.seq + 100})
+    events = received(live, ('deltas', 'snapshot'))
+    results.append(check("resync from the future", [n for n, _ in events] == ['snapshot']))
+    live.disconnect()
+
+    started = time.perf_counter()
+    produce(args.deltas, args.logs_per_delta)
+    elapsed = time.perf_counter() - started
+    print(f"{args.deltas:,} deltas of {args.logs_per_delta} logs   {elapsed / args.deltas * 1e6:8.1f} us/delta "
+          f"(add_log + flush, no clients)")
+    raise SystemExit(0 if all(results) else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+# bench_mock_server.py - End to end client throughput and latency against the local mock server
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import pocketoptionapi.global_value as global_value
+from pocketoptionapi.stable_api import PocketOption
+from pocketoptionapi.ws.mock_server import DEFAULT_ASSETS, DEFAULT_START, MockServer
+
+SSID = '42["auth",{"session":"bench","isDemo":1,"uid":1,"platform":2}]'
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise TimeoutError("mock server did not answer")
+        time.sleep(0.01)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--speed', type=float, default=0, help='replay speed (0: as fast as possible)')
+    parser.add_argument('--seconds', type=float, default=5, help='wall seconds to measure the stream')
+    parser.add_argument('--orders', type=int, default=200)
+    parser.add_argument('--history-days', type=float, default=1)
+    args = parser.parse_args()
+
+    global_value.dp = tempfile.mkdtemp()
+    server = MockServer(speed=args.speed, tick_interval=0.5)
+    global_value.ws_url = server.start_in_thread()
+    global_value.pairs = {name: {'id': asset_id} for asset_id, name in DEFAULT_ASSETS}
+
+    po = PocketOption(SSID, True)
+    started = time.perf_counter()
+    po.connect()
+    wait_for(lambda: global_value.websocket_is_connected and global_value.balance is not None)
+    print(f"connect + auth          {(time.perf_counter() - started) * 1e3:8.1f} ms")
+
+    started = time.perf_counter()
+    loaded = po.subscribe([name for _, name in DEFAULT_ASSETS], 60)
+    print(f"subscribe {len(loaded)} assets      {(time.perf_counter() - started) * 1e3:8.1f} ms "
+          f"({sum(loaded.values())} loaded)")
+
+    stats = po.api.websocket_client.dispatcher.stats
+    count = stats['updateStream'].count
+    time.sleep(args.seconds)
+    ticks = stats['updateStream'].count - count
+    print(f"stream                  {ticks / args.seconds:8,.0f} ticks/s "
+          f"(handler avg {stats['updateStream'].as_dict()['handler_avg'] * 1e6:.1f} us)")
+
+    latencies, futures = [], []
+    for i in range(args.orders):
+        started = time.perf_counter()
+        ok, order_id = po.buy(1, DEFAULT_ASSETS[i % len(DEFAULT_ASSETS)][1], 'call' if i % 2 else 'put', 60)
+        latencies.append(time.perf_counter() - started)
+        if ok:
+            futures.append((time.perf_counter(), po.watch_order(order_id, timeout=60)))
+    print(f"openOrder round trip    p50 {percentile(latencies, 0.5) * 1e3:6.2f} ms   "
+          f"p99 {percentile(latencies, 0.99) * 1e3:6.2f} ms   ({len(futures)}/{args.orders} filled)")
+    settled = [(future.result(), time.perf_counter() - opened)[1] for opened, future in futures]
+    print(f"open to settle (60s at speed {args.speed:g})  p50 {percentile(settled, 0.5) * 1e3:8.1f} ms")
+
+    since = int(DEFAULT_START - args.history_days * 86400)
+    started = time.perf_counter()
+    ok = po.get_history(DEFAULT_ASSETS[0][1], 60, start_time=DEFAULT_START, end_time=since)
+    store = global_value.candle_store(DEFAULT_ASSETS[0][0], 60)
+    print(f"get_history {args.history_days:g} day(s)    {(time.perf_counter() - started) * 1e3:8.1f} ms "
+          f"({len(store)} candles, complete={ok})")
+    server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+# bench_recorder.py - Cost of recording websocket frames and speed of replaying them into the client
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pocketoptionapi.api import PocketOptionAPI
+from pocketoptionapi.ws.mock_server import PLACEHOLDER
+from pocketoptionapi.ws.recorder import FrameRecorder, replay
+
+STREAM = '451-' + json.dumps(["updateStream", PLACEHOLDER])
+
+
+def make_frames(count, start=1_700_000_000):
+    """Alternating updateStream placeholder and payload frames, as the server sends them."""
+    frames = []
+    for i in range(count):
+        frames.append(STREAM)
+        frames.append(json.dumps([["EURUSD_otc", start + i * 0.25, 1.08 + (i % 500) * 1e-5]]).encode())
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--ticks', type=int, default=100_000)
+    args = parser.parse_args()
+
+    frames = make_frames(args.ticks)
+    payload = sum(len(f) for f in frames)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'frames.powslog')
+        recorder = FrameRecorder(path)
+        started = time.perf_counter()
+        for frame in frames:
+            recorder.record(frame)
+        recorder.close()
+        elapsed = time.perf_counter() - started
+        size = os.path.getsize(path)
+        print(f"record {len(frames):,} frames   {elapsed / len(frames) * 1e6:6.2f} us/frame   "
+              f"{size / 1e6:.1f} MB ({100 * (size - payload) / payload:.1f}% over payload)")
+
+        api = PocketOptionAPI()
+        count, elapsed = asyncio.run(replay(path, api.websocket_client, speed=0))
+        print(f"replay {count:,} frames   {count / elapsed:10,.0f} frames/s   "
+              f"{count / 2 / elapsed:10,.0f} ticks/s through on_message")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+# bench_state_db.py - Insert and query throughput of BotStateManager at 1M trades
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from shared_state import BotStateManager
+
+SYMBOLS = [f"PAIR{i:02d}_otc" for i in range(40)]
+
+
+def make_trades(rows, start=datetime(2024, 1, 1)):
+    return [{
+        'timestamp': (start + timedelta(seconds=i)).isoformat(),
+        'symbol': SYMBOLS[(i * 7) % len(SYMBOLS)],
+        'side': 'call' if i % 2 else 'put',
+        'size': 100,
+        'price': 1.1 + (i % 1000) * 1e-5,
+        'pnl': 0,
+        'status': 'win' if i % 3 else 'loose',
+    } for i in range(rows)]
+
+
+def legacy_add_trade(db_path, trade):
+    """The previous add_trade: a new connection and commit per row, no indexes."""
+    with sqlite3.connect(db_path) as conn:
+        conn.execute('''
+            INSERT INTO trades (timestamp, symbol, side, size, price, pnl, status)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (trade['timestamp'], trade['symbol'], trade['side'], trade['size'],
+              trade['price'], trade['pnl'], trade['status']))
+
+
+def legacy_query(db_path, sql, args):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute(sql, args).fetchall()
+
+
+def timed(fn, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--batch', type=int, default=10_000)
+    parser.add_argument('--legacy-sample', type=int, default=2_000,
+                        help='rows inserted one call at a time to extrapolate the old path')
+    args = parser.parse_args()
+
+    trades = make_trades(args.rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        pooled_path = os.path.join(tmp, 'pooled.db')
+        legacy_path = os.path.join(tmp, 'legacy.db')
+
+        # Old layout: same tables, rollback journal, no indexes
+        manager = BotStateManager(legacy_path)
+        manager.close()
+        with sqlite3.connect(legacy_path) as conn:
+            conn.execute('PRAGMA journal_mode=DELETE')
+            for index in ('idx_trades_timestamp', 'idx_trades_symbol_timestamp',
+                          'idx_signals_timestamp', 'idx_signals_symbol_timestamp'):
+                conn.execute(f'DROP INDEX {index}')
+
+        sample = trades[:args.legacy_sample]
+        secs = timed(lambda: [legacy_add_trade(legacy_path, t) for t in sample])
+        legacy_rate = len(sample) / secs
+        print(f"legacy add_trade   {legacy_rate:12,.0f} rows/s  "
+              f"(~{args.rows / legacy_rate:,.0f} s for {args.rows:,} rows, extrapolated)")
+        with sqlite3.connect(legacy_path) as conn:
+            conn.execute('DELETE FROM trades')
+            conn.executemany('''
+                INSERT INTO trades (timestamp, symbol, side, size, price, pnl, status)
+                VALUES (:timestamp, :symbol, :side, :size, :price, :pnl, :status)
+            ''', trades)
+
+        manager = BotStateManager(pooled_path)
+        start = time.perf_counter()
+        for i in range(0, len(trades), args.batch):
+            manager.add_trades(trades[i:i + args.batch])
+        secs = time.perf_counter() - start
+        print(f"pooled add_trades  {args.rows / secs:12,.0f} rows/s  ({secs:.1f} s, batches of {args.batch:,})")
+
+        single = make_trades(args.legacy_sample, datetime(2025, 1, 1))
+        secs = timed(lambda: [manager.add_trade(t) for t in single])
+        print(f"pooled add_trade   {len(single) / secs:12,.0f} rows/s  (one row per call)")
+
+        recent_sql = 'SELECT * FROM trades ORDER BY timestamp DESC LIMIT ?'
+        symbol_sql = ('SELECT * FROM trades WHERE symbol = ? AND timestamp >= ? '
+                      'ORDER BY timestamp DESC LIMIT ?')
+        queries = [
+            ('recent 50', lambda: legacy_query(legacy_path, recent_sql, (50,)),
+             lambda: manager.get_recent_trades(50)),
+            ('symbol 50', lambda: legacy_query(legacy_path, symbol_sql, (SYMBOLS[3], '', 50)),
+             lambda: manager.get_symbol_trades(SYMBOLS[3], limit=50)),
+        ]
+        for name, legacy, pooled in queries:
+            old = timed(legacy, 5)
+            new = timed(pooled, 200)
+            print(f"{name:<18} legacy {old * 1e3:9.2f} ms   pooled {new * 1e3:7.3f} ms   "
+                  f"({old / new:,.0f}x)")
+        manager.close()
+
+
+if __name__ == '__main__':
+    main()
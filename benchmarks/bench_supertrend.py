@@ -0,0 +1,71 @@
+# bench_supertrend.py - Compare the array supertrend kernel with the old .iat loops
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import talib.abstract as ta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from indicators import supertrend_arrays
+
+
+def supertrend_iat(df, multiplier, period):
+    """The previous claude_strat.supertrend band loops, kept as the reference."""
+    df['TR'] = ta.TRANGE(df)
+    df['ATR'] = ta.SMA(df['TR'], period)
+    df['basic_ub'] = (df['high'] + df['low']) / 2 + multiplier * df['ATR']
+    df['basic_lb'] = (df['high'] + df['low']) / 2 - multiplier * df['ATR']
+
+    ub, lb, st, cl = (df.columns.get_loc(c) for c in ('basic_ub', 'basic_lb', 'ST', 'close'))
+    df['final_ub'] = 0.00
+    df['final_lb'] = 0.00
+    fub, flb = df.columns.get_loc('final_ub'), df.columns.get_loc('final_lb')
+    for i in range(period, len(df)):
+        df.iat[i, fub] = df.iat[i, ub] if df.iat[i, ub] < df.iat[i - 1, fub] or df.iat[i - 1, cl] > df.iat[i - 1, fub] else df.iat[i - 1, fub]
+        df.iat[i, flb] = df.iat[i, lb] if df.iat[i, lb] > df.iat[i - 1, flb] or df.iat[i - 1, cl] < df.iat[i - 1, flb] else df.iat[i - 1, flb]
+
+    for i in range(period, len(df)):
+        df.iat[i, st] = df.iat[i, fub] if df.iat[i - 1, st] == df.iat[i - 1, fub] and df.iat[i, cl] <= df.iat[i, fub] else \
+                        df.iat[i, flb] if df.iat[i - 1, st] == df.iat[i - 1, fub] and df.iat[i, cl] >  df.iat[i, fub] else \
+                        df.iat[i, flb] if df.iat[i - 1, st] == df.iat[i - 1, flb] and df.iat[i, cl] >= df.iat[i, flb] else \
+                        df.iat[i, fub] if df.iat[i - 1, st] == df.iat[i - 1, flb] and df.iat[i, cl] <  df.iat[i, flb] else 0.00
+    return df['ST'].values
+
+
+def make_candles(bars, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 1.1 + np.cumsum(rng.normal(0, 0.0005, bars))
+    open_ = np.r_[close[0], close[:-1]]
+    high = np.maximum(open_, close) + rng.random(bars) * 0.0003
+    low = np.minimum(open_, close) - rng.random(bars) * 0.0003
+    return pd.DataFrame({'open': open_, 'high': high, 'low': low, 'close': close})
+
+
+def main(bars=10000, multiplier=1.3, period=13, rounds=5):
+    df = make_candles(bars)
+
+    ref = df.copy()
+    ref['ST'] = 0.00
+    t0 = time.perf_counter()
+    expected = supertrend_iat(ref, multiplier, period)
+    old = time.perf_counter() - t0
+
+    atr = ta.SMA(ta.TRANGE(df), period)
+    supertrend_arrays(df['high'].values, df['low'].values, df['close'].values, atr, multiplier, period)
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        atr = ta.SMA(ta.TRANGE(df), period)
+        _, _, st = supertrend_arrays(df['high'].values, df['low'].values, df['close'].values,
+                                     atr, multiplier, period)
+    new = (time.perf_counter() - t0) / rounds
+
+    print(f"bars: {bars}")
+    print(f".iat loops:   {old * 1000:10.2f} ms")
+    print(f"array kernel: {new * 1000:10.2f} ms ({old / new:.0f}x)")
+    print(f"identical ST: {np.array_equal(np.nan_to_num(expected), np.nan_to_num(st))}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
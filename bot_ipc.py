@@ -0,0 +1,212 @@
+# bot_ipc.py - Binary framed event channel from the bot process to the dashboard
+import os
+import queue
+import socket
+import struct
+import threading
+import time
+
+IPC_ENV = 'BOT_IPC_SOCKET'  # Socket path handed to the bot process by the dashboard
+
+TRADE, SIGNAL, BALANCE, LATENCY = 1, 2, 3, 4
+
+# Event type -> (name, [(field, 'd' float64 | 's' UTF-8 string)])
+SCHEMAS = {
+    TRADE: ('trade', [('trade_id', 's'), ('pair', 's'), ('direction', 's'), ('amount', 'd'),
+                      ('price', 'd'), ('result', 's'), ('fractal_level', 'd'),
+                      ('chaos_value', 'd'), ('volatility', 'd')]),
+    SIGNAL: ('signal', [('pair', 's'), ('strength', 'd')]),
+    BALANCE: ('balance', [('balance', 'd')]),
+    LATENCY: ('latency', [('name', 's'), ('seconds', 'd')]),
+}
+
+_FRAME = struct.Struct('<IBd')   # payload length, event type, timestamp
+_DOUBLE = struct.Struct('<d')
+_LENGTH = struct.Struct('<H')
+
+
+def encode_event(kind, timestamp=None, **fields):
+    """Encode one event as a frame: header followed by its fields in schema order."""
+    parts = []
+    for name, code in SCHEMAS[kind][1]:
+        value = fields.get(name)
+        if code == 'd':
+            try:
+                parts.append(_DOUBLE.pack(float(value)))
+            except (TypeError, ValueError):
+                parts.append(_DOUBLE.pack(float('nan')))
+        else:
+            data = ('' if value is None else str(value)).encode('utf-8')[:0xFFFF]
+            parts.append(_LENGTH.pack(len(data)) + data)
+    payload = b''.join(parts)
+    return _FRAME.pack(len(payload), kind, time.time() if timestamp is None else timestamp) + payload
+
+
+def decode_payload(kind, payload):
+    fields = {}
+    pos = 0
+    for name, code in SCHEMAS[kind][1]:
+        if code == 'd':
+            fields[name] = _DOUBLE.unpack_from(payload, pos)[0]
+            pos += _DOUBLE.size
+        else:
+            length = _LENGTH.unpack_from(payload, pos)[0]
+            pos += _LENGTH.size
+            fields[name] = payload[pos:pos + length].decode('utf-8')
+            pos += length
+    return fields
+
+
+class FrameReader:
+    """Reassemble frames from a byte stream; `feed` returns the complete events."""
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def feed(self, data):
+        self.buffer += data
+        events = []
+        while len(self.buffer) >= _FRAME.size:
+            length, kind, timestamp = _FRAME.unpack_from(self.buffer)
+            end = _FRAME.size + length
+            if len(self.buffer) < end:
+                break
+            payload = bytes(self.buffer[_FRAME.size:end])
+            del self.buffer[:end]
+            if kind in SCHEMAS:
+                events.append((SCHEMAS[kind][0], timestamp, decode_payload(kind, payload)))
+        return events
+
+
+class EventPublisher:
+    """Bot side of the channel.
+
+    Events are encoded on the calling thread and queued; a sender thread
+    keeps the connection to the dashboard's socket and writes them out, so
+    publishing never blocks trading. While the dashboard is unreachable or
+    the queue is full events are dropped and counted. Without a socket path
+    (no `BOT_IPC_SOCKET` in the environment) publishing is a no-op.
+    """
+
+    def __init__(self, path=None, maxsize=10000, retry=1.0):
+        self.path = path or os.environ.get(IPC_ENV)
+        self.retry = retry
+        self.queue = queue.Queue(maxsize)
+        self.sent = 0
+        self.dropped = 0
+        self.thread = None
+        if self.path:
+            self.thread = threading.Thread(target=self._run, name='bot-ipc', daemon=True)
+            self.thread.start()
+
+    def publish(self, kind, **fields):
+        if self.thread is None:
+            return False
+        try:
+            self.queue.put_nowait(encode_event(kind, **fields))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def trade(self, **fields):
+        return self.publish(TRADE, **fields)
+
+    def signal(self, pair, strength):
+        return self.publish(SIGNAL, pair=pair, strength=strength)
+
+    def balance(self, balance):
+        return self.publish(BALANCE, balance=balance)
+
+    def latency(self, name, seconds):
+        return self.publish(LATENCY, name=name, seconds=seconds)
+
+    def _run(self):
+        sock = None
+        while True:
+            frame = self.queue.get()
+            while True:
+                if sock is None:
+                    try:
+                        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                        sock.connect(self.path)
+                    except OSError:
+                        sock.close()
+                        sock = None
+                        self.dropped += 1 + self.queue.qsize()
+                        self._drain()
+                        time.sleep(self.retry)
+                        break
+                try:
+                    sock.sendall(frame)
+                    self.sent += 1
+                    break
+                except OSError:
+                    # Dashboard restarted; reconnect and send the frame again
+                    sock.close()
+                    sock = None
+
+    def _drain(self):
+        try:
+            while True:
+                self.queue.get_nowait()
+        except queue.Empty:
+            pass
+
+
+class EventSubscriber:
+    """Dashboard side of the channel.
+
+    Listens on a Unix domain socket and runs one reader thread per connected
+    bot, blocked in `recv` until bytes arrive, so events are handled as soon
+    as they are written. `handler(name, timestamp, fields)` is called on the
+    reader thread for every decoded event.
+    """
+
+    def __init__(self, path, handler):
+        self.path = path
+        self.handler = handler
+        self.server = None
+        self.running = False
+
+    def start(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(self.path)
+        self.server.listen()
+        self.running = True
+        threading.Thread(target=self._accept, name='bot-ipc-accept', daemon=True).start()
+
+    def close(self):
+        self.running = False
+        if self.server is not None:
+            self.server.close()
+            self.server = None
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _accept(self):
+        while self.running:
+            try:
+                conn, _ = self.server.accept()
+            except OSError:
+                break
+            threading.Thread(target=self._read, args=(conn,), name='bot-ipc-reader', daemon=True).start()
+
+    def _read(self, conn):
+        reader = FrameReader()
+        with conn:
+            while self.running:
+                try:
+                    data = conn.recv(65536)
+                except OSError:
+                    break
+                if not data:
+                    break
+                for name, timestamp, fields in reader.feed(data):
+                    try:
+                        self.handler(name, timestamp, fields)
+                    except Exception:
+                        # A failing handler must not kill the channel
+                        pass
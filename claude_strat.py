@@ -1,11 +1,9 @@
 import time, math, asyncio, json, threading, configparser, os
 from datetime import datetime
 from pocketoptionapi.stable_api import PocketOption
+from pocketoptionapi.ws.settlement import SettlementTimeout, deal_status
 import pocketoptionapi.global_value as global_value
-import talib.abstract as ta
-import numpy as np
-import pandas as pd
-import freqtrade.vendor.qtpylib.indicators as qtpylib
+from strategies import CLAUDE_STRATEGIES, claude_signal
 
 global_value.loglevel = 'INFO'
 
@@ -166,15 +164,22 @@ def check_trade_results():
         data = martingale_data[pair]
         if data['waiting_result'] and data['last_trade_id']:
             try:
-                result = api.check_win(data['last_trade_id'])
-                if result is not None:
+                # Settled trades are already resolved by the settlement tracker
+                future = api.watch_order(data['last_trade_id'], timeout=expiration + 180)
+                if future.done():
                     data['waiting_result'] = False
+                    try:
+                        result = future.result()
+                    except SettlementTimeout:
+                        global_value.logger(f"No result received for {pair} trade {data['last_trade_id']}", "WARNING")
+                        continue
+                    _, outcome = deal_status(result)
                     
-                    if result['win'] == 'win':
+                    if outcome == 'win':
                         global_value.logger(f"Trade WON for {pair}: {result}", "INFO")
                         if reset_on_win:
                             reset_martingale(pair)
-                    elif result['win'] == 'loose':
+                    elif outcome == 'loose':
                         global_value.logger(f"Trade LOST for {pair}: {result}", "INFO")
                         # Next trade will use martingale amount
                     else:
@@ -188,7 +193,7 @@ def get_payout():
         d = json.loads(d)
         for pair in d:
             if len(pair) == 19:
-                global_value.logger('id: %s, name: %s, typ: %s, active: %s' % (str(pair[1]), str(pair[2]), str(pair[3]), str(pair[14])), "DEBUG")
+                global_value.logger('id: %s, name: %s, typ: %s, active: %s', "DEBUG", pair[1], pair[2], pair[3], pair[14])
                 if pair[14] == True and pair[5] >= min_payout and "_otc" in pair[1]:
                     p = {}
                     p['id'] = pair[0]
@@ -201,12 +206,8 @@ def get_payout():
 
 def get_df():
     try:
-        i = 0
-        for pair in global_value.pairs:
-            i += 1
-            df = api.get_candles(pair, period)
-            global_value.logger('%s (%s/%s)' % (str(pair), str(i), str(len(global_value.pairs))), "INFO")
-            time.sleep(1)
+        results = api.subscribe(list(global_value.pairs), period)
+        global_value.logger('Loaded %s/%s pairs' % (str(sum(results.values())), str(len(global_value.pairs))), "INFO")
         return True
     except:
         return False
@@ -220,17 +221,20 @@ def buy_with_martingale(amount, pair, action, expiration):
         data = martingale_data[pair]
         if data['last_trade_id']:
             try:
-                result = api.check_win(data['last_trade_id'])
-                if result is not None:
+                future = api.watch_order(data['last_trade_id'], timeout=int(expiration) + 180)
+                if future.done():
                     data['waiting_result'] = False
-                    if result['win'] == 'loose':
+                    _, outcome = deal_status(future.result())
+                    if outcome == 'loose':
                         # Calculate martingale amount for next trade
                         amount = calculate_martingale_amount(pair, is_loss=True)
-                    elif result['win'] == 'win':
+                    elif outcome == 'win':
                         # Reset martingale on win
                         if reset_on_win:
                             reset_martingale(pair)
                         amount = calculate_martingale_amount(pair, is_loss=False)
+            except SettlementTimeout:
+                global_value.logger(f"No result received for {pair} trade {data['last_trade_id']}", "WARNING")
             except:
                 pass
     
@@ -274,236 +278,28 @@ def buy2(amount, pair, action, expiration):
         global_value.logger(f"Error placing trade: {e}", "ERROR")
         return None
 
-def make_df(df0, history):
-    df1 = pd.DataFrame(history).reset_index(drop=True)
-    df1 = df1.sort_values(by='time').reset_index(drop=True)
-    df1['time'] = pd.to_datetime(df1['time'], unit='s')
-    df1.set_index('time', inplace=True)
-
-    df = df1['price'].resample(f'{period}s').ohlc()
-    df.reset_index(inplace=True)
-    df = df.loc[df['time'] < datetime.fromtimestamp(wait(False))]
-
-    if df0 is not None:
-        ts = datetime.timestamp(df.loc[0]['time'])
-        for x in range(0, len(df0)):
-            ts2 = datetime.timestamp(df0.loc[x]['time'])
-            if ts2 < ts:
-                df = df._append(df0.loc[x], ignore_index = True)
-            else:
-                break
-        df = df.sort_values(by='time').reset_index(drop=True)
-        df.set_index('time', inplace=True)
-        df.reset_index(inplace=True)
-
-    return df
-
-def accelerator_oscillator(dataframe, fastPeriod=5, slowPeriod=34, smoothPeriod=5):
-    ao = ta.SMA(dataframe["hl2"], timeperiod=fastPeriod) - ta.SMA(dataframe["hl2"], timeperiod=slowPeriod)
-    ac = ta.SMA(ao, timeperiod=smoothPeriod)
-    return ac
-
-def DeMarker(dataframe, Period=14):
-    dataframe['dem_high'] = dataframe['high'] - dataframe['high'].shift(1)
-    dataframe['dem_low'] = dataframe['low'].shift(1) - dataframe['low']
-    dataframe.loc[(dataframe['dem_high'] < 0), 'dem_high'] = 0
-    dataframe.loc[(dataframe['dem_low'] < 0), 'dem_low'] = 0
-
-    dem = ta.SMA(dataframe['dem_high'], Period) / (ta.SMA(dataframe['dem_high'], Period) + ta.SMA(dataframe['dem_low'], Period))
-    return dem
-
-def vortex_indicator(dataframe, Period=14):
-    vm_plus = abs(dataframe['high'] - dataframe['low'].shift(1))
-    vm_minus = abs(dataframe['low'] - dataframe['high'].shift(1))
-
-    tr1 = dataframe['high'] - dataframe['low']
-    tr2 = abs(dataframe['high'] - dataframe['close'].shift(1))
-    tr3 = abs(dataframe['low'] - dataframe['close'].shift(1))
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-
-    sum_vm_plus = vm_plus.rolling(window=Period).sum()
-    sum_vm_minus = vm_minus.rolling(window=Period).sum()
-    sum_tr = tr.rolling(window=Period).sum()
-
-    vi_plus = sum_vm_plus / sum_tr
-    vi_minus = sum_vm_minus / sum_tr
-
-    return vi_plus, vi_minus
-
-def supertrend(df, multiplier, period):
-    df['TR'] = ta.TRANGE(df)
-    df['ATR'] = ta.SMA(df['TR'], period)
-
-    st = 'ST'
-    stx = 'STX'
-
-    # Compute basic upper and lower bands
-    df['basic_ub'] = (df['high'] + df['low']) / 2 + multiplier * df['ATR']
-    df['basic_lb'] = (df['high'] + df['low']) / 2 - multiplier * df['ATR']
-
-    # Compute final upper and lower bands
-    df['final_ub'] = 0.00
-    df['final_lb'] = 0.00
-    for i in range(period, len(df)):
-        df['final_ub'].iat[i] = df['basic_ub'].iat[i] if df['basic_ub'].iat[i] < df['final_ub'].iat[i - 1] or df['close'].iat[i - 1] > df['final_ub'].iat[i - 1] else df['final_ub'].iat[i - 1]
-        df['final_lb'].iat[i] = df['basic_lb'].iat[i] if df['basic_lb'].iat[i] > df['final_lb'].iat[i - 1] or df['close'].iat[i - 1] < df['final_lb'].iat[i - 1] else df['final_lb'].iat[i - 1]
-
-    # Set the Supertrend value
-    df[st] = 0.00
-    for i in range(period, len(df)):
-        df[st].iat[i] = df['final_ub'].iat[i] if df[st].iat[i - 1] == df['final_ub'].iat[i - 1] and df['close'].iat[i] <= df['final_ub'].iat[i] else \
-                        df['final_lb'].iat[i] if df[st].iat[i - 1] == df['final_ub'].iat[i - 1] and df['close'].iat[i] >  df['final_ub'].iat[i] else \
-                        df['final_lb'].iat[i] if df[st].iat[i - 1] == df['final_lb'].iat[i - 1] and df['close'].iat[i] >= df['final_lb'].iat[i] else \
-                        df['final_ub'].iat[i] if df[st].iat[i - 1] == df['final_lb'].iat[i - 1] and df['close'].iat[i] <  df['final_lb'].iat[i] else 0.00
-    # Mark the trend direction up/down
-    df[stx] = np.where((df[st] > 0.00), np.where((df['close'] < df[st]), 'down',  'up'), np.NaN)
-
-    # Remove basic and final bands from the columns
-    df.drop(['basic_ub', 'basic_lb', 'final_ub', 'final_lb'], inplace=True, axis=1)
-
-    df.fillna(0, inplace=True)
-
-    return df
-
 def execute_strategy(df, pair, strategy_num):
     """Execute the specified strategy"""
-    
-    if strategy_num == 9:
-        # Strategy 9, period: 30
-        heikinashi = qtpylib.heikinashi(df)
-        df['open'] = heikinashi['open']
-        df['close'] = heikinashi['close']
-        df['high'] = heikinashi['high']
-        df['low'] = heikinashi['low']
-        df = supertrend(df, 1.3, 13)
-        df['ma1'] = ta.EMA(df["close"], timeperiod=16)
-        df['ma2'] = ta.EMA(df["close"], timeperiod=165)
-        df['buy'], df['cross'] = 0, 0
-        df.loc[(qtpylib.crossed_above(df['ST'], df['ma1'])), 'cross'] = 1
-        df.loc[(qtpylib.crossed_below(df['ST'], df['ma1'])), 'cross'] = -1
-        df.loc[(
-                (df['STX'] == "up") &
-                (df['ma1'] > df['ma2']) &
-                (df['cross'] == 1)
-            ), 'buy'] = 1
-        df.loc[(
-                (df['STX'] == "down") &
-                (df['ma1'] < df['ma2']) &
-                (df['cross'] == -1)
-            ), 'buy'] = -1
-        if df.loc[len(df)-1]['buy'] != 0:
-            t = threading.Thread(target=buy2, args=(base_amount, pair, "call" if df.loc[len(df)-1]['buy'] == 1 else "put", expiration,))
-            t.start()
-    
-    elif strategy_num == 8:
-        # Strategy 8, period: 15
-        df['ma1'] = ta.SMA(df["close"], timeperiod=7)
-        df['ma2'] = ta.SMA(df["close"], timeperiod=9)
-        df['ma3'] = ta.SMA(df["close"], timeperiod=14)
-        df['buy'], df['ma13c'], df['ma23c'] = 0, 0, 0
-        df.loc[(qtpylib.crossed_above(df['ma1'], df['ma3'])), 'ma13c'] = 1
-        df.loc[(qtpylib.crossed_below(df['ma1'], df['ma3'])), 'ma13c'] = -1
-        df.loc[(qtpylib.crossed_above(df['ma2'], df['ma3'])), 'ma23c'] = 1
-        df.loc[(qtpylib.crossed_below(df['ma2'], df['ma3'])), 'ma23c'] = -1
-        df.loc[(
-                (df['ma23c'] == 1) &
-                (
-                    (df['ma13c'] == 1) |
-                    (df['ma13c'].shift(1) == 1)
-                )
-            ), 'buy'] = 1
-        df.loc[(
-                (df['ma23c'] == -1) &
-                (
-                    (df['ma13c'] == -1) |
-                    (df['ma13c'].shift(1) == -1)
-                )
-            ), 'buy'] = -1
-        if df.loc[len(df)-1]['buy'] != 0:
-            t = threading.Thread(target=buy2, args=(base_amount, pair, "call" if df.loc[len(df)-1]['buy'] == 1 else "put", expiration,))
-            t.start()
-    
-    elif strategy_num == 5:
-        # Strategy 5, period: 120
-        heikinashi = qtpylib.heikinashi(df)
-        df['open'] = heikinashi['open']
-        df['close'] = heikinashi['close']
-        df['high'] = heikinashi['high']
-        df['low'] = heikinashi['low']
-        bollinger = qtpylib.bollinger_bands(qtpylib.typical_price(df), window=6, stds=1.3)
-        df['bb_low'] = bollinger['lower']
-        df['bb_mid'] = bollinger['mid']
-        df['bb_up'] = bollinger['upper']
-        df['macd'], df['macdsignal'], df['macdhist'] = ta.MACD(df['close'], 6, 19, 6)
-        df['macd_cross'], df['hist_cross'], df['buy'] = 0, 0, 0
-        df.loc[(
-                (df['macd'].shift(1) < df['macdsignal'].shift(1)) &
-                (df['macd'] > df['macdsignal'])
-            ), 'macd_cross'] = 1
-        df.loc[(
-                (df['macd'].shift(1) > df['macdsignal'].shift(1)) &
-                (df['macd'] < df['macdsignal'])
-            ), 'macd_cross'] = -1
-        df.loc[(
-                (df['macdhist'].shift(1) < 0) &
-                (df['macdhist'] > 0)
-            ), 'hist_cross'] = 1
-        df.loc[(
-                (df['macdhist'].shift(1) > 0) &
-                (df['macdhist'] < 0)
-            ), 'hist_cross'] = -1
-        df.loc[(
-                (df['close'] > df['bb_up']) &
-                (
-                    (df['macd_cross'] == 1) |
-                    (df['macd_cross'].shift(1) == 1) |
-                    (df['macd_cross'].shift(2) == 1)
-                ) &
-                (
-                    (df['hist_cross'] == 1) |
-                    (df['hist_cross'].shift(1) == 1) |
-                    (df['hist_cross'].shift(2) == 1)
-                )
-            ), 'buy'] = 1
-        df.loc[(
-                (df['close'] < df['bb_low']) &
-                (
-                    (df['macd_cross'] == -1) |
-                    (df['macd_cross'].shift(1) == -1) |
-                    (df['macd_cross'].shift(2) == -1)
-                ) &
-                (
-                    (df['hist_cross'] == -1) |
-                    (df['hist_cross'].shift(1) == -1) |
-                    (df['hist_cross'].shift(2) == -1)
-                )
-            ), 'buy'] = -1
-        if df.loc[len(df)-1]['buy'] != 0:
-            t = threading.Thread(target=buy2, args=(base_amount, pair, "call" if df.loc[len(df)-1]['buy'] == 1 else "put", expiration,))
-            t.start()
-    
-    # Add more strategies as needed...
-    else:
+    if strategy_num not in CLAUDE_STRATEGIES:
         global_value.logger(f"Strategy {strategy_num} not implemented", "WARNING")
+        return
+
+    action = claude_signal(df, strategy_num)
+    if action is not None:
+        t = threading.Thread(target=buy2, args=(base_amount, pair, action, expiration,))
+        t.start()
 
 def strategie():
     # Check pending trade results for martingale
     check_trade_results()
     
     for pair in global_value.pairs:
-        if 'history' in global_value.pairs[pair]:
-            history = []
-            history.extend(global_value.pairs[pair]['history'])
-            if 'dataframe' in global_value.pairs[pair]:
-                df = make_df(global_value.pairs[pair]['dataframe'], history)
-            else:
-                df = make_df(None, history)
+        if 'candles' in global_value.pairs[pair]:
+            df = global_value.pairs[pair]['candles'].frame()
 
             # Execute the configured strategy
             execute_strategy(df, pair, strategy_number)
 
-            global_value.pairs[pair]['dataframe'] = df
-
 def prepare_get_history():
     try:
         data = get_payout()
@@ -628,9 +424,9 @@ def start_get_history():
         for pair in global_value.pairs:
             i += 1
             global_value.logger('%s (%s/%s)' % (str(pair), str(i), str(len(global_value.pairs))), "INFO")
-            if not global_value.check_cache(str(global_value.pairs[pair]["id"])):
-                time_red = int(datetime.now().timestamp()) - 86400 * 7
-                df = api.get_history(pair, period, end_time=time_red)
+            # The backfill diffs the week against the store and only fetches the gaps
+            time_red = int(datetime.now().timestamp()) - 86400 * 7
+            api.get_history(pair, period, end_time=time_red)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,102 @@
+# dashboard_broadcast.py - Batched, sequence numbered Socket.IO updates for the dashboard
+import copy
+import logging
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class DeltaBroadcaster:
+    """Coalesce dashboard updates into one `delta` event per interval.
+
+    Log lines and trades are queued with `append`; the watched stats dict is
+    diffed against what clients last received, so only changed fields are
+    sent. Every delta carries a sequence number and the last `history`
+    deltas are kept: a client that reconnects sends `resync` with the last
+    sequence it applied and gets the deltas it missed, or a full snapshot
+    when they are no longer available.
+
+    Events seen by a client: `snapshot` ({seq, stats, logs, trades}) on
+    connect and as a resync reply, `delta` ({seq, time, stats, logs?,
+    trades?}) broadcast once per interval, and `deltas` (a list of delta
+    dicts, oldest first) as the other resync reply. Note the plural: a
+    resync answer is a list, not a single broadcast delta. A client applies
+    a delta only when its seq is one past the last it applied and resyncs
+    on any gap.
+    """
+
+    def __init__(self, socketio, stats, interval=0.5, history=500, keep=200):
+        self.socketio = socketio
+        self.stats = stats
+        self.interval = interval
+        self.history = deque(maxlen=history)
+        self.recent = {}
+        self.keep = keep
+        self.pending = {}
+        self.sent_stats = {}
+        self.seq = 0
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+
+    def append(self, channel, item):
+        """Queue an item (log line, trade) for the next delta."""
+        with self.lock:
+            self.pending.setdefault(channel, []).append(item)
+
+    def _changed_stats(self):
+        changed = {}
+        for key, value in self.stats.items():
+            if self.sent_stats.get(key, changed) != value:
+                changed[key] = copy.deepcopy(value)
+        self.sent_stats.update(changed)
+        return changed
+
+    def flush(self):
+        """Send everything queued since the last delta. Returns the delta or None."""
+        with self.lock:
+            changed = self._changed_stats()
+            if not changed and not self.pending:
+                return None
+            self.seq += 1
+            delta = {'seq': self.seq, 'time': time.time(), 'stats': changed}
+            delta.update(self.pending)
+            for channel, items in self.pending.items():
+                recent = self.recent.setdefault(channel, deque(maxlen=self.keep))
+                recent.extend(items)
+            self.pending = {}
+            self.history.append(delta)
+        self.socketio.emit('delta', delta)
+        return delta
+
+    def snapshot(self):
+        """Full state as of the last delta sent."""
+        with self.lock:
+            snapshot = {'seq': self.seq, 'stats': copy.deepcopy(self.sent_stats)}
+            for channel, recent in self.recent.items():
+                snapshot[channel] = list(recent)
+            return snapshot
+
+    def resync(self, since):
+        """Return ('deltas', [...]) after sequence `since`, or ('snapshot', {...})."""
+        with self.lock:
+            if since is not None and since <= self.seq:
+                if since == self.seq:
+                    return 'deltas', []
+                if self.history and self.history[0]['seq'] <= since + 1:
+                    return 'deltas', [d for d in self.history if d['seq'] > since]
+        return 'snapshot', self.snapshot()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error broadcasting dashboard delta: {e}")
@@ -5,15 +5,21 @@ from flask_socketio import SocketIO, emit
 import threading
 import time
 import json
+import math
 import csv
+import io
 import os
 from datetime import datetime, timedelta
 import pandas as pd
+from log_segments import SegmentedLog, retention_cutoff
+from bot_ipc import EventSubscriber, IPC_ENV
+from dashboard_broadcast import DeltaBroadcaster
 from collections import deque
 import subprocess
 import sys
 import signal
 import logging
+import tempfile
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key-here'
@@ -35,8 +41,13 @@ bot_stats = {
     'signals_today': 0,
     'balance': 1000.0,
     'active_trades': 0,
-    'api_connected': False
+    'api_connected': False,
+    'latency': {}
 }
+balance_reported = False  # Balance comes from the bot once it publishes one
+
+# Log lines, trades and changed stats go to clients as one sequenced delta per interval
+broadcaster = DeltaBroadcaster(socketio, bot_stats, interval=0.5)
 
 # Configuration
 bot_config = {
@@ -55,9 +66,15 @@ recent_trades = deque(maxlen=100)
 recent_logs = deque(maxlen=200)
 
 # File paths
-LOG_FILE = "trades_log.csv"
+LOG_DIR = "trades_log"  # One CSV segment per day, see log_segments.py
+LEGACY_LOG_FILE = "trades_log.csv"  # Single-file log, split into segments on startup
+CHECKPOINT_FILE = "trades_log.checkpoint.json"  # Aggregates of the scanned part of today's segment
+RETENTION_DAYS = 7
 CONFIG_FILE = "bot_config.json"
 BOT_SCRIPT = "fcb_trading_bot.py"  # Your main bot script
+IPC_SOCKET = os.path.join(tempfile.gettempdir(), f"fcb_dashboard_{os.getpid()}.sock")  # Bot event channel
+
+trade_log = SegmentedLog(LOG_DIR)
 
 def load_config():
     """Load bot configuration from file"""
@@ -79,90 +96,183 @@ def save_config():
     except Exception as e:
         logger.error(f"Error saving config: {e}")
 
+def _read_header(path):
+    """Return the CSV header fields and the byte offset where the rows start"""
+    with open(path, 'rb') as f:
+        line = f.readline()
+    return next(csv.reader([line.decode('utf-8')])), len(line)
+
+def _trade_from_row(row):
+    """Build a dashboard trade dict from a CSV row; raises on malformed rows"""
+    datetime.strptime(row['timestamp'], '%Y-%m-%d %H:%M:%S')
+    return {
+        'timestamp': row['timestamp'],
+        'pair': row['pair'],
+        'direction': row['direction'],
+        'amount': float(row['amount']),
+        'price': float(row['price']),
+        'result': row['result'],
+        'strategy_data': {
+            'fractal_level': row.get('fractal_level') or 'N/A',
+            'chaos_value': row.get('chaos_value') or 'N/A',
+            'volatility': row.get('volatility') or 'N/A'
+        }
+    }
+
+def _daily_aggregates(df):
+    """Vectorized per-day trade counts and P&L for a block of CSV rows"""
+    timestamps = pd.to_datetime(df['timestamp'], format='%Y-%m-%d %H:%M:%S', errors='coerce')
+    amounts = pd.to_numeric(df['amount'], errors='coerce')
+    valid = timestamps.notna() & amounts.notna() & pd.to_numeric(df['price'], errors='coerce').notna()
+    if not valid.any():
+        return {}
+    
+    result = df['result'][valid]
+    amounts = amounts[valid]
+    wins = result == 'win'
+    losses = result == 'loss'
+    frame = pd.DataFrame({
+        'total_trades': 1,
+        'wins': wins.astype(int),
+        'losses': losses.astype(int),
+        'daily_pnl': amounts.where(wins, 0) * 0.8 - amounts.where(losses, 0)  # Assuming 80% payout
+    })
+    grouped = frame.groupby(timestamps[valid].dt.strftime('%Y-%m-%d')).sum()
+    return {
+        day: {
+            'total_trades': int(row['total_trades']),
+            'wins': int(row['wins']),
+            'losses': int(row['losses']),
+            'daily_pnl': float(row['daily_pnl'])
+        }
+        for day, row in grouped.iterrows()
+    }
+
+def _merge_days(days, update):
+    for day, stats in update.items():
+        current = days.setdefault(day, {'total_trades': 0, 'wins': 0, 'losses': 0, 'daily_pnl': 0.0})
+        for key, value in stats.items():
+            current[key] += value
+
+def _scan_daily_stats(path, header, start, block_size=8 * 1024 * 1024):
+    """Aggregate rows from byte `start` to the last complete line, one block at a time.
+
+    Returns (days, offset) where offset is the first byte not yet aggregated.
+    """
+    days = {}
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        f.seek(start)
+        offset = start
+        carry = b''
+        while offset + len(carry) < end:
+            data = carry + f.read(min(block_size, end - offset - len(carry)))
+            cut = data.rfind(b'\n') + 1
+            if cut == 0:
+                break  # Trailing row still being written
+            df = pd.read_csv(io.BytesIO(data[:cut]), names=header, header=None, dtype=str,
+                             keep_default_na=False, on_bad_lines='skip')
+            if len(df):
+                _merge_days(days, _daily_aggregates(df))
+            offset += cut
+            carry = data[cut:]
+    return days, offset
+
+def _load_checkpoint(path, header):
+    try:
+        with open(CHECKPOINT_FILE, 'r') as f:
+            checkpoint = json.load(f)
+        if checkpoint.get('path') != path or checkpoint.get('header') != header:
+            return None
+        offset = checkpoint['offset']
+        with open(path, 'rb') as f:
+            # A rewritten or truncated log no longer ends a line at the saved offset
+            f.seek(offset - 1)
+            if f.read(1) != b'\n':
+                return None
+        return checkpoint
+    except (OSError, ValueError, KeyError):
+        return None
+
+def _save_checkpoint(path, header, offset, days):
+    checkpoint = {
+        'path': path,
+        'header': header,
+        'offset': offset,
+        'days': days
+    }
+    tmp = CHECKPOINT_FILE + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp, CHECKPOINT_FILE)
+
 def load_trades_from_csv():
-    """Load existing trades from CSV log file"""
-    global recent_trades, bot_stats
+    """Load existing trades from the day segments of the trade log
     
-    if not os.path.exists(LOG_FILE):
-        return
+    Only the newest segments are parsed for `recent_trades`. Daily stats come
+    from today's segment: a checkpoint of its aggregates plus a vectorized
+    scan of the rows appended since it was written.
+    """
+    global recent_trades, bot_stats
     
     try:
-        df = pd.read_csv(LOG_FILE)
-        today = datetime.now().date()
-        
-        # Reset daily stats
-        bot_stats['total_trades'] = 0
-        bot_stats['wins'] = 0
-        bot_stats['losses'] = 0
-        bot_stats['daily_pnl'] = 0.0
-        
-        for _, row in df.iterrows():
+        # Recent trades: parse only the newest segments
+        _, rows = trade_log.tail(recent_trades.maxlen * 2)
+        trades = []
+        for row in rows:
             try:
-                trade_date = datetime.strptime(row['timestamp'], '%Y-%m-%d %H:%M:%S').date()
-                
-                trade_data = {
-                    'timestamp': row['timestamp'],
-                    'pair': row['pair'],
-                    'direction': row['direction'],
-                    'amount': float(row['amount']),
-                    'price': float(row['price']),
-                    'result': row['result'],
-                    'strategy_data': {
-                        'fractal_level': row.get('fractal_level', 'N/A'),
-                        'chaos_value': row.get('chaos_value', 'N/A'),
-                        'volatility': row.get('volatility', 'N/A')
-                    }
-                }
-                
-                # Add to recent trades
-                recent_trades.append(trade_data)
-                
-                # Update daily stats
-                if trade_date == today:
-                    bot_stats['total_trades'] += 1
-                    if row['result'] == 'win':
-                        bot_stats['wins'] += 1
-                        bot_stats['daily_pnl'] += float(row['amount']) * 0.8  # Assuming 80% payout
-                    elif row['result'] == 'loss':
-                        bot_stats['losses'] += 1
-                        bot_stats['daily_pnl'] -= float(row['amount'])
-                        
+                trades.append(_trade_from_row(row))
             except Exception as e:
                 logger.error(f"Error processing trade row: {e}")
-                continue
+        recent_trades.extend(trades[-recent_trades.maxlen:])
+        
+        # Daily stats: resume from the checkpoint when it still matches the segment
+        path = trade_log.segment_path(datetime.now().strftime('%Y-%m-%d'))
+        if not os.path.exists(path):
+            return
+        header, data_start = _read_header(path)
+        checkpoint = _load_checkpoint(path, header)
+        if checkpoint:
+            days, start = checkpoint['days'], checkpoint['offset']
+        else:
+            days, start = {}, data_start
+        new_days, offset = _scan_daily_stats(path, header, start)
+        _merge_days(days, new_days)
+        _save_checkpoint(path, header, offset, days)
+        
+        today = days.get(datetime.now().strftime('%Y-%m-%d'), {})
+        bot_stats['total_trades'] = today.get('total_trades', 0)
+        bot_stats['wins'] = today.get('wins', 0)
+        bot_stats['losses'] = today.get('losses', 0)
+        bot_stats['daily_pnl'] = today.get('daily_pnl', 0.0)
                 
-        logger.info(f"Loaded {len(recent_trades)} trades from CSV")
+        logger.info(f"Loaded {len(recent_trades)} trades from CSV "
+                    f"({offset - start} new bytes scanned{', checkpoint reused' if checkpoint else ''})")
         
     except Exception as e:
         logger.error(f"Error loading trades from CSV: {e}")
 
 def save_trade_to_csv(trade_data):
-    """Save a trade to the CSV log file"""
+    """Save a trade to the day segment of the trade log"""
     try:
-        file_exists = os.path.exists(LOG_FILE)
+        fieldnames = ['timestamp', 'pair', 'direction', 'amount', 'price', 'result', 
+                     'fractal_level', 'chaos_value', 'volatility']
         
-        with open(LOG_FILE, 'a', newline='') as csvfile:
-            fieldnames = ['timestamp', 'pair', 'direction', 'amount', 'price', 'result', 
-                         'fractal_level', 'chaos_value', 'volatility']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            
-            if not file_exists:
-                writer.writeheader()
-            
-            # Flatten strategy data for CSV
-            row_data = {
-                'timestamp': trade_data['timestamp'],
-                'pair': trade_data['pair'],
-                'direction': trade_data['direction'],
-                'amount': trade_data['amount'],
-                'price': trade_data['price'],
-                'result': trade_data['result'],
-                'fractal_level': trade_data.get('strategy_data', {}).get('fractal_level', 'N/A'),
-                'chaos_value': trade_data.get('strategy_data', {}).get('chaos_value', 'N/A'),
-                'volatility': trade_data.get('strategy_data', {}).get('volatility', 'N/A')
-            }
-            
-            writer.writerow(row_data)
+        # Flatten strategy data for CSV
+        row_data = {
+            'timestamp': trade_data['timestamp'],
+            'pair': trade_data['pair'],
+            'direction': trade_data['direction'],
+            'amount': trade_data['amount'],
+            'price': trade_data['price'],
+            'result': trade_data['result'],
+            'fractal_level': trade_data.get('strategy_data', {}).get('fractal_level', 'N/A'),
+            'chaos_value': trade_data.get('strategy_data', {}).get('chaos_value', 'N/A'),
+            'volatility': trade_data.get('strategy_data', {}).get('volatility', 'N/A')
+        }
+        
+        trade_log.append([row_data], fieldnames)
             
     except Exception as e:
         logger.error(f"Error saving trade to CSV: {e}")
@@ -177,8 +287,8 @@ def add_log(message, level='info'):
     }
     recent_logs.append(log_entry)
     
-    # Emit to connected clients
-    socketio.emit('new_log', log_entry)
+    # Sent to connected clients with the next delta
+    broadcaster.append('logs', log_entry)
     logger.info(f"[{level.upper()}] {message}")
 
 def update_bot_stats(trade_data=None):
@@ -196,8 +306,7 @@ def update_bot_stats(trade_data=None):
             bot_stats['daily_pnl'] -= trade_data['amount']
             bot_stats['balance'] -= trade_data['amount']
     
-    # Emit updated stats to clients
-    socketio.emit('stats_update', bot_stats)
+    # Changed fields are picked up by the next delta
 
 # Flask Routes
 
@@ -254,10 +363,11 @@ def start_bot():
         if not os.path.exists(BOT_SCRIPT):
             return jsonify({'success': False, 'error': f'Bot script {BOT_SCRIPT} not found'})
         
-        # Start the bot process
+        # Start the bot process; events arrive over IPC, stdout/stderr are only logged
         bot_process = subprocess.Popen([
             sys.executable, BOT_SCRIPT
-        ], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        ], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+            env=dict(os.environ, **{IPC_ENV: IPC_SOCKET}))
         
         bot_running = True
         bot_stats['api_connected'] = True
@@ -327,21 +437,13 @@ def monitor_bot_output():
         return
     
     try:
-        while bot_running and bot_process.poll() is None:
-            output = bot_process.stdout.readline()
-            if output:
-                # Parse bot output and extract relevant information
-                line = output.strip()
+        # readline blocks until the bot writes; stderr is merged so neither pipe fills up
+        for output in iter(bot_process.stdout.readline, ''):
+            if not bot_running:
+                break
+            line = output.strip()
+            if line:
                 add_log(f"Bot: {line}")
-                
-                # Try to parse trade information from bot output
-                if "TRADE_PLACED" in line:
-                    parse_trade_output(line)
-                elif "SIGNAL_DETECTED" in line:
-                    bot_stats['signals_today'] += 1
-                    socketio.emit('stats_update', bot_stats)
-                    
-            time.sleep(0.1)
             
     except Exception as e:
         logger.error(f"Error monitoring bot output: {e}")
@@ -351,23 +453,23 @@ def monitor_bot_output():
             bot_stats['api_connected'] = False
             add_log("Bot process terminated", "warning")
 
-def parse_trade_output(output_line):
-    """Parse trade information from bot output"""
+def handle_bot_event(name, timestamp, fields):
+    """Apply a typed event published by the bot over the IPC channel"""
+    global balance_reported
+    
     try:
-        # Expected format: TRADE_PLACED|EURUSD_otc|call|100|1.12345|win|fractal_data
-        parts = output_line.split('|')
-        if len(parts) >= 6:
+        if name == 'trade':
             trade_data = {
-                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                'pair': parts[1],
-                'direction': parts[2],
-                'amount': float(parts[3]),
-                'price': float(parts[4]),
-                'result': parts[5],
+                'timestamp': datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S'),
+                'pair': fields['pair'],
+                'direction': fields['direction'],
+                'amount': fields['amount'],
+                'price': fields['price'],
+                'result': fields['result'],
                 'strategy_data': {
-                    'fractal_level': parts[6] if len(parts) > 6 else 'N/A',
-                    'chaos_value': parts[7] if len(parts) > 7 else 'N/A',
-                    'volatility': parts[8] if len(parts) > 8 else 'N/A'
+                    # NaN marks a value the bot did not have
+                    key: 'N/A' if math.isnan(fields[key]) else fields[key]
+                    for key in ('fractal_level', 'chaos_value', 'volatility')
                 }
             }
             
@@ -380,13 +482,25 @@ def parse_trade_output(output_line):
             # Update stats
             update_bot_stats(trade_data)
             
-            # Emit to clients
-            socketio.emit('new_trade', trade_data)
+            # Sent to clients with the next delta
+            broadcaster.append('trades', trade_data)
             
             add_log(f"Trade processed: {trade_data['pair']} {trade_data['direction']} - {trade_data['result']}", "trade")
             
+        elif name == 'signal':
+            bot_stats['signals_today'] += 1
+            
+        elif name == 'balance':
+            balance_reported = True
+            bot_stats['balance'] = fields['balance']
+            
+        elif name == 'latency':
+            bot_stats['latency'][fields['name']] = fields['seconds']
+            
     except Exception as e:
-        logger.error(f"Error parsing trade output: {e}")
+        logger.error(f"Error handling bot event {name}: {e}")
+
+bot_events = EventSubscriber(IPC_SOCKET, handle_bot_event)
 
 # Socket.IO Events
 
@@ -394,8 +508,8 @@ def parse_trade_output(output_line):
 def handle_connect():
     """Handle client connection"""
     logger.info('Client connected')
-    # Send current status to newly connected client
-    emit('stats_update', bot_stats)
+    # Send current state to newly connected client; deltas follow from its seq
+    emit('snapshot', broadcaster.snapshot())
     emit('config_update', bot_config)
 
 @socketio.on('disconnect')
@@ -405,15 +519,19 @@ def handle_disconnect():
 
 @socketio.on('request_data')
 def handle_data_request():
-    """Handle request for current data"""
-    emit('stats_update', bot_stats)
-    emit('trades_update', list(recent_trades)[-10:])  # Last 10 trades
-    emit('logs_update', list(recent_logs)[-50:])      # Last 50 logs
+    """Send the current state as a snapshot; deltas follow from its seq"""
+    emit('snapshot', broadcaster.snapshot())
+
+@socketio.on('resync')
+def handle_resync(data):
+    """Send a reconnecting client the deltas it missed, or a snapshot"""
+    kind, payload = broadcaster.resync((data or {}).get('seq'))
+    emit(kind, payload)
 
 # Periodic tasks
 
 def periodic_stats_update():
-    """Periodically update and broadcast stats"""
+    """Periodically update derived stats; the broadcaster sends what changed"""
     while True:
         try:
             if bot_running:
@@ -422,11 +540,9 @@ def periodic_stats_update():
                 if bot_stats['total_trades'] > 0:
                     win_rate = (bot_stats['wins'] / bot_stats['total_trades']) * 100
                 
-                # Update balance based on P&L
-                bot_stats['balance'] = 1000.0 + bot_stats['daily_pnl']
-                
-                # Broadcast to all connected clients
-                socketio.emit('stats_update', bot_stats)
+                # Update balance based on P&L until the bot reports its own
+                if not balance_reported:
+                    bot_stats['balance'] = 1000.0 + bot_stats['daily_pnl']
                 
             time.sleep(5)  # Update every 5 seconds
             
@@ -435,24 +551,22 @@ def periodic_stats_update():
             time.sleep(5)
 
 def cleanup_old_logs():
-    """Clean up old log entries daily"""
+    """Drop expired day segments and compress closed days, once a day"""
     while True:
         try:
-            time.sleep(86400)  # Run daily
+            # Keep only logs from last RETENTION_DAYS days
+            removed = trade_log.drop_before(retention_cutoff(RETENTION_DAYS))
             
-            # Keep only logs from last 7 days
-            cutoff_date = datetime.now() - timedelta(days=7)
+            # Yesterday stays plain in case the bot is still flushing its last rows
+            compacted = trade_log.compact(retention_cutoff(1))
             
-            if os.path.exists(LOG_FILE):
-                df = pd.read_csv(LOG_FILE)
-                df['timestamp'] = pd.to_datetime(df['timestamp'])
-                df_filtered = df[df['timestamp'] >= cutoff_date]
-                df_filtered.to_csv(LOG_FILE, index=False)
-                
-                logger.info(f"Cleaned up old logs. Kept {len(df_filtered)} recent trades.")
+            if removed or compacted:
+                logger.info(f"Cleaned up old logs. Dropped {len(removed)} segments, compressed {len(compacted)}.")
                 
         except Exception as e:
             logger.error(f"Error cleaning up logs: {e}")
+            
+        time.sleep(86400)  # Run daily
 
 # Initialize and start server
 
@@ -461,8 +575,15 @@ def initialize_server():
     try:
         # Load configuration and existing data
         load_config()
+        migrated = trade_log.migrate(LEGACY_LOG_FILE)
+        if migrated:
+            logger.info(f"Split {migrated} trades from {LEGACY_LOG_FILE} into day segments")
         load_trades_from_csv()
         
+        # Bot events are published to this socket by the bot process
+        bot_events.start()
+        broadcaster.start()
+        
         # Add initial log
         add_log("Dashboard server initialized")
         
@@ -480,6 +601,7 @@ def initialize_server():
 def signal_handler(signum, frame):
     """Handle shutdown signals"""
     logger.info("Received shutdown signal")
+    bot_events.close()
     if bot_process:
         try:
             bot_process.terminate()
@@ -1,10 +1,13 @@
-import time, math, asyncio, json, threading, csv, os 
+import time, json, threading
 from datetime import datetime, timedelta
 from pocketoptionapi.stable_api import PocketOption
+from pocketoptionapi.ws.settlement import SettlementTimeout, deal_status
 import pocketoptionapi.global_value as global_value
-import talib.abstract as ta
-import numpy as np
-import pandas as pd
+from strategies import FCBStrategy
+from strategy_executor import StrategyExecutor
+from trade_journal import TradeJournal
+from log_segments import SegmentedLog
+from bot_ipc import EventPublisher
 from collections import deque
 import warnings
 from shared_state import BotIntegration
@@ -22,7 +25,7 @@ expiration = 180
 api = PocketOption(ssid, demo)
 api.connect()
 
-LOG_FILE = "trades_log.csv"
+LOG_DIR = "trades_log"  # One CSV segment and one columnar binary journal segment per day
 
 # Enhanced configuration for FCB strategy
 FCB_CONFIG = {
@@ -35,12 +38,32 @@ FCB_CONFIG = {
     'min_volatility': 0.0001,     # Minimum volatility threshold
     'max_trades_per_pair': 3,     # Maximum concurrent trades per pair
     'cooldown_period': 300,       # Cooldown between trades (seconds)
+    'executor_mode': 'thread',    # Parallel pair evaluation: 'thread' or 'process'
+    'executor_workers': None,     # Worker count (None = pool default)
+    'journal_flush_interval': 1.0,  # Max seconds of trade rows lost if the bot crashes
+    'journal_fsync_interval': 5.0,  # Max seconds of trade rows lost on power failure
 }
 
 # Global variables for enhanced strategy
 pair_states = {}
 trade_history = deque(maxlen=1000)
 active_trades = {}
+enhanced_fcb_strategy = FCBStrategy(FCB_CONFIG)
+indicator_cache = enhanced_fcb_strategy.indicator_cache
+
+TRADE_FIELDS = [
+    "timestamp", "pair", "direction", "amount", "expiration", "signal", "price", "result",
+    "fractal_upper", "fractal_lower", "chaos_osc", "volatility", "trend_strength"
+]
+# Single writer for the trade log; buy/settlement threads only enqueue rows
+trade_log = SegmentedLog(LOG_DIR)
+journal = TradeJournal(
+    trade_log, TRADE_FIELDS, trade_log,
+    flush_interval=FCB_CONFIG['journal_flush_interval'],
+    fsync_interval=FCB_CONFIG['journal_fsync_interval']
+)
+# Typed trade/signal/balance/latency events for the dashboard (no-op when not launched by it)
+events = EventPublisher()
 
 def log_trade(pair, direction, amount, expiration, last, result=None, strategy_data=None):
     """Enhanced trade logging with strategy-specific data"""
@@ -60,18 +83,14 @@ def log_trade(pair, direction, amount, expiration, last, result=None, strategy_d
         "trend_strength": strategy_data.get('trend_strength', 0) if strategy_data else 0
     }
 
-    file_exists = os.path.isfile(LOG_FILE)
-    with open(LOG_FILE, mode='a', newline='') as file:
-        writer = csv.DictWriter(file, fieldnames=log_data.keys())
-        if not file_exists:
-            writer.writeheader()
-        writer.writerow(log_data)
+    journal.write(log_data)
 
 def get_payout():
     """Get available pairs with minimum payout requirement"""
     try:
         d = json.loads(global_value.PayoutData)
         valid_pairs = 0
+        listed = []
         for pair in d:
             if len(pair) == 19 and pair[14] and pair[5] >= min_payout and "_otc" in pair[1]:
                 global_value.pairs[pair[1]] = {
@@ -87,8 +106,12 @@ def get_payout():
                         'consecutive_losses': 0,
                         'total_trades': 0
                     }
+                listed.append(pair[1])
                 valid_pairs += 1
         
+        # Pairs that left the payout list no longer need cached indicators
+        indicator_cache.retain(listed)
+        
         global_value.logger(f"Found {valid_pairs} valid pairs with minimum {min_payout}% payout", "INFO")
         return valid_pairs > 0
     except Exception as e:
@@ -96,19 +119,12 @@ def get_payout():
         return False
 
 def get_df():
-    """Fetch candle data for all pairs with improved error handling"""
-    successful_pairs = 0
+    """Subscribe to all pairs at once and load their candle data"""
     try:
-        for i, pair in enumerate(global_value.pairs):
-            try:
-                df = api.get_candles(pair, period)
-                if df is not None and not df.empty:
-                    successful_pairs += 1
-                global_value.logger(f'{pair} ({i+1}/{len(global_value.pairs)}) - {"Success" if df is not None else "Failed"}', "INFO")
-                time.sleep(1)  # Rate limiting
-            except Exception as e:
-                global_value.logger(f"Error fetching data for {pair}: {e}", "WARNING")
-                continue
+        results = api.subscribe(list(global_value.pairs), period)
+        successful_pairs = sum(1 for loaded in results.values() if loaded)
+        for pair, loaded in results.items():
+            global_value.logger('%s - %s', "DEBUG", pair, "Success" if loaded else "Failed")
         
         global_value.logger(f"Successfully fetched data for {successful_pairs}/{len(global_value.pairs)} pairs", "INFO")
         return successful_pairs > 0
@@ -116,155 +132,6 @@ def get_df():
         global_value.logger(f"Critical error in get_df: {e}", "ERROR")
         return False
 
-def calculate_fractals(df, period=5):
-    """Calculate fractal levels using Williams Fractals method"""
-    if len(df) < period * 2 + 1:
-        return np.nan, np.nan
-    
-    highs = df['high'].values
-    lows = df['low'].values
-    
-    fractal_highs = []
-    fractal_lows = []
-    
-    for i in range(period, len(df) - period):
-        # Check for fractal high
-        is_fractal_high = all(highs[i] >= highs[j] for j in range(i-period, i+period+1) if j != i)
-        if is_fractal_high:
-            fractal_highs.append((i, highs[i]))
-        
-        # Check for fractal low
-        is_fractal_low = all(lows[i] <= lows[j] for j in range(i-period, i+period+1) if j != i)
-        if is_fractal_low:
-            fractal_lows.append((i, lows[i]))
-    
-    # Get most recent fractal levels
-    recent_high = fractal_highs[-1][1] if fractal_highs else np.nan
-    recent_low = fractal_lows[-1][1] if fractal_lows else np.nan
-    
-    return recent_high, recent_low
-
-def calculate_chaos_oscillator(df, period=13):
-    """Calculate Chaos Oscillator (AO - AC)"""
-    try:
-        # Awesome Oscillator
-        ao = ta.AO(df)
-        
-        # Accelerator Oscillator (AC)
-        ac = ao - ta.SMA(ao, timeperiod=5)
-        
-        # Chaos Oscillator
-        chaos_osc = ao.iloc[-1] - ac.iloc[-1] if len(ao) > 0 and len(ac) > 0 else 0
-        
-        return chaos_osc
-    except:
-        return 0
-
-def calculate_volatility(df, period=14):
-    """Calculate normalized volatility using ATR"""
-    try:
-        atr = ta.ATR(df, timeperiod=period)
-        current_price = df['close'].iloc[-1]
-        volatility = atr.iloc[-1] / current_price if current_price > 0 else 0
-        return volatility
-    except:
-        return 0
-
-def calculate_trend_strength(df, period=20):
-    """Calculate trend strength using ADX"""
-    try:
-        adx = ta.ADX(df, timeperiod=period)
-        return adx.iloc[-1] if len(adx) > 0 else 0
-    except:
-        return 0
-
-def enhanced_fcb_strategy(df, pair):
-    """Enhanced Fractal Chaos Bands strategy with multiple confirmations"""
-    if len(df) < 50:  # Need sufficient data
-        return None, {}
-    
-    try:
-        # Calculate fractal levels
-        fractal_upper, fractal_lower = calculate_fractals(df, FCB_CONFIG['fractal_period'])
-        
-        if np.isnan(fractal_upper) or np.isnan(fractal_lower):
-            return None, {}
-        
-        # Calculate Chaos Oscillator
-        chaos_osc = calculate_chaos_oscillator(df, FCB_CONFIG['chaos_period'])
-        
-        # Calculate volatility
-        volatility = calculate_volatility(df)
-        
-        # Calculate trend strength
-        trend_strength = calculate_trend_strength(df)
-        
-        # Current price data
-        current = df.iloc[-1]
-        previous = df.iloc[-2] if len(df) > 1 else current
-        
-        # Create dynamic bands based on volatility
-        band_width = (fractal_upper - fractal_lower) * FCB_CONFIG['band_multiplier']
-        upper_band = fractal_upper + (band_width * volatility * 10)
-        lower_band = fractal_lower - (band_width * volatility * 10)
-        
-        # Strategy data for logging
-        strategy_data = {
-            'fractal_upper': round(fractal_upper, 5),
-            'fractal_lower': round(fractal_lower, 5),
-            'chaos_osc': round(chaos_osc, 5),
-            'volatility': round(volatility, 6),
-            'trend_strength': round(trend_strength, 2),
-            'upper_band': round(upper_band, 5),
-            'lower_band': round(lower_band, 5)
-        }
-        
-        # Signal generation with multiple confirmations
-        signal = None
-        
-        # Primary condition: Price breakout
-        price_above_upper = current['close'] > upper_band
-        price_below_lower = current['close'] < lower_band
-        
-        # Confirmation filters
-        volatility_ok = volatility >= FCB_CONFIG['min_volatility'] if FCB_CONFIG['volatility_filter'] else True
-        trend_ok = trend_strength >= 25 if FCB_CONFIG['trend_filter'] else True
-        
-        # Momentum confirmation using Chaos Oscillator
-        momentum_bullish = chaos_osc > 0
-        momentum_bearish = chaos_osc < 0
-        
-        # Volume-like confirmation using price action
-        volume_confirmation = abs(current['close'] - current['open']) > abs(previous['close'] - previous['open'])
-        
-        # Signal logic with confirmations
-        if (price_above_upper and momentum_bullish and volatility_ok and 
-            trend_ok and volume_confirmation):
-            signal = "call"
-        elif (price_below_lower and momentum_bearish and volatility_ok and 
-              trend_ok and volume_confirmation):
-            signal = "put"
-        
-        # Additional confirmation: Check for false breakouts
-        if signal:
-            # Look for sustained breakout over confirmation bars
-            confirmation_count = 0
-            for i in range(1, min(FCB_CONFIG['confirmation_bars'] + 1, len(df))):
-                past_candle = df.iloc[-i]
-                if signal == "call" and past_candle['close'] > fractal_upper:
-                    confirmation_count += 1
-                elif signal == "put" and past_candle['close'] < fractal_lower:
-                    confirmation_count += 1
-            
-            if confirmation_count < FCB_CONFIG['confirmation_bars']:
-                signal = None  # Not enough confirmation
-        
-        return signal, strategy_data
-        
-    except Exception as e:
-        global_value.logger(f"Error in enhanced FCB strategy for {pair}: {e}", "ERROR")
-        return None, {}
-
 def can_trade_pair(pair):
     """Check if pair is eligible for trading based on risk management rules"""
     current_time = time.time()
@@ -311,12 +178,14 @@ def buy(amount, pair, action, expiration, last, strategy_data):
             # Log trade immediately
             log_trade(pair, action, amount, expiration, last, "placed", strategy_data)
             
-            # Monitor trade result in separate thread
-            threading.Thread(target=monitor_trade, args=(trade_id, pair, action, amount, expiration, last, strategy_data)).start()
+            # Settlement tracker calls back when the server closes the trade
+            api.watch_order(trade_id, timeout=expiration + 180).add_done_callback(
+                lambda future: on_trade_settled(future, trade_id, pair, action, amount, expiration, last, strategy_data))
             
-            print(
-                f"TRADE_PLACED|{pair}|{action}|{amount}|{last['close']}|placed|"
-                f"{strategy_data.get('fractal_upper', 0)}|{strategy_data.get('chaos_osc', 0)}|{strategy_data.get('volatility', 0)}"
+            events.trade(
+                trade_id=trade_id, pair=pair, direction=action, amount=amount, price=last['close'],
+                result="placed", fractal_level=strategy_data.get('fractal_upper', 0),
+                chaos_value=strategy_data.get('chaos_osc', 0), volatility=strategy_data.get('volatility', 0)
             )
         else:
             global_value.logger(f'Failed to place trade on {pair}', "ERROR")
@@ -326,13 +195,13 @@ def buy(amount, pair, action, expiration, last, strategy_data):
         global_value.logger(f'Error placing trade on {pair}: {e}', "ERROR")
         pair_states[pair]['active_trades'] -= 1
 
-def monitor_trade(trade_id, pair, action, amount, expiration, last, strategy_data):
-    """Monitor trade and update results"""
+def on_trade_settled(future, trade_id, pair, action, amount, expiration, last, strategy_data):
+    """Update results once the settlement tracker reports the closed trade"""
     try:
-        # Wait for trade to complete
-        time.sleep(expiration + 10)  # Add buffer time
-        
-        outcome = api.check_win(trade_id)
+        try:
+            _, outcome = deal_status(future.result())
+        except SettlementTimeout:
+            outcome = "unknown"
         
         # Update pair state
         pair_states[pair]['active_trades'] -= 1
@@ -349,6 +218,10 @@ def monitor_trade(trade_id, pair, action, amount, expiration, last, strategy_dat
         # Log final result
         log_trade(pair, action, amount, expiration, last, outcome, strategy_data)
         
+        balance = api.get_balance()
+        if balance is not None:
+            events.balance(balance)
+        
         # Remove from active trades
         if trade_id in active_trades:
             del active_trades[trade_id]
@@ -357,80 +230,58 @@ def monitor_trade(trade_id, pair, action, amount, expiration, last, strategy_dat
         global_value.logger(f'Error monitoring trade {trade_id}: {e}', "ERROR")
         pair_states[pair]['active_trades'] -= 1
 
-def make_df(df0, history):
-    """Improved DataFrame creation with better error handling"""
-    if not history or not isinstance(history, list):
-        global_value.logger("No history data or invalid format. Skipping pair.", "WARNING")
-        return pd.DataFrame()
-    
-    try:
-        df1 = pd.DataFrame(history).reset_index(drop=True)
-        
-        if df1.empty:
-            return pd.DataFrame()
-            
-        # Sort by time and set index
-        df1 = df1.sort_values(by='time').reset_index(drop=True)
-        df1['time'] = pd.to_datetime(df1['time'], unit='s')
-        df1.set_index('time', inplace=True)
-
-        # Resample to create OHLC data
-        df = df1['price'].resample(f'{period}s').ohlc()
-        
-        if df.empty:
-            return pd.DataFrame()
-        
-        df.reset_index(inplace=True)
-        
-        # Filter out future data
-        current_time = datetime.fromtimestamp(wait(False))
-        df = df[df['time'] < current_time]
-
-        if df.empty:
-            return pd.DataFrame()
-
-        # Merge with existing data if available
-        if df0 is not None and not df0.empty:
-            # Combine dataframes and remove duplicates
-            combined = pd.concat([df0, df], ignore_index=True)
-            combined = combined.drop_duplicates(subset=['time'], keep='last')
-            combined = combined.sort_values(by='time').reset_index(drop=True)
-            return combined.tail(200)  # Keep last 200 candles for memory efficiency
-        
-        return df.tail(200)
-        
-    except Exception as e:
-        global_value.logger(f"Error creating DataFrame: {e}", "WARNING")
-        return pd.DataFrame()
+# Pairs are evaluated in parallel; 'process' mode needs a side-effect free strategy module
+executor = StrategyExecutor(enhanced_fcb_strategy, FCB_CONFIG['executor_mode'], FCB_CONFIG['executor_workers'])
 
 def strategie():
     """Enhanced strategy execution with improved signal processing"""
     signals_found = 0
+    frames = {}
     
     for pair in global_value.pairs:
         try:
-            if 'history' not in global_value.pairs[pair]:
+            if 'candles' not in global_value.pairs[pair]:
                 continue
                 
             # Check if pair can be traded
             can_trade, reason = can_trade_pair(pair)
             if not can_trade:
-                global_value.logger(f"[{pair}] Skipping trade - {reason}", "DEBUG")
+                global_value.logger("[%s] Skipping trade - %s", "DEBUG", pair, reason)
                 continue
             
-            history = global_value.pairs[pair]['history']
-            existing_df = global_value.pairs[pair].get('dataframe', None)
-            df = make_df(existing_df, history)
+            # Last 200 bars straight from the streaming candle builder
+            df = global_value.pairs[pair]['candles'].frame(200)
             
             if df.empty or len(df) < 50:
-                global_value.logger(f"[{pair}] Insufficient data", "DEBUG")
+                global_value.logger("[%s] Insufficient data", "DEBUG", pair)
                 continue
-
-            # Store updated dataframe
-            global_value.pairs[pair]['dataframe'] = df
             
-            # Apply enhanced FCB strategy
-            signal, strategy_data = enhanced_fcb_strategy(df, pair)
+            frames[pair] = df
+                
+        except Exception as e:
+            global_value.logger(f"Error processing {pair}: {e}", "ERROR")
+            continue
+    
+    # Apply enhanced FCB strategy to all pairs before the next candle closes
+    results, report = executor.evaluate(frames, deadline=wait(False))
+    
+    if report['missed']:
+        global_value.logger(f"⚠️ {len(report['missed'])} pairs missed the deadline: {', '.join(report['missed'])}", "WARNING")
+    if report['busy']:
+        global_value.logger(f"Skipped {len(report['busy'])} pairs still evaluating: {', '.join(report['busy'])}", "WARNING")
+    for pair, error in report['errors'].items():
+        global_value.logger(f"Error processing {pair}: {error}", "ERROR")
+    events.latency('strategy_cycle', report['elapsed'])
+    if report['latency']:
+        slowest = max(report['latency'], key=report['latency'].get)
+        global_value.logger(
+            "Evaluated %s pairs in %.3fs (slowest %s: %.3fs)", "DEBUG",
+            len(results), report['elapsed'], slowest, report['latency'][slowest]
+        )
+    
+    for pair, (signal, strategy_data) in results.items():
+        try:
+            df = frames[pair]
             
             if signal:
                 signals_found += 1
@@ -442,9 +293,7 @@ def strategie():
                     "INFO"
                 )
                 
-                print(
-                    f"SIGNAL_DETECTED|{pair}|{strategy_data.get('trend_strength', 0)}"
-                )
+                events.signal(pair, strategy_data.get('trend_strength', 0))
                 
                 # Calculate dynamic trade amount based on confidence
                 base_amount = 100
@@ -457,7 +306,7 @@ def strategie():
                     args=(trade_amount, pair, signal, expiration, df.iloc[-1], strategy_data)
                 ).start()
             else:
-                global_value.logger(f"[{pair}] No signal - Price: {df.iloc[-1]['close']:.5f}", "DEBUG")
+                global_value.logger("[%s] No signal - Price: %.5f", "DEBUG", pair, df['close'].iat[-1])
                 
         except Exception as e:
             global_value.logger(f"Error processing {pair}: {e}", "ERROR")
@@ -465,6 +314,7 @@ def strategie():
     
     if signals_found > 0:
         global_value.logger(f"📊 Found {signals_found} trading signals this cycle", "INFO")
+
 def prepare():
     """Prepare trading session with enhanced validation"""
     try:
@@ -523,6 +373,8 @@ def start():
         # Get account balance
         balance = api.get_balance()
         global_value.logger(f'💰 Account Balance: ${balance}', "INFO")
+        if balance is not None:
+            events.balance(balance)
         
         if not prepare():
             global_value.logger("❌ Failed to prepare trading session", "ERROR")
@@ -538,6 +390,7 @@ def start():
                 
                 # Execute strategy
                 strategie()
+                events.latency('send_queue_p99', api.api.send_queue.stats()['latency_p99'])
                 
                 # Print active trades summary
                 if active_trades:
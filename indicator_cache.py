@@ -0,0 +1,279 @@
+# indicator_cache.py - Per pair indicator state, extended bar by bar while the frame keeps its head
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import talib
+
+
+def _is_zero(value):
+    # Same tolerance TA-Lib uses before dividing by a smoothed sum
+    return -0.00000001 < value < 0.00000001
+
+
+def _true_range(high, low, prev_close):
+    return max(high - low, abs(high - prev_close), abs(low - prev_close))
+
+
+def _mean(values):
+    return sum(values) / len(values)
+
+
+# Each indicator is a pair of functions: init(*params) -> state and
+# step(state, params, high, low, close) -> (state, value). States are tuples,
+# so evaluating the forming bar never touches the committed state. Wilder
+# smoothed indicators also have run(params, highs, lows, closes) -> values,
+# the whole series seeded at the first row, which is what TA-Lib returns for
+# a frame; their value depends on where the frame starts.
+
+def _ao_init(fast=5, slow=34):
+    return ((),)
+
+
+def _ao_step(state, params, high, low, close):
+    fast, slow = params
+    medians = (state[0] + ((high + low) / 2,))[-slow:]
+    if len(medians) < slow:
+        return (medians,), np.nan
+    return (medians,), _mean(medians[-fast:]) - _mean(medians)
+
+
+def _ac_init(fast=5, slow=34, signal=5):
+    return ((), ())
+
+
+def _ac_step(state, params, high, low, close):
+    fast, slow, signal = params
+    (medians,), ao = _ao_step(state[:1], (fast, slow), high, low, close)
+    if np.isnan(ao):
+        return (medians, state[1]), np.nan
+    aos = (state[1] + (ao,))[-signal:]
+    if len(aos) < signal:
+        return (medians, aos), np.nan
+    return (medians, aos), ao - _mean(aos)
+
+
+def _atr_init(period=14):
+    # prev close, bars seen, TR sum during warm up, ATR
+    return (None, 0, 0.0, np.nan)
+
+
+def _atr_step(state, params, high, low, close):
+    period, = params
+    prev_close, count, tr_sum, atr = state
+    if prev_close is None:
+        return (close, 1, 0.0, np.nan), np.nan
+    tr = _true_range(high, low, prev_close)
+    if count <= period:
+        tr_sum += tr
+        if count == period:
+            atr = tr_sum / period
+    else:
+        atr = (atr * (period - 1) + tr) / period
+    return (close, count + 1, tr_sum, atr), atr
+
+
+def _atr_run(params, highs, lows, closes):
+    period, = params
+    return talib.ATR(highs, lows, closes, timeperiod=period)
+
+
+def _adx_init(period=14):
+    # prev high/low/close, bars seen, smoothed +DM/-DM/TR, DX sum during warm up, ADX
+    return (None, None, None, 0, 0.0, 0.0, 0.0, 0.0, np.nan)
+
+
+def _adx_step(state, params, high, low, close):
+    period, = params
+    prev_high, prev_low, prev_close, count, plus_dm, minus_dm, tr_sum, dx_sum, adx = state
+    if prev_close is None:
+        return (high, low, close, 1, 0.0, 0.0, 0.0, 0.0, np.nan), np.nan
+
+    diff_p = high - prev_high
+    diff_m = prev_low - low
+    plus = diff_p if diff_p > 0 and diff_p > diff_m else 0.0
+    minus = diff_m if diff_m > 0 and diff_p < diff_m else 0.0
+    tr = _true_range(high, low, prev_close)
+
+    if count < period:
+        # Raw sums over the first period - 1 moves seed the smoothing
+        state = (high, low, close, count + 1, plus_dm + plus, minus_dm + minus, tr_sum + tr, dx_sum, adx)
+        return state, np.nan
+
+    plus_dm = plus_dm - plus_dm / period + plus
+    minus_dm = minus_dm - minus_dm / period + minus
+    tr_sum = tr_sum - tr_sum / period + tr
+    dx = None
+    if not _is_zero(tr_sum):
+        plus_di = 100.0 * (plus_dm / tr_sum)
+        minus_di = 100.0 * (minus_dm / tr_sum)
+        total = plus_di + minus_di
+        if not _is_zero(total):
+            dx = 100.0 * (abs(minus_di - plus_di) / total)
+
+    if count < period * 2:
+        dx_sum += dx or 0.0
+        if count == period * 2 - 1:
+            adx = dx_sum / period
+    elif dx is not None:
+        adx = (adx * (period - 1) + dx) / period
+    return (high, low, close, count + 1, plus_dm, minus_dm, tr_sum, dx_sum, adx), adx
+
+
+def _adx_run(params, highs, lows, closes):
+    period, = params
+    return talib.ADX(highs, lows, closes, timeperiod=period)
+
+
+INDICATORS = {
+    'ao': (_ao_init, _ao_step, None),
+    'ac': (_ac_init, _ac_step, None),
+    'atr': (_atr_init, _atr_step, _atr_run),
+    'adx': (_adx_init, _adx_step, _adx_run),
+}
+
+
+class IndicatorSeries:
+    """One indicator over the closed bars of one pair.
+
+    Closed bars are committed once through `commit`, which advances the
+    indicator's SMA/Wilder state by a single bar. `sync` brings the series up
+    to date with a candle frame and evaluates the forming last row on a copy
+    of the state, so repeated calls within the same bar cost one step at most.
+
+    That incremental path serves AO/AC on any frame, and ATR/ADX only while
+    the frame keeps its first row (a growing frame). A Wilder smoothed series
+    is seeded at the head of the frame it was built from; once a sliding
+    frame drops that head, as the bots' 200 bar frame does on every new bar,
+    the value comes from one `run` over the whole frame and the committed
+    state is discarded.
+    """
+
+    def __init__(self, name, params):
+        self.init, self.step, self.run = INDICATORS[name]
+        self.name = name
+        self.params = params
+        self.reset()
+
+    def reset(self):
+        self.state = self.init(*self.params)
+        self.last_time = None
+        self.head = None
+        self.memo = None
+
+    def commit(self, high, low, close, bar_time=None):
+        """Append one newly closed bar and return its value."""
+        self.state, value = self.step(self.state, self.params, high, low, close)
+        self.last_time = bar_time
+        return value
+
+    def sync(self, times, highs, lows, closes):
+        """Return the indicator value at the last row of the given columns.
+
+        Every row but the last is treated as closed and committed once. The
+        series is rebuilt from the frame whenever it no longer continues the
+        committed bars (a gap or a reset of the candle history), and
+        re-seeded at the frame head when it has a `run` and the head moved.
+        """
+        if len(times) == 0:
+            return np.nan
+        key = (times[0], times[-1], highs[-1], lows[-1], closes[-1])
+        if self.memo is not None and self.memo[0] == key:
+            return self.memo[1]
+
+        if self.run is not None and self.head is not None and times[0] != self.head:
+            self.reset()
+            self.head = times[0]
+            value = float(self.run(self.params, np.asarray(highs, dtype=np.float64),
+                                   np.asarray(lows, dtype=np.float64),
+                                   np.asarray(closes, dtype=np.float64))[-1])
+            self.memo = (key, value)
+            return value
+
+        closed = len(times) - 1
+        if self.last_time is None or times[0] > self.last_time or times[-1] <= self.last_time:
+            self.reset()
+            start = 0
+        else:
+            start = int(np.searchsorted(times[:closed], self.last_time, side='right'))
+        for i, (high, low, close) in enumerate(zip(highs[start:closed].tolist(),
+                                                   lows[start:closed].tolist(),
+                                                   closes[start:closed].tolist()), start):
+            self.commit(high, low, close, times[i])
+        self.head = times[0]
+
+        _, value = self.step(self.state, self.params, float(highs[-1]), float(lows[-1]), float(closes[-1]))
+        self.memo = (key, value)
+        return value
+
+
+class IndicatorCache:
+    """Indicator series shared by every strategy call, keyed per pair.
+
+    Entries are looked up by (pair, indicator, params); the series itself
+    remembers the last bar time it has seen, so an unchanged frame is answered
+    from the memo. Pairs are evicted least recently used first once more than
+    `max_pairs` are cached, or explicitly through `retain` when they leave the
+    payout list.
+
+    A frame with one new closed bar costs one step for AO/AC. ATR and ADX
+    follow the frame head: one step per bar on a growing frame, one TA-Lib
+    run over the frame per bar on a sliding window such as the bots' 200
+    bars, so the value is the one TA-Lib gives for the same window.
+    """
+
+    def __init__(self, max_pairs=64):
+        self.max_pairs = max_pairs
+        self.pairs = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _entry(self, pair):
+        entry = self.pairs.get(pair)
+        if entry is None:
+            entry = self.pairs[pair] = {'series': {}, 'frame': None, 'columns': None}
+            while len(self.pairs) > self.max_pairs:
+                self.pairs.popitem(last=False)
+        self.pairs.move_to_end(pair)
+        return entry
+
+    def series(self, pair, name, *params):
+        """Get (or create) the series for an indicator of a pair."""
+        init = INDICATORS[name][0]
+        defaults = init.__defaults__ or ()
+        params = tuple(params) + defaults[len(params):]
+        with self.lock:
+            entries = self._entry(pair)['series']
+            series = entries.get((name, params))
+            if series is None:
+                series = entries[(name, params)] = IndicatorSeries(name, params)
+            return series
+
+    def columns(self, pair, df):
+        """Return (time, high, low, close) arrays of `df`, extracted once per frame."""
+        with self.lock:
+            entry = self._entry(pair)
+            if entry['frame'] is df:
+                return entry['columns']
+        columns = (df['time'].values, df['high'].values, df['low'].values, df['close'].values)
+        with self.lock:
+            entry = self._entry(pair)
+            entry['frame'], entry['columns'] = df, columns
+        return columns
+
+    def get(self, pair, name, df, *params):
+        """Return the value of an indicator at the last row of `df`."""
+        return self.series(pair, name, *params).sync(*self.columns(pair, df))
+
+    def retain(self, pairs):
+        """Drop every cached pair that is not in `pairs`."""
+        keep = set(pairs)
+        with self.lock:
+            for pair in [p for p in self.pairs if p not in keep]:
+                del self.pairs[pair]
+
+    def evict(self, pair):
+        with self.lock:
+            self.pairs.pop(pair, None)
+
+    def __len__(self):
+        return len(self.pairs)
@@ -0,0 +1,214 @@
+# indicators.py - Array based indicator kernels shared by the trading bots
+from collections import deque
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def fractal_flags(highs, lows, period=5):
+    """Flag Williams fractal highs/lows for every bar with a complete window.
+
+    A bar is a fractal high when its high is >= every other high within
+    `period` bars on both sides (lows mirror this with <=). Bars whose window
+    is not complete are never flagged.
+    """
+    highs = np.asarray(highs, dtype=np.float64)
+    lows = np.asarray(lows, dtype=np.float64)
+    is_high = np.zeros(len(highs), dtype=bool)
+    is_low = np.zeros(len(lows), dtype=bool)
+
+    width = period * 2 + 1
+    if len(highs) < width:
+        return is_high, is_low
+
+    high_windows = sliding_window_view(highs, width)
+    low_windows = sliding_window_view(lows, width)
+    is_high[period:len(highs) - period] = high_windows.max(axis=1) == high_windows[:, period]
+    is_low[period:len(lows) - period] = low_windows.min(axis=1) == low_windows[:, period]
+    return is_high, is_low
+
+
+def fractal_levels(highs, lows, period=5):
+    """Return the most recent confirmed fractal (upper, lower) levels."""
+    highs = np.asarray(highs, dtype=np.float64)
+    lows = np.asarray(lows, dtype=np.float64)
+    is_high, is_low = fractal_flags(highs, lows, period)
+
+    high_idx = np.flatnonzero(is_high)
+    low_idx = np.flatnonzero(is_low)
+    upper = highs[high_idx[-1]] if len(high_idx) else np.nan
+    lower = lows[low_idx[-1]] if len(low_idx) else np.nan
+    return upper, lower
+
+
+class FractalTracker:
+    """Incremental Williams fractal levels for a single pair.
+
+    Closed bars are committed once through `update`; a fractal is confirmed as
+    soon as its right hand window completes, so each new bar costs a fixed
+    2*period+1 comparison instead of a rescan of the whole frame. `seed` does
+    the cold start from candle history with the vectorized `fractal_flags`.
+    """
+
+    def __init__(self, period=5):
+        self.period = period
+        self.width = period * 2 + 1
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.last_time = None
+        self.highs = deque(maxlen=self.width)
+        self.lows = deque(maxlen=self.width)
+        self.upper = (np.nan, -1)
+        self.lower = (np.nan, -1)
+
+    def seed(self, highs, lows, last_time=None):
+        """Cold start the tracker from arrays of closed bars."""
+        self.reset()
+        highs = np.asarray(highs, dtype=np.float64)
+        lows = np.asarray(lows, dtype=np.float64)
+        is_high, is_low = fractal_flags(highs, lows, self.period)
+
+        high_idx = np.flatnonzero(is_high)
+        low_idx = np.flatnonzero(is_low)
+        if len(high_idx):
+            self.upper = (highs[high_idx[-1]], int(high_idx[-1]))
+        if len(low_idx):
+            self.lower = (lows[low_idx[-1]], int(low_idx[-1]))
+
+        self.count = len(highs)
+        self.highs.extend(highs[-self.width:].tolist())
+        self.lows.extend(lows[-self.width:].tolist())
+        self.last_time = last_time
+
+    def update(self, high, low, bar_time=None):
+        """Commit one newly closed bar and return the current levels."""
+        self.highs.append(float(high))
+        self.lows.append(float(low))
+        self.count += 1
+        self.last_time = bar_time
+
+        upper, lower = self._confirm(self.highs, self.lows, self.count)
+        if upper is not None:
+            self.upper = upper
+        if lower is not None:
+            self.lower = lower
+        return self.levels()
+
+    def _confirm(self, highs, lows, count):
+        """Check whether the bar `period` places back is a fractal."""
+        if count < self.width:
+            return None, None
+        center = count - 1 - self.period
+        high = highs[self.period]
+        low = lows[self.period]
+        upper = (high, center) if high >= max(highs) else None
+        lower = (low, center) if low <= min(lows) else None
+        return upper, lower
+
+    def levels(self, window=None, count=None):
+        """Return (upper, lower), dropping fractals outside the last `window` bars."""
+        count = self.count if count is None else count
+        return (self._level(self.upper, window, count),
+                self._level(self.lower, window, count))
+
+    def _level(self, fractal, window, count):
+        value, index = fractal
+        if index < 0:
+            return np.nan
+        if window is not None and index < count - window + self.period:
+            return np.nan
+        return value
+
+    def sync(self, df):
+        """Bring the tracker up to date with a candle frame.
+
+        Every row but the last is treated as closed and committed once. The
+        last row may still be forming, so it is evaluated provisionally without
+        being stored. The returned levels match `fractal_levels` on `df`.
+        """
+        if len(df) == 0:
+            return np.nan, np.nan
+
+        times = df['time'].values
+        highs = df['high'].values
+        lows = df['low'].values
+        closed = len(df) - 1
+
+        if self.last_time is None or times[0] > self.last_time or times[-1] <= self.last_time:
+            self.seed(highs[:closed], lows[:closed], times[closed - 1] if closed else None)
+        else:
+            start = int(np.searchsorted(times[:closed], self.last_time, side='right'))
+            for i in range(start, closed):
+                self.update(highs[i], lows[i], times[i])
+
+        # Evaluate the forming bar on a copy so the committed state is untouched
+        count = self.count + 1
+        upper, lower = self.upper, self.lower
+        if self.count >= self.width - 1:
+            window_highs = list(self.highs)[-(self.width - 1):] + [float(highs[-1])]
+            window_lows = list(self.lows)[-(self.width - 1):] + [float(lows[-1])]
+            new_upper, new_lower = self._confirm(window_highs, window_lows, count)
+            upper = new_upper or upper
+            lower = new_lower or lower
+
+        return (self._level(upper, len(df), count),
+                self._level(lower, len(df), count))
+
+
+def _supertrend_loop(high, low, close, atr, multiplier, period, final_ub, final_lb, st):
+    for i in range(period, len(close)):
+        mid = (high[i] + low[i]) / 2
+        basic_ub = mid + multiplier * atr[i]
+        basic_lb = mid - multiplier * atr[i]
+        prev_ub = final_ub[i - 1]
+        prev_lb = final_lb[i - 1]
+        prev_st = st[i - 1]
+
+        final_ub[i] = basic_ub if basic_ub < prev_ub or close[i - 1] > prev_ub else prev_ub
+        final_lb[i] = basic_lb if basic_lb > prev_lb or close[i - 1] < prev_lb else prev_lb
+
+        if prev_st == prev_ub and close[i] <= final_ub[i]:
+            st[i] = final_ub[i]
+        elif prev_st == prev_ub and close[i] > final_ub[i]:
+            st[i] = final_lb[i]
+        elif prev_st == prev_lb and close[i] >= final_lb[i]:
+            st[i] = final_lb[i]
+        elif prev_st == prev_lb and close[i] < final_lb[i]:
+            st[i] = final_ub[i]
+        else:
+            st[i] = 0.0
+
+
+try:
+    from numba import njit
+    _supertrend_kernel = njit(cache=True)(_supertrend_loop)
+except ImportError:
+    _supertrend_kernel = None
+
+
+def supertrend_arrays(high, low, close, atr, multiplier, period):
+    """Run the supertrend band recurrence on contiguous float64 arrays.
+
+    Returns (final_ub, final_lb, st). The kernel is compiled with numba when it
+    is installed; otherwise the same loop runs over plain Python lists, which
+    still avoids the per-cell pandas indexing of the old implementation.
+    """
+    n = len(close)
+    if _supertrend_kernel is not None:
+        final_ub, final_lb, st = np.zeros(n), np.zeros(n), np.zeros(n)
+        _supertrend_kernel(np.ascontiguousarray(high, dtype=np.float64),
+                           np.ascontiguousarray(low, dtype=np.float64),
+                           np.ascontiguousarray(close, dtype=np.float64),
+                           np.ascontiguousarray(atr, dtype=np.float64),
+                           float(multiplier), int(period), final_ub, final_lb, st)
+        return final_ub, final_lb, st
+
+    final_ub, final_lb, st = [0.0] * n, [0.0] * n, [0.0] * n
+    _supertrend_loop(np.asarray(high, dtype=np.float64).tolist(),
+                     np.asarray(low, dtype=np.float64).tolist(),
+                     np.asarray(close, dtype=np.float64).tolist(),
+                     np.asarray(atr, dtype=np.float64).tolist(),
+                     multiplier, period, final_ub, final_lb, st)
+    return np.array(final_ub), np.array(final_lb), np.array(st)
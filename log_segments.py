@@ -0,0 +1,199 @@
+# log_segments.py - Trade log split into one CSV segment per day
+import csv
+import gzip
+import os
+import re
+import shutil
+import threading
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+_SEGMENT = re.compile(r'^(\d{4}-\d{2}-\d{2})\.csv(\.gz)?$')
+_JOURNAL = re.compile(r'^(\d{4}-\d{2}-\d{2})\.tjb$')
+
+
+class SegmentedLog:
+    """A CSV log stored as `<directory>/<YYYY-MM-DD>.csv`, one file per day.
+
+    Rows are routed to the segment of their `timestamp` day, so retention is a
+    matter of deleting whole files and no live file is ever rewritten. Closed
+    days can be compacted to `<day>.csv.gz`; readers see plain and compressed
+    segments as one log in date order. A TradeJournal can keep its binary
+    copy next to them as `<day>.tjb`, which follows the same retention.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def day_of(row):
+        """Day (YYYY-MM-DD) a row belongs to; rows without a valid timestamp go to today."""
+        timestamp = str(row.get('timestamp') or '')[:10]
+        try:
+            datetime.strptime(timestamp, '%Y-%m-%d')
+            return timestamp
+        except ValueError:
+            return datetime.now().strftime('%Y-%m-%d')
+
+    def segment_path(self, day):
+        return os.path.join(self.directory, f"{day}.csv")
+
+    def journal_path(self, day):
+        return os.path.join(self.directory, f"{day}.tjb")
+
+    def journal_segments(self):
+        """Return [(day, path)] for every binary journal segment, oldest first."""
+        found = []
+        for name in os.listdir(self.directory):
+            match = _JOURNAL.match(name)
+            if match:
+                found.append((match.group(1), os.path.join(self.directory, name)))
+        return sorted(found)
+
+    def _drop_journals(self, before):
+        """Delete the binary journal segments of days before `before`. Returns their days."""
+        removed = []
+        for day, path in self.journal_segments():
+            if day >= before:
+                break
+            os.remove(path)
+            removed.append(day)
+        return removed
+
+    def segments(self):
+        """Return [(day, path)] for every segment, oldest first.
+
+        A day that is both compressed and plain (compaction in progress) is
+        listed once, by its plain file.
+        """
+        found = {}
+        for name in os.listdir(self.directory):
+            match = _SEGMENT.match(name)
+            if match and (match.group(1) not in found or not match.group(2)):
+                found[match.group(1)] = os.path.join(self.directory, name)
+        return sorted(found.items())
+
+    def open_writer(self, day, fieldnames):
+        """Open `day`'s segment for appending; returns (file, DictWriter).
+
+        An existing segment keeps its own header, so rows from writers with
+        different field lists still line up with the columns.
+        """
+        path = self.segment_path(day)
+        header = None
+        if os.path.isfile(path) and os.path.getsize(path) > 0:
+            with open(path, 'r', newline='') as f:
+                header = next(csv.reader([f.readline()]), None)
+        file = open(path, 'a', newline='')
+        writer = csv.DictWriter(file, fieldnames=header or list(fieldnames), extrasaction='ignore')
+        if not header:
+            writer.writeheader()
+        return file, writer
+
+    def append(self, rows, fieldnames):
+        """Append row dicts, each to the segment of its day."""
+        by_day = {}
+        for row in rows:
+            by_day.setdefault(self.day_of(row), []).append(row)
+        with self.lock:
+            for day, day_rows in by_day.items():
+                file, writer = self.open_writer(day, fieldnames)
+                with file:
+                    writer.writerows(day_rows)
+
+    def read(self, since=None, **kwargs):
+        """Read every segment from day `since` on into one DataFrame."""
+        frames = [pd.read_csv(path, **kwargs) for day, path in self.segments()
+                  if since is None or day >= since]
+        frames = [f for f in frames if len(f)]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    def tail(self, count):
+        """Return (header, rows) for the last `count` rows across segments, oldest first."""
+        rows = []
+        header = None
+        for day, path in reversed(self.segments()):
+            opener = gzip.open if path.endswith('.gz') else open
+            with opener(path, 'rt', newline='') as f:
+                segment = list(csv.reader(f))
+            if not segment:
+                continue
+            header = header or segment[0]
+            rows = [dict(zip(segment[0], values)) for values in segment[1:] if values] + rows
+            if len(rows) >= count:
+                break
+        return header, rows[-count:]
+
+    def drop_before(self, day):
+        """Delete every segment (and journal segment) older than `day`. Returns the days removed."""
+        removed = []
+        with self.lock:
+            for segment_day, path in self.segments():
+                if segment_day >= day:
+                    break
+                for suffix in ('', '.gz'):
+                    candidate = self.segment_path(segment_day) + suffix
+                    if os.path.exists(candidate):
+                        os.remove(candidate)
+                removed.append(segment_day)
+            removed = sorted(set(removed).union(self._drop_journals(day)))
+        return removed
+
+    def compact(self, before):
+        """Gzip the plain segments of days before `before`. Returns the days compacted.
+
+        The archive is written under a temporary name, synced and renamed
+        before the plain segment is removed, so a crash at any point leaves
+        at least one complete copy. Binary journal segments of those days
+        are deleted: the compressed CSV stays the record of a closed day.
+        """
+        compacted = []
+        for day, path in self.segments():
+            if day >= before or path.endswith('.gz'):
+                continue
+            archive = path + '.gz'
+            tmp = archive + '.tmp'
+            with open(path, 'rb') as src, open(tmp, 'wb') as raw:
+                with gzip.GzipFile(filename=os.path.basename(path), mode='wb', fileobj=raw) as dst:
+                    shutil.copyfileobj(src, dst)
+                raw.flush()
+                os.fsync(raw.fileno())
+            with self.lock:
+                os.replace(tmp, archive)
+                os.remove(path)
+            compacted.append(day)
+        with self.lock:
+            dropped = self._drop_journals(before)
+        return sorted(set(compacted).union(dropped))
+
+    def migrate(self, legacy_path):
+        """Split a single-file CSV log into day segments and retire it.
+
+        The legacy file is renamed to `<legacy_path>.migrated` once every
+        row has been copied. Returns the number of rows migrated.
+        """
+        if not os.path.isfile(legacy_path):
+            return 0
+        migrated = 0
+        with open(legacy_path, 'r', newline='') as f:
+            reader = csv.DictReader(f)
+            fieldnames = reader.fieldnames or []
+            batch = []
+            for row in reader:
+                batch.append(row)
+                if len(batch) >= 10000:
+                    self.append(batch, fieldnames)
+                    migrated += len(batch)
+                    batch = []
+            self.append(batch, fieldnames)
+            migrated += len(batch)
+        os.replace(legacy_path, legacy_path + '.migrated')
+        return migrated
+
+
+def retention_cutoff(days, now=None):
+    """First day (YYYY-MM-DD) kept when keeping `days` days of segments."""
+    return ((now or datetime.now()) - timedelta(days=days)).strftime('%Y-%m-%d')
@@ -1,6 +1,9 @@
-import asyncio, datetime, time, json, threading, requests, ssl, atexit
+import asyncio, datetime, time, json, threading, requests, ssl, atexit, logging
 from collections import deque
 from pocketoptionapi.ws.client import WebsocketClient
+from pocketoptionapi.ws.pending import PendingRequests
+from pocketoptionapi.ws.send_queue import SendQueue
+from pocketoptionapi.ws.settlement import SettlementTracker
 from pocketoptionapi.ws.channels.get_balances import *
 from pocketoptionapi.ws.channels.ssid import Ssid
 from pocketoptionapi.ws.channels.candles import GetCandles
@@ -12,6 +15,8 @@ from pocketoptionapi.ws.channels.change_symbol import ChangeSymbol
 from collections import defaultdict
 from pocketoptionapi.ws.objects.time_sync import TimeSynchronizer
 
+logger = logging.getLogger(__name__)
+
 
 class PocketOptionAPI(object):
 
@@ -43,6 +48,9 @@ class PocketOptionAPI(object):
         self.session.trust_env = False
         self.proxies = proxies
         self.buy_successful = None
+        self.pending = PendingRequests()
+        self.send_queue = SendQueue()
+        self.settlement = SettlementTracker()
         self.loop = asyncio.get_event_loop()
         self.websocket_client = WebsocketClient(self)
 
@@ -56,22 +64,13 @@ class PocketOptionAPI(object):
     def GetClosedDeals(self):
         return global_value.closed_deals
 
-    def send_websocket_request(self, name, msg, request_id="", no_force_send=True):
-        # logger = logging.getLogger(__name__)
-
+    def send_websocket_request(self, name, msg, request_id="", no_force_send=True, expires=None, on_drop=None):
         data = f'42{json.dumps(msg)}'
 
-        while (global_value.ssl_Mutual_exclusion or global_value.ssl_Mutual_exclusion_write) and no_force_send:
-            pass
-        global_value.ssl_Mutual_exclusion_write = True
+        # The writer task on the websocket loop sends it; no loop per call
+        self.send_queue.put(data, expires=expires, on_drop=on_drop)
 
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-
-        loop.run_until_complete(self.websocket.send_message(data))
-
-        global_value.logger(data, "DEBUG")
-        global_value.ssl_Mutual_exclusion_write = False
+        logger.debug("Sent: %s", data)
 
     def start_websocket(self):
         global_value.websocket_is_connected = False
@@ -143,10 +142,10 @@ class PocketOptionAPI(object):
                 self.sync.synchronize(self.time_sync.server_timestamp)
                 self.sync_datetime = self.sync.get_synced_datetime()
             else:
-                global_value.logger("timesync is not set", "ERROR")
+                logger.error("timesync is not set")
                 self.sync_datetime = None
         except Exception as e:
-            global_value.logger(e, "ERROR")
+            logger.error("%s", e)
             self.sync_datetime = None
 
         return self.sync_datetime
@@ -0,0 +1,124 @@
+"""Streaming tick to OHLC candle aggregation."""
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+class CandleRing(object):
+    """Fixed size ring buffer of closed OHLC bars."""
+
+    COLUMNS = ('open', 'high', 'low', 'close')
+
+    def __init__(self, capacity=1000):
+        self.capacity = capacity
+        self.time = np.zeros(capacity, dtype=np.int64)
+        self.ohlc = np.zeros((capacity, 4), dtype=np.float64)
+        self.head = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def append(self, bar_time, open_, high, low, close):
+        self.time[self.head] = bar_time
+        self.ohlc[self.head] = (open_, high, low, close)
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def last_time(self):
+        if self.size == 0:
+            return None
+        return int(self.time[self.head - 1])
+
+    def arrays(self, count=None):
+        """Return (time, ohlc) for the newest `count` bars, oldest first."""
+        count = self.size if count is None else min(count, self.size)
+        start = (self.head - count) % self.capacity
+        if start + count <= self.capacity:
+            return self.time[start:start + count].copy(), self.ohlc[start:start + count].copy()
+        index = np.arange(start, start + count) % self.capacity
+        return self.time[index], self.ohlc[index]
+
+
+class CandleBuilder(object):
+    """Fold streamed ticks into the open bar and emit closed bars to a ring.
+
+    Bars are aligned to multiples of `period` seconds, the same bins
+    `resample(f'{period}s')` produces, so strategies can read the ring instead
+    of rebuilding a DataFrame from the raw tick history every cycle.
+    """
+
+    def __init__(self, period, capacity=1000):
+        self.period = period
+        self.ring = CandleRing(capacity)
+        self.lock = threading.Lock()
+        self.bar = None  # [time, open, high, low, close] of the open bar
+
+    def seed(self, candles=None, times=None, prices=None):
+        """Load server candles, then fold the tick history on top of them.
+
+        `times`/`prices` are tick arrays sorted by time. Bars built from ticks
+        take precedence over server candles with the same or a later start
+        time.
+        """
+        with self.lock:
+            self.ring = CandleRing(self.ring.capacity)
+            self.bar = None
+            first_tick = None
+            if times is not None and len(times):
+                first_tick = times[0] // self.period * self.period
+            for c in sorted(candles or [], key=lambda x: x['time']):
+                if first_tick is not None and c['time'] >= first_tick:
+                    break
+                if self.ring.last_time() is not None and c['time'] <= self.ring.last_time():
+                    continue
+                self.ring.append(int(c['time']), c['open'], c['high'], c['low'], c['close'])
+            if times is not None:
+                for timestamp, price in zip(np.asarray(times).tolist(), np.asarray(prices).tolist()):
+                    self._add(timestamp, price)
+
+    def add_tick(self, timestamp, price):
+        """Fold one tick into the open bar. Returns the bar it closed, if any."""
+        with self.lock:
+            return self._add(timestamp, price)
+
+    def _add(self, timestamp, price):
+        bar_time = int(timestamp // self.period * self.period)
+        bar = self.bar
+        if bar is None:
+            self.bar = [bar_time, price, price, price, price]
+            return None
+        if bar_time == bar[0]:
+            if price > bar[2]:
+                bar[2] = price
+            elif price < bar[3]:
+                bar[3] = price
+            bar[4] = price
+            return None
+        if bar_time < bar[0]:
+            # Late tick for a bar that is already closed
+            return None
+        self.ring.append(*bar)
+        self.bar = [bar_time, price, price, price, price]
+        return bar
+
+    def arrays(self, count=None, include_open=True):
+        """Return {'time', 'open', 'high', 'low', 'close'} arrays, oldest first."""
+        with self.lock:
+            bar = list(self.bar) if include_open and self.bar is not None else None
+            closed = None if count is None else (count - 1 if bar else count)
+            times, ohlc = self.ring.arrays(closed)
+        if bar:
+            times = np.append(times, bar[0])
+            ohlc = np.vstack([ohlc, bar[1:]])
+        data = {'time': times}
+        for i, name in enumerate(CandleRing.COLUMNS):
+            data[name] = ohlc[:, i]
+        return data
+
+    def frame(self, count=None, include_open=True):
+        """Return the bars as a DataFrame shaped like the old `make_df` output."""
+        data = self.arrays(count, include_open)
+        data['time'] = pd.to_datetime(data['time'], unit='s')
+        return pd.DataFrame(data)
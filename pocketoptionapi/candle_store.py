@@ -0,0 +1,194 @@
+"""Memory mapped, columnar candle history on disk."""
+import os
+import re
+import threading
+import zlib
+
+import numpy as np
+import pandas as pd
+
+RECORD = np.dtype([('time', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'), ('close', '<f8')])
+DAY = 86400
+
+_SEGMENT = re.compile(r'^(\d+)\.candles(\.z)?$')
+
+
+def to_records(candles):
+    """Convert candle dicts ({'time', 'open', 'high', 'low', 'close'}) to a RECORD array sorted by time.
+
+    Rows without OHLC values (ticks mixed into a history response) are skipped.
+    """
+    if isinstance(candles, np.ndarray) and candles.dtype == RECORD:
+        records = candles
+    else:
+        candles = [c for c in candles if 'open' in c]
+        records = np.empty(len(candles), dtype=RECORD)
+        for name in RECORD.names:
+            records[name] = [c[name] for c in candles]
+    if len(records) > 1 and not np.all(records['time'][1:] > records['time'][:-1]):
+        records = _dedupe(records[np.argsort(records['time'], kind='stable')])
+    return records
+
+
+def _dedupe(records):
+    """Keep the last record of every timestamp in a time sorted array."""
+    times = records['time']
+    last = np.ones(len(records), dtype=bool)
+    last[:-1] = times[1:] != times[:-1]
+    return records[last]
+
+
+class CandleStore(object):
+    """Candles of one asset and period, one file per UTC day under `directory`.
+
+    Segments are headerless arrays of fixed width RECORDs in time order, read
+    back through np.memmap, so opening a week of history costs no parsing and
+    a range lookup is a binary search on the time column. New candles after
+    the end of a segment are appended to it, a refresh of its last (forming)
+    bar is written in place, and a write that reaches further back (a
+    backfill) merges with the segment and replaces it atomically, newest
+    values winning. Days that are no
+    longer written to can be compressed with `compact`; compressed segments
+    are read transparently and written back plain if they are updated.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.lock = threading.Lock()
+        self._maps = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def segment_path(self, day, compressed=False):
+        return os.path.join(self.directory, '%d.candles%s' % (day, '.z' if compressed else ''))
+
+    def segments(self):
+        """Return [(day, path)] for every segment, oldest first (day = time // 86400)."""
+        found = {}
+        for name in os.listdir(self.directory):
+            match = _SEGMENT.match(name)
+            if match and (int(match.group(1)) not in found or not match.group(2)):
+                found[int(match.group(1))] = os.path.join(self.directory, name)
+        return sorted(found.items())
+
+    def _load(self, path):
+        """Records of one segment: a read only memmap, or the inflated array of a compressed one."""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return np.empty(0, dtype=RECORD)
+        key = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        cached = self._maps.get(path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        if path.endswith('.z'):
+            with open(path, 'rb') as f:
+                records = np.frombuffer(zlib.decompress(f.read()), dtype=RECORD)
+        else:
+            # A record cut short by a crash mid-append is ignored
+            count = stat.st_size // RECORD.itemsize
+            records = (np.memmap(path, dtype=RECORD, mode='r', shape=(count,))
+                       if count else np.empty(0, dtype=RECORD))
+        self._maps[path] = (key, records)
+        return records
+
+    def write(self, candles):
+        """Store candles (dicts or a RECORD array). Returns the number of records written."""
+        records = to_records(candles)
+        if not len(records):
+            return 0
+        days = records['time'] // DAY
+        bounds = np.flatnonzero(np.diff(days)) + 1
+        with self.lock:
+            for chunk in np.split(records, bounds):
+                self._write_day(int(chunk['time'][0] // DAY), chunk)
+        return len(records)
+
+    def _write_day(self, day, records):
+        plain = self.segment_path(day)
+        packed = self.segment_path(day, compressed=True)
+        compressed = not os.path.exists(plain) and os.path.exists(packed)
+        existing = self._load(packed if compressed else plain)
+        count = len(existing)
+        if not compressed and (not count or records['time'][0] >= existing['time'][-1]):
+            # Append, overwriting the last record when it is the bar being refreshed
+            pos = count - 1 if count and records['time'][0] == existing['time'][-1] else count
+            with open(plain, 'r+b' if count else 'wb') as f:
+                f.truncate(pos * RECORD.itemsize)
+                f.seek(pos * RECORD.itemsize)
+                f.write(records.tobytes())
+            return
+        merged = np.concatenate([existing, records])
+        merged = _dedupe(merged[np.argsort(merged['time'], kind='stable')])
+        tmp = plain + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(merged.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, plain)
+        if os.path.exists(packed):
+            os.remove(packed)
+
+    def read(self, start=None, end=None):
+        """Records with `start` <= time <= `end` as one array (either bound may be None)."""
+        parts = []
+        for day, path in self.segments():
+            if start is not None and (day + 1) * DAY <= start:
+                continue
+            if end is not None and day * DAY > end:
+                break
+            records = self._load(path)
+            times = records['time']
+            lo = 0 if start is None else int(np.searchsorted(times, start, side='left'))
+            hi = len(records) if end is None else int(np.searchsorted(times, end, side='right'))
+            if hi > lo:
+                parts.append(records[lo:hi])
+        if not parts:
+            return np.empty(0, dtype=RECORD)
+        return parts[0].copy() if len(parts) == 1 else np.concatenate(parts)
+
+    def dataframe(self, start=None, end=None):
+        """Candles in range as a DataFrame with a datetime `time` column, like pairs[...]['dataframe']."""
+        df = pd.DataFrame(self.read(start, end))
+        df['time'] = pd.to_datetime(df['time'], unit='s')
+        return df
+
+    def first_time(self):
+        for day, path in self.segments():
+            records = self._load(path)
+            if len(records):
+                return int(records['time'][0])
+        return None
+
+    def last_time(self):
+        for day, path in reversed(self.segments()):
+            records = self._load(path)
+            if len(records):
+                return int(records['time'][-1])
+        return None
+
+    def __len__(self):
+        return sum(len(self._load(path)) for day, path in self.segments())
+
+    def compact(self, before):
+        """Compress the plain segments of days ending before time `before`. Returns the days compacted.
+
+        The compressed copy is written under a temporary name, synced and
+        renamed before the plain segment is removed.
+        """
+        compacted = []
+        for day, path in self.segments():
+            if (day + 1) * DAY > before or path.endswith('.z'):
+                continue
+            with self.lock:
+                records = self._load(path)
+                packed = self.segment_path(day, compressed=True)
+                tmp = packed + '.tmp'
+                with open(tmp, 'wb') as f:
+                    f.write(zlib.compress(records.tobytes(), 6))
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp, packed)
+                os.remove(path)
+                self._maps.pop(path, None)
+            compacted.append(day)
+        return compacted
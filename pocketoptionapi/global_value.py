@@ -1,6 +1,10 @@
-from datetime import datetime
+import json
+import logging
 import os
 
+from pocketoptionapi import logs
+from pocketoptionapi.candle_store import CandleStore
+
 rp = os.path.normpath(os.path.dirname(os.path.abspath(__file__)) + '/../')
 dp = os.path.join(rp, 'history')
 if not os.path.exists(dp):
@@ -35,22 +39,52 @@ trades = {}
 stat = []
 pairs = {}
 
+# Per pair tick history bounds (ticks kept, seconds kept; None keeps all)
+tick_capacity = 16384
+tick_retention = 3600
+
+# Candle history segments older than this many days are compressed (None keeps them plain)
+candle_cold_days = None
+# loadHistoryPeriod pages kept in flight per get_history call
+history_concurrency = 4
+# Websocket URL used instead of the region servers (e.g. a local ws.mock_server)
+ws_url = None
+# Record every websocket frame to this log (see ws.recorder), stopping after ws_record_max_bytes
+ws_record = None
+ws_record_max_bytes = 1 << 30
+
 loglevel = 'INFO'
 
 # To get the payment details for the different pairs
 PayoutData = None
 
-def logger(message, lvl):
-    if loglevel == 'DEBUG':
-        dt = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")
-        print('%s :[DEBUG]: %s' %(str(dt), str(message)))
-    elif loglevel == lvl:
-        dt = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")
-        print('%s :[%s]: %s' %(str(dt), str(lvl), str(message)))
-    elif lvl == 'ERROR':
-        dt = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")
-        print('%s :[ERROR]: %s' %(str(dt), str(message)))
-    return
+_log = logging.getLogger(logs.ROOT)
+logs.configure(loglevel)
+
+
+def logger(message, lvl, *args):
+    """Log `message % args` at level `lvl` ('DEBUG', 'INFO', 'WARNING', 'ERROR').
+
+    The message is only formatted when the level is enabled, and written
+    out by the logging thread, so pass values as `args` rather than
+    formatting them into `message` on hot paths.
+    """
+    if loglevel != logs.current_level():
+        logs.set_level(loglevel)
+    level = logs.LEVELS.get(lvl, logging.INFO)
+    if _log.isEnabledFor(level):
+        _log.log(level, message, *args)
+
+
+_candle_stores = {}
+
+
+def candle_store(key, period):
+    """CandleStore of asset `key` (its pair id) at `period` seconds, under history/<key>/<period>."""
+    store = _candle_stores.get((str(key), period))
+    if store is None:
+        store = _candle_stores.setdefault((str(key), period), CandleStore(os.path.join(dp, str(key), str(period))))
+    return store
 
 
 def set_cache(key, value, path=None):
@@ -0,0 +1,120 @@
+"""Queue based logging for the API and the bots.
+
+Every logger under ``pocketoptionapi`` (``logging.getLogger(__name__)`` in
+the package modules, and ``global_value.logger``) hands its records to a
+QueueHandler; a QueueListener thread formats and writes them, so logging
+never blocks the websocket loop on stdout or disk. Levels can be set for the
+whole package or per module, and a JSON lines sink can be added next to the
+console output.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+from datetime import datetime
+
+ROOT = 'pocketoptionapi'
+
+LEVELS = {
+    'DEBUG': logging.DEBUG,
+    'INFO': logging.INFO,
+    'WARNING': logging.WARNING,
+    'ERROR': logging.ERROR,
+}
+
+
+class LegacyFormatter(logging.Formatter):
+    """`2024-01-01 12:00:00.000000 :[INFO]: message`, as global_value.logger printed it."""
+
+    def format(self, record):
+        dt = datetime.fromtimestamp(record.created).strftime("%Y-%m-%d %H:%M:%S.%f")
+        text = '%s :[%s]: %s' % (dt, record.levelname, record.getMessage())
+        if record.exc_text:
+            text = text + '\n' + record.exc_text
+        return text
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record; `extra={'fields': {...}}` adds structured fields."""
+
+    def format(self, record):
+        entry = {
+            'time': record.created,
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        fields = getattr(record, 'fields', None)
+        if fields:
+            entry.update(fields)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class _State(object):
+    listener = None
+    handler = None
+    level = None
+
+
+_state = _State()
+
+
+def configure(level='INFO', levels=None, json_path=None, console=True):
+    """(Re)build the logging pipeline.
+
+    `level` applies to the whole package, `levels` maps logger names (e.g.
+    ``pocketoptionapi.ws.client``) to their own level. `json_path` adds a
+    JSON lines file sink; `console` keeps the stdout output.
+    """
+    shutdown()
+    handlers = []
+    if console:
+        stream = logging.StreamHandler(sys.stdout)
+        stream.setFormatter(LegacyFormatter())
+        handlers.append(stream)
+    if json_path:
+        sink = logging.FileHandler(json_path, encoding='utf-8')
+        sink.setFormatter(JsonFormatter())
+        handlers.append(sink)
+
+    records = queue.SimpleQueue()
+    _state.handler = logging.handlers.QueueHandler(records)
+    _state.listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    _state.listener.start()
+
+    root = logging.getLogger(ROOT)
+    root.addHandler(_state.handler)
+    root.propagate = False
+    set_level(level)
+    for name, module_level in (levels or {}).items():
+        set_level(module_level, name)
+
+
+def set_level(level, module=None):
+    """Set the level of the package, or of one module logger when `module` is given."""
+    value = LEVELS.get(level, level) if isinstance(level, str) else level
+    logging.getLogger(module or ROOT).setLevel(value)
+    if module is None:
+        _state.level = level
+
+
+def current_level():
+    """Name of the package level last applied through `set_level`."""
+    return _state.level
+
+
+def shutdown():
+    """Flush queued records and stop the writer thread."""
+    if _state.listener is not None:
+        _state.listener.stop()
+        logging.getLogger(ROOT).removeHandler(_state.handler)
+        _state.listener = None
+        _state.handler = None
+
+
+atexit.register(shutdown)
@@ -26,7 +26,7 @@ class PocketOptionApi:
         # self.logger.addHandler(file_handler)
 
         # self.logger.info(f"initialiting Pocket API with token: {self.token}")
-        global_value.logger("initialiting Pocket API with token: %s" % str(self.token), "DEBUG")
+        global_value.logger("initialiting Pocket API with token: %s", "DEBUG", self.token)
 
         self.websocket_client_chat = WebSocketClientChat(url="wss://chat-po.site/cabinet-client/socket.io/?EIO=4&transport=websocket")
         self.websocket_client_chat.run()
@@ -59,10 +59,10 @@ class PocketOptionApi:
                         global_value.logger("Sent ping reuqests successfully!", "DEBUG")
                     except Exception as e:
                         # self.logger.error(f"A error ocured trying to send ping: {e}")
-                        global_value.logger("A error ocured trying to send ping: %s" % str(e), "ERROR")
+                        global_value.logger("A error ocured trying to send ping: %s", "ERROR", e)
             except Exception as e:  # Catch exceptions and log them
                 # self.logger.error(f"An error occurred while sending ping or attempting to reconnect: {e}")
-                global_value.logger("An error occurred while sending ping or attempting to reconnect: %s" % str(e), "ERROR")
+                global_value.logger("An error occurred while sending ping or attempting to reconnect: %s", "ERROR", e)
                 try:
                     # self.logger.warning("Trying again...")
                     global_value.logger("Trying again...", "WARNING")
@@ -76,7 +76,7 @@ class PocketOptionApi:
                         global_value.logger("Connection was not established", "ERROR")
                 except Exception as e:
                     # self.logger.error(f"A error ocured when trying again: {e}")
-                    global_value.logger("A error ocured when trying again: %s" % str(e), "ERROR")
+                    global_value.logger("A error ocured when trying again: %s", "ERROR", e)
 
     def connect(self):
         # self.logger.info("Attempting to connect...")
@@ -108,15 +108,15 @@ class PocketOptionApi:
             self.send_websocket_request(self.init_msg)
         except Exception as e:
             # print(f"Going for exception.... error: {e}")
-            global_value.logger("Going for exception.... error: %s" % str(e), "ERROR")
+            global_value.logger("Going for exception.... error: %s", "ERROR", e)
             # self.logger.error(f"Connection failed with exception: {e}")
-            global_value.logger("Connection failed with exception: %s" % str(e), "ERROR")
+            global_value.logger("Connection failed with exception: %s", "ERROR", e)
     def send_websocket_request(self, msg):
         """Send websocket request to PocketOption server.
         :param dict msg: The websocket request msg.
         """
         # self.logger.info(f"Sending websocket request: {msg}")
-        global_value.logger("Sending websocket request: %s" % str(msg), "DEBUG")
+        global_value.logger("Sending websocket request: %s", "DEBUG", msg)
         def default(obj):
             if isinstance(obj, decimal.Decimal):
                 return str(obj)
@@ -131,13 +131,13 @@ class PocketOptionApi:
             return True
         except Exception as e:
             # self.logger.error(f"Failed to send request with exception: {e}")
-            global_value.logger("Failed to send request with exception: %s" % str(e), "ERROR")
+            global_value.logger("Failed to send request with exception: %s", "ERROR", e)
             # Consider adding any necessary exception handling code here
             try:
                 self.websocket_client.ws.send(bytearray(urllib.parse.quote(data).encode('utf-8')), opcode=websocket.ABNF.OPCODE_BINARY)
             except Exception as e:
                 # self.logger.warning(f"Was not able to reconnect: {e}")
-                global_value.logger("Was not able to reconnect: %s" % str(e), "WARNING")
+                global_value.logger("Was not able to reconnect: %s", "WARNING", e)
 
     def _login(self, init_msg):
         # self.logger.info("Trying to login...")
@@ -165,20 +165,20 @@ class PocketOptionApi:
         self.websocket_client.ws.send(init_msg)
 
         # self.logger.info(f"Message was sent successfully to log you in!, mesage: {init_msg}")
-        global_value.logger("Message was sent successfully to log you in!, mesage: %s" % str(init_msg), "DEBUG")
+        global_value.logger("Message was sent successfully to log you in!, mesage: %s", "DEBUG", init_msg)
 
         try:
             self.websocket_client.ws.run_forever()
         except WebSocketException as e:
             self.logger.error(f"A error ocured with websocket: {e}")
-            global_value.logger("A error ocured with websocket: %s" % str(e), "ERROR")
+            global_value.logger("A error ocured with websocket: %s", "ERROR", e)
             # self.send_websocket_request(msg=init_msg)
             try:
                 self.websocket_client.ws.run_forever()
                 self.send_websocket_request(msg=init_msg)
             except Exception as e:
                 # self.logger.error(f"Trying again failed, skiping... error: {e}")
-                global_value.logger("Trying again failed, skiping... error: %s" % str(e), "ERROR")
+                global_value.logger("Trying again failed, skiping... error: %s", "ERROR", e)
                 # self.send_websocket_request(msg=init_msg)
 
     @property
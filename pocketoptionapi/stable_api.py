@@ -2,11 +2,16 @@ import asyncio, threading, sys, json, time, operator
 from datetime import datetime
 from tzlocal import get_localzone
 from pocketoptionapi.api import PocketOptionAPI
+from pocketoptionapi.ws.subscriptions import SubscriptionManager, parse_history_new, store_pair_history
 import pocketoptionapi.constants as OP_code
 import pocketoptionapi.global_value as global_value
 from collections import defaultdict
 from collections import deque
 import pandas as pd
+from concurrent.futures import TimeoutError as FutureTimeout
+from pocketoptionapi.ws.backfill import HistoryBackfill
+from pocketoptionapi.ws.channels.candles import index_num, offset_count
+from pocketoptionapi.ws.settlement import SettlementTimeout, deal_status
 
 local_zone_name = get_localzone()
 
@@ -23,7 +28,7 @@ class PocketOption:
                      3600, 7200, 14400, 28800, 43200, 86400, 604800, 2592000]
         global_value.SSID = ssid
         global_value.DEMO = demo
-        global_value.logger("Modo Demo: %s" % str(demo), "INFO")
+        global_value.logger("Modo Demo: %s", "INFO", demo)
         self.suspend = 0.5
         self.thread = None
         self.subscribe_candle = []
@@ -36,6 +41,7 @@ class PocketOption:
                           r"Chrome/66.0.3359.139 Safari/537.36"}
         self.SESSION_COOKIE = {}
         self.api = PocketOptionAPI()
+        self.subscriptions = None
         self.loop = asyncio.get_event_loop()
 
     def get_server_timestamp(self):
@@ -94,7 +100,7 @@ class PocketOption:
 
         except Exception as e:
             # logging.error(f"Error during disconnection: {e}")
-            global_value.logger("Error during disconnection: %s" % str(e), "ERROR")
+            global_value.logger("Error during disconnection: %s", "ERROR", e)
 
     def connect(self):
         try:
@@ -103,7 +109,7 @@ class PocketOption:
 
         except Exception as e:
             # logging.error(f"Error connecting: {e}")
-            global_value.logger("Error connecting: %s" % str(e), "ERROR")
+            global_value.logger("Error connecting: %s", "ERROR", e)
             return False
         return True
     
@@ -147,72 +153,62 @@ class PocketOption:
         for pack in global_value.stat:
             if pack[0] == ido:
                # logger.debug('Closed Order',pack[1])
-               global_value.logger("Closed Order %s" % str(pack[1]), "DEBUG")
+               global_value.logger("Closed Order %s", "DEBUG", pack[1])
 
         return pack[0]
     
-    def buy(self, amount, active, action, expirations):
-        self.api.buy_multi_option = {}
-        self.api.buy_successful = None
-        req_id = "buy"
-
+    def _request(self, event, key, send, timeout):
+        """Register a waiter for the reply to `event`/`key`, send and wait for it."""
+        future = self.api.pending.register(event, key)
         try:
-            if req_id not in self.api.buy_multi_option:
-                self.api.buy_multi_option[req_id] = {"id": None}
-            else:
-                self.api.buy_multi_option[req_id]["id"] = None
-        except Exception as e:
-            global_value.logger("Error initializing buy_multi_option: %s" % str(e), "ERROR")
+            send()
+            return future.result(timeout=timeout)
+        except FutureTimeout:
+            return None
+        finally:
+            self.api.pending.discard(event, future)
+
+    def buy(self, amount, active, action, expirations, timeout=5):
+        req_id = self.api.pending.next_id("buy")
+
+        # The frame must leave within half the wait, leaving the rest for the reply; if it is
+        # dropped unsent the wait ends at once with an error instead of a late order
+        def dropped():
+            self.api.pending.resolve("openOrder", {"error": "Order not sent"}, req_id)
+
+        order_data = self._request("openOrder", req_id,
+                                   lambda: self.api.buyv3(amount, active, action, expirations, req_id,
+                                                          expires=timeout / 2, on_drop=dropped), timeout)
+        if order_data is None:
+            global_value.logger("Unknown error occurred during purchase operation", "ERROR")
+            return False, None
+        if "error" in order_data:
+            global_value.logger(str(order_data["error"]), "ERROR")
             return False, None
 
-        global_value.order_data = None
-        global_value.result = None
-
-        self.api.buyv3(amount, active, action, expirations, req_id)
-
-        start_t = time.time()
-        while True:
-            if global_value.result is not None and global_value.order_data is not None:
-                break
-            if time.time() - start_t >= 5:
-                if isinstance(global_value.order_data, dict) and "error" in global_value.order_data:
-                    global_value.logger(str(global_value.order_data["error"]), "ERROR")
-                else:
-                    global_value.logger("Unknown error occurred during purchase operation", "ERROR")
-                return False, None
-            time.sleep(0.1)
+        return True, order_data.get("id", None)
 
-        return global_value.result, global_value.order_data.get("id", None)
+    def watch_order(self, id_number, timeout=None):
+        """Future resolved with the closed deal once the order settles."""
+        return self.api.settlement.watch(id_number, timeout)
 
     def check_win(self, id_number=None):
         if not id_number:
             order_info = self.get_async_order()
             return order_info
-        start_t = time.time()
-        order_info = None
-
-        while True:
-            try:
-                order_info = self.get_async_order(id_number)
-                if order_info and "id" in order_info and order_info["id"] is not None:
-                    break
-            except:
-                pass
-
-            if time.time() - start_t >= 180:
-                # logger.error("Timeout: Unable to retrieve order information in time.")
-                global_value.logger("Timeout: Unable to retrieve order information in time.", "ERROR")
-                return None, "unknown"
 
-            time.sleep(0.1)
+        try:
+            order_info = self.watch_order(id_number, timeout=180).result()
+        except SettlementTimeout:
+            # logger.error("Timeout: Unable to retrieve order information in time.")
+            global_value.logger("Timeout: Unable to retrieve order information in time.", "ERROR")
+            return None, "unknown"
 
-        if order_info and "profit" in order_info:
-            status = "win" if order_info["profit"] > 0 else "loose"
-            return order_info["profit"], status
-        else:
+        profit, status = deal_status(order_info)
+        if status == "unknown":
             # logger.error("Invalid order information retrieved.")
             global_value.logger("Invalid order information retrieved.", "ERROR")
-            return None, "unknown"
+        return profit, status
 
     @staticmethod
     def last_time(timestamp, period):
@@ -259,6 +255,18 @@ class PocketOption:
         diff = (diferencas[1:] == period).all()
         return data_df, diff
 
+    def subscribe(self, actives, period):
+        """Subscribe to many assets at once and load their candles.
+
+        Returns {asset: loaded}. The assets are subscribed again automatically
+        after a reconnect.
+        """
+        if self.subscriptions is None or self.subscriptions.period != period:
+            if self.subscriptions is not None:
+                self.subscriptions.close()
+            self.subscriptions = SubscriptionManager(self.api, period)
+        return self.subscriptions.subscribe(actives)
+
     def change_symbol(self, active, period):
         return self.api.change_symbol(active, period)
 
@@ -266,43 +274,21 @@ class PocketOption:
         return self.api.synced_datetime
 
     def get_history(self, active, period, start_time=None, end_time=None, count_request=1):
-        try:
-            if start_time is None:
-                time_sync = self.get_server_timestamp()
-                time_red = self.last_time(time_sync, period)
-            else:
-                time_red = start_time
-                time_sync = self.get_server_timestamp()
+        """Load `active`'s candles from `end_time` (oldest) to `start_time` (newest, default now)
+        into its candle store, fetching only what the store does not have yet.
 
-            all_candles = []
-
-            time_red = int(datetime.now().timestamp())
-            while True:
-                try:
-                    self.api.history_data = None
-                    self.api.getcandles(active, period, time_red)
-
-                    for i in range(1, 100):
-                        if self.api.history_data is None:
-                            time.sleep(0.1)
-                        elif self.api.history_data is not None or i == 99:
-                            break
-
-                    if self.api.history_data is not None:
-                        all_candles.extend(self.api.history_data)
-                        if end_time is None:
-                            break
-                        else:
-                            self.api.history_data = sorted(self.api.history_data, key=lambda x: x["time"])
-                            _ = int(self.api.history_data[len(self.api.history_data)-1]["time"]) - int(self.api.history_data[0]["time"])
-                            time_red = time_red - _
-                            if time_red < end_time:
-                                break
-                except Exception as e:
-                    global_value.logger(str(e), "ERROR")
-            all_candles = sorted(all_candles, key=lambda x: x["time"])
-            global_value.set_cache(global_value.pairs[active]["id"], all_candles)
-            return True
+        Returns True when every page was loaded.
+        """
+        try:
+            until = start_time if start_time is not None else int(time.time())
+            since = end_time if end_time is not None else until - offset_count(period)
+            store = global_value.candle_store(global_value.pairs[active]["id"], period)
+            backfill = HistoryBackfill(self.api, active, period, store,
+                                       concurrency=global_value.history_concurrency)
+            stats = backfill.run(since, until)
+            if global_value.candle_cold_days is not None:
+                store.compact(time.time() - global_value.candle_cold_days * 86400)
+            return stats['failed'] == 0
 
             if len(his['candles']) > 0:
                 for can in his['candles']:
@@ -338,73 +324,41 @@ class PocketOption:
 
             all_candles = []
 
-            self.api.history_new = None
-
-            i = 0
             while True:
-                i += 1
                 try:
-                    self.api.change_symbol(active, period)
-
-                    for i in range(1, 100):
-                        if self.api.history_new is None:
-                            time.sleep(0.1)
-                        elif self.api.history_new is not None or i == 99:
-                            break
-
-                    if self.api.history_new is not None:
-                        his = self.api.history_new
+                    his = self._request("updateHistoryNew", active,
+                                        lambda: self.api.change_symbol(active, period), 10)
+                    if his is not None:
                         break
 
                 except Exception as e:
                     # logging.error(e)
                     global_value.logger(str(e), "ERROR")
-            c0, c1 = [], []
+            c1 = []
             if period < 60 or count_request > 1:
                 time_red = int(datetime.now().timestamp())
                 x = 0
                 while True:
                     x += 1
                     try:
-                        self.api.history_data = None
-                        self.api.getcandles(active, period, time_red)
+                        index = index_num()
+                        history_data = self._request("loadHistoryPeriod", index,
+                                                     lambda: self.api.getcandles(active, period, time_red, index=index), 10)
 
-                        for i in range(1, 100):
-                            if self.api.history_data is None:
-                                time.sleep(0.1)
-                            elif self.api.history_data is not None or i == 99:
-                                break
-
-                        if self.api.history_data is not None:
-                            c1.extend(self.api.history_data)
+                        if history_data is not None:
+                            c1.extend(history_data)
                             if x == count_request:
                                 break
                             else:
-                                self.api.history_data = sorted(self.api.history_data, key=lambda x: x["time"])
-                                _ = int(self.api.history_data[len(self.api.history_data)-1]["time"]) - int(self.api.history_data[0]["time"])
+                                history_data = sorted(history_data, key=lambda x: x["time"])
+                                _ = int(history_data[len(history_data)-1]["time"]) - int(history_data[0]["time"])
                                 time_red = time_red - _
 
                     except Exception as e:
                         # logger.error(e)
                         global_value.logger(str(e), "ERROR")
-            if len(his['candles']) > 0:
-                for can in his['candles']:
-                    c = {'time': can[0], 'open': can[1], 'high': can[3], 'low': can[4], 'close': can[2]}
-                    c0.append(c)
-            c0 = sorted(c0, key=lambda x: x["time"])
-            for hist in his['history']:
-                h = {'time': hist[0], 'price': hist[1]}
-                c1.append(h)
-            c1 = sorted(c1, key=lambda x: x["time"])
-            if active in global_value.pairs:
-                global_value.pairs[active]['history'] = c1
-                if len(c0) > 0:
-                    df = pd.DataFrame(c0)
-                    df = df.sort_values(by='time').reset_index(drop=True)
-                    df['time'] = pd.to_datetime(df['time'], unit='s')
-                    df.set_index('time', inplace=True)
-                    df.reset_index(inplace=True)
-                    global_value.pairs[active]['dataframe'] = df
+            c0, ticks = parse_history_new(his)
+            store_pair_history(active, period, c0, c1 + ticks)
             return True
 
         except:
@@ -0,0 +1,94 @@
+"""Bounded, array backed tick storage."""
+import threading
+
+import numpy as np
+
+
+class TickStore(object):
+    """Per pair tick history kept in preallocated float64 arrays.
+
+    Ticks are appended to buffers twice the `capacity`; when the end is
+    reached the retained tail is moved back to the front, so appends are
+    amortized O(1) and the live ticks are always one contiguous slice that can
+    be handed out as a NumPy view. Ticks older than `retention` seconds
+    (relative to the newest tick) or beyond `capacity` are dropped.
+
+    Views stay valid until the next compaction; copy them if they are kept
+    across appends.
+    """
+
+    def __init__(self, capacity=16384, retention=None):
+        self.capacity = capacity
+        self.retention = retention
+        self._times = np.empty(capacity * 2, dtype=np.float64)
+        self._prices = np.empty(capacity * 2, dtype=np.float64)
+        self.start = 0
+        self.end = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return self.end - self.start
+
+    def append(self, timestamp, price):
+        with self.lock:
+            if self.end == len(self._times):
+                self._compact(self.capacity - 1)
+            self._times[self.end] = timestamp
+            self._prices[self.end] = price
+            self.end += 1
+            if self.end - self.start > self.capacity:
+                self.start = self.end - self.capacity
+            if self.retention is not None and self._times[self.start] < timestamp - self.retention:
+                self._expire(timestamp - self.retention)
+
+    def extend(self, times, prices):
+        """Append arrays of ticks, keeping only what fits the retention rules."""
+        times = np.asarray(times, dtype=np.float64)[-self.capacity:]
+        prices = np.asarray(prices, dtype=np.float64)[-self.capacity:]
+        with self.lock:
+            keep = min(len(self), self.capacity - len(times))
+            self._compact(keep)
+            self._times[self.end:self.end + len(times)] = times
+            self._prices[self.end:self.end + len(prices)] = prices
+            self.end += len(times)
+            if self.retention is not None and len(self):
+                self._expire(self._times[self.end - 1] - self.retention)
+
+    def _compact(self, keep):
+        """Move the newest `keep` ticks to the front of the buffers."""
+        keep = max(0, min(keep, len(self)))
+        src = self.end - keep
+        self._times[:keep] = self._times[src:self.end]
+        self._prices[:keep] = self._prices[src:self.end]
+        self.start, self.end = 0, keep
+
+    def _expire(self, cutoff):
+        self.start += int(np.searchsorted(self._times[self.start:self.end], cutoff, side='left'))
+
+    def times(self):
+        """Zero copy view of the retained tick times, oldest first."""
+        with self.lock:
+            return self._times[self.start:self.end]
+
+    def prices(self):
+        """Zero copy view of the retained tick prices, oldest first."""
+        with self.lock:
+            return self._prices[self.start:self.end]
+
+    def since(self, timestamp):
+        """Return (times, prices) views for ticks at or after `timestamp`."""
+        with self.lock:
+            times = self._times[self.start:self.end]
+            i = self.start + int(np.searchsorted(times, timestamp, side='left'))
+            return self._times[i:self.end], self._prices[i:self.end]
+
+    def memory_usage(self):
+        """Bytes held by the preallocated buffers."""
+        return self._times.nbytes + self._prices.nbytes
+
+
+def memory_report(pairs):
+    """Return {pair: bytes} for every pair that holds a TickStore history."""
+    return {pair: data['history'].memory_usage()
+            for pair, data in pairs.items()
+            if isinstance(data.get('history'), TickStore)}
@@ -0,0 +1,192 @@
+"""Resumable, gap aware candle history backfill."""
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import wait as wait_futures
+
+import numpy as np
+
+import pocketoptionapi.global_value as global_value
+from pocketoptionapi.candle_store import to_records
+from pocketoptionapi.ws.channels.candles import index_num, offset_count
+
+CHECKPOINT = 'backfill.json'
+
+
+def merge_intervals(intervals):
+    """Union of half open [lo, hi) intervals, sorted; touching intervals are joined."""
+    merged = []
+    for lo, hi in sorted(intervals):
+        if merged and lo <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], hi)
+        else:
+            merged.append([lo, hi])
+    return merged
+
+
+def subtract_intervals(lo, hi, covered):
+    """Parts of [lo, hi) not in the merged `covered` intervals."""
+    missing = []
+    for c_lo, c_hi in covered:
+        if c_hi <= lo:
+            continue
+        if c_lo >= hi:
+            break
+        if c_lo > lo:
+            missing.append([lo, c_lo])
+        lo = max(lo, c_hi)
+    if lo < hi:
+        missing.append([lo, hi])
+    return missing
+
+
+def candle_runs(times, period):
+    """[first, last + period) for every run of consecutive candle times."""
+    if not len(times):
+        return []
+    breaks = np.flatnonzero(np.diff(times) > period)
+    starts = np.concatenate([[0], breaks + 1])
+    ends = np.concatenate([breaks, [len(times) - 1]])
+    return [[int(times[s]), int(times[e]) + period] for s, e in zip(starts, ends)]
+
+
+class HistoryBackfill(object):
+    """Fill one asset's CandleStore for a time range with loadHistoryPeriod pages.
+
+    Only what is missing is requested: the range is diffed against the runs
+    of candles already in the store and against the pages completed earlier,
+    which are checkpointed next to the store, so an interrupted backfill
+    resumes where it stopped and ranges the server has no candles for (market
+    closed) are not asked for again. Up to `concurrency` pages are in flight
+    at once, each matched to its reply by its history index; a page that
+    times out is retried `retries` times and then given up. Replies are
+    merged into the store, which keeps one candle per timestamp.
+    """
+
+    def __init__(self, api, active, period, store, concurrency=4, timeout=10, retries=2, page_span=None):
+        self.api = api
+        self.active = active
+        self.period = period
+        self.store = store
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.page_span = page_span or offset_count(period)
+        self.checkpoint_path = os.path.join(store.directory, CHECKPOINT)
+        self.covered = self._load_checkpoint()
+
+    def _load_checkpoint(self):
+        try:
+            with open(self.checkpoint_path) as f:
+                return merge_intervals(json.load(f).get('covered', []))
+        except (OSError, ValueError):
+            return []
+
+    def _save_checkpoint(self):
+        tmp = self.checkpoint_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({'period': self.period, 'covered': self.covered}, f)
+        os.replace(tmp, self.checkpoint_path)
+
+    def missing(self, since, until):
+        """Ranges of [since, until) that are neither in the store nor checkpointed."""
+        runs = candle_runs(self.store.read(since, until)['time'], self.period)
+        return subtract_intervals(since, until, merge_intervals(self.covered + runs))
+
+    def pages(self, since, until):
+        """[lo, hi) pages covering the missing ranges, newest first."""
+        pages = []
+        for lo, hi in reversed(self.missing(since, until)):
+            while hi > lo:
+                pages.append((max(lo, hi - self.page_span), hi))
+                hi -= self.page_span
+        return pages
+
+    def _received_bytes(self):
+        client = self.api.websocket_client
+        stats = client.dispatcher.stats.get("loadHistoryPeriod") if client is not None else None
+        return stats.bytes if stats is not None else 0
+
+    def run(self, since, until=None):
+        """Backfill [since, until) (until defaults to now). Returns the transfer stats."""
+        now = int(time.time())
+        until = now if until is None else int(until)
+        since = int(since) // self.period * self.period
+        until = until // self.period * self.period + self.period
+        # The forming bar is never final, so pages reaching it are not checkpointed past it
+        closed = now // self.period * self.period
+
+        queue = deque((page, 0) for page in self.pages(since, until))
+        stats = {'pages': 0, 'failed': 0, 'retries': 0, 'candles': 0, 'duplicates': 0, 'bytes': 0}
+        start_bytes = self._received_bytes()
+        started = time.perf_counter()
+        inflight = {}
+        try:
+            while queue or inflight:
+                while queue and len(inflight) < self.concurrency:
+                    page, attempt = queue.popleft()
+                    index = index_num()
+                    while any(entry[2] == index for entry in inflight.values()):
+                        index = index_num()
+                    future = self.api.pending.register("loadHistoryPeriod", index)
+                    inflight[future] = (page, attempt, index, time.monotonic() + self.timeout)
+                    self.api.getcandles(self.active, self.period, page[1], index=index)
+
+                deadline = min(entry[3] for entry in inflight.values())
+                done, _ = wait_futures(list(inflight), timeout=max(0, deadline - time.monotonic()),
+                                       return_when=FIRST_COMPLETED)
+                failed = []
+                for future in done:
+                    page, attempt, index, _ = inflight.pop(future)
+                    try:
+                        self._store_page(page, future.result(), closed, stats)
+                    except Exception as e:
+                        global_value.logger("Backfill page %s of %s failed: %s", "WARNING", page, self.active, e)
+                        failed.append((page, attempt))
+                now_mono = time.monotonic()
+                for future, (page, attempt, index, expires) in list(inflight.items()):
+                    if expires <= now_mono and not future.done():
+                        del inflight[future]
+                        self.api.pending.discard("loadHistoryPeriod", future)
+                        failed.append((page, attempt))
+                for page, attempt in failed:
+                    if attempt < self.retries:
+                        stats['retries'] += 1
+                        queue.append((page, attempt + 1))
+                    else:
+                        stats['failed'] += 1
+        finally:
+            for future in inflight:
+                self.api.pending.discard("loadHistoryPeriod", future)
+            self._save_checkpoint()
+
+        elapsed = time.perf_counter() - started
+        stats['bytes'] = self._received_bytes() - start_bytes
+        stats['elapsed'] = elapsed
+        stats['pages_per_sec'] = stats['pages'] / elapsed if elapsed else 0.0
+        stats['bytes_per_sec'] = stats['bytes'] / elapsed if elapsed else 0.0
+        global_value.logger("Backfill %s: %s pages (%s failed), %s candles, %s duplicates, "
+                            "%.1f pages/s, %.0f bytes/s", "INFO", self.active, stats['pages'],
+                            stats['failed'], stats['candles'], stats['duplicates'],
+                            stats['pages_per_sec'], stats['bytes_per_sec'])
+        return stats
+
+    def _store_page(self, page, rows, closed, stats):
+        records = to_records(rows or [])
+        if len(records):
+            times = records['time']
+            known = self.store.read(int(times[0]), int(times[-1]))['time']
+            duplicates = int(np.isin(times, known).sum())
+            self.store.write(records)
+            stats['duplicates'] += duplicates
+            stats['candles'] += len(records) - duplicates
+        stats['pages'] += 1
+        lo, hi = page
+        if len(records):
+            lo, hi = min(lo, int(records['time'][0])), max(hi, int(records['time'][-1]) + self.period)
+        hi = min(hi, closed)
+        if hi > lo:
+            self.covered = merge_intervals(self.covered + [[lo, hi]])
+        self._save_checkpoint()
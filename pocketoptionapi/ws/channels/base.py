@@ -10,6 +10,6 @@ class Base(object):
 
         self.api = api
 
-    def send_websocket_request(self, name, msg, request_id=""):
+    def send_websocket_request(self, name, msg, request_id="", expires=None, on_drop=None):
 
-        return self.api.send_websocket_request(name, msg, request_id)
+        return self.api.send_websocket_request(name, msg, request_id, expires=expires, on_drop=on_drop)
@@ -7,7 +7,7 @@ from pocketoptionapi.expiration import get_expiration_time
 class Buyv3(Base):
     name = "sendMessage"
 
-    def __call__(self, amount, active, direction, duration, request_id):
+    def __call__(self, amount, active, direction, duration, request_id, expires=None, on_drop=None):
         data_dict = {
             "asset": active,
             "amount": amount,
@@ -20,7 +20,8 @@ class Buyv3(Base):
 
         message = ["openOrder", data_dict]
 
-        self.send_websocket_request(self.name, message, str(request_id))
+        # An order frame is never sent after `expires` seconds or on a later connection
+        self.send_websocket_request(self.name, message, str(request_id), expires=expires, on_drop=on_drop)
 
 
 class Buyv3_by_raw_expired(Base):
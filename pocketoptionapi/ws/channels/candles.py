@@ -22,10 +22,12 @@ class GetCandles(Base):
 
     name = "sendMessage"
 
-    def __call__(self, active_id, interval, end_time, count=1):
+    def __call__(self, active_id, interval, end_time, count=1, index=None):
+        if index is None:
+            index = index_num()
         data = {
             "asset": str(active_id),
-            "index": index_num(),
+            "index": index,
             "time": end_time + 7200, #- offset_count(interval) * count,
             "offset": offset_count(interval),
             "period": interval,
@@ -35,3 +37,4 @@ class GetCandles(Base):
         data = ["loadHistoryPeriod", data]
 
         self.send_websocket_request(self.name, data)
+        return index
@@ -1,4 +1,4 @@
-import asyncio, websockets, json, ssl
+import asyncio, atexit, websockets, json, ssl, logging
 from datetime import datetime, timedelta, timezone
 
 import pocketoptionapi.constants as OP_code
@@ -6,16 +6,17 @@ import pocketoptionapi.global_value as global_value
 from pocketoptionapi.constants import REGION
 from pocketoptionapi.ws.objects.timesync import TimeSync
 from pocketoptionapi.ws.objects.time_sync import TimeSynchronizer
+from pocketoptionapi.ws.dispatcher import EventDispatcher
 
-# logger = logging.getLogger(__name__)
+logger = logging.getLogger(__name__)
 
 timesync = TimeSync()
 sync = TimeSynchronizer()
 
 
 async def on_open():
-    global_value.logger("CONNECTED SUCCESSFUL", "INFO")
-    global_value.logger("Websocket client connected.", "DEBUG")
+    logger.info("CONNECTED SUCCESSFUL")
+    logger.debug("Websocket client connected.")
     global_value.websocket_is_connected = True
 
 
@@ -31,47 +32,51 @@ async def send_ping(ws):
 async def process_message(message):
     try:
         data = json.loads(message)
-        global_value.logger("Received message: %s" % str(data), "DEBUG")
+        logger.debug("Received message: %s", data)
 
         if isinstance(data, dict) and 'uid' in data:
             uid = data['uid']
-            global_value.logger("UID: %s" % str(uid), "DEBUG")
+            logger.debug("UID: %s", uid)
         elif isinstance(data, list) and len(data) > 0:
             event_type = data[0]
             event_data = data[1]
-            global_value.logger("Event type: %s, Event data: %s" %(str(event_type), str(event_data)), "DEBUG")
+            logger.debug("Event type: %s, Event data: %s", event_type, event_data)
 
     except json.JSONDecodeError as e:
-        global_value.logger("JSON decode error: %s" % str(e), "ERROR")
+        logger.error("JSON decode error: %s", e)
     except KeyError as e:
-        global_value.logger("Key error: %s" % str(e), "ERROR")
+        logger.error("Key error: %s", e)
     except Exception as e:
-        global_value.logger("Error processing message: %s" % str(e), "ERROR")
+        logger.error("Error processing message: %s", e)
 
 
 class WebsocketClient(object):
     def __init__(self, api) -> None:
-        self.updateHistoryNew = None
-        self.updateStream = None
-        self.loadHistoryPeriod = None
-        self.updateClosedDeals = False
-        self.successcloseOrder = False
-        self.updateStream = False
         self.api = api
-        self.message = None
+        self.dispatcher = self.register_handlers()
+        self.auth_callbacks = []
         self.url = None
         self.ssid = global_value.SSID
         self.websocket = None
         self.region = REGION()
         self.loop = asyncio.get_event_loop()
+        self.recorder = None
+        if global_value.ws_record:
+            from pocketoptionapi.ws.recorder import FrameRecorder
+            self.recorder = FrameRecorder(global_value.ws_record, global_value.ws_record_max_bytes)
+            atexit.register(self.recorder.close)
 
     async def websocket_listener(self, ws):
         try:
             async for message in ws:
+                if self.recorder is not None:
+                    self.recorder.record(message)
                 await self.on_message(message)
         except Exception as e:
-            # logger.warning(f"Error occurred: {e}")
-            global_value.logger("Error occurred: %s" % str(e), "WARNING")
+            logger.warning("Error occurred: %s", e)
+        finally:
+            if self.recorder is not None:
+                self.recorder.flush()
 
     async def connect(self):
         ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
@@ -84,34 +89,40 @@ class WebsocketClient(object):
             pass
 
         while not global_value.websocket_is_connected:
-            for url in self.region.get_regions(global_value.DEMO):
-                global_value.logger(str(url), "INFO")
+            urls = [global_value.ws_url] if global_value.ws_url else self.region.get_regions(global_value.DEMO)
+            for url in urls:
+                logger.info("%s", url)
                 try:
                     async with websockets.connect(
                             url,
-                            ssl=ssl_context,
+                            ssl=ssl_context if url.startswith("wss:") else None,
                             additional_headers={
                                 "Origin": "https://pocketoption.com",
                                 "Cache-Control": "no-cache",
                                 "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
                             }
                     ) as ws:
+                        if self.recorder is not None:
+                            ws = self.recorder.wrap(ws)
                         self.websocket = ws
                         self.url = url
                         global_value.websocket_is_connected = True
 
                         # Create and run tasks
                         on_message_task = asyncio.create_task(self.websocket_listener(ws))
-                        sender_task = asyncio.create_task(self.send_message(self.message))
+                        sender_task = asyncio.create_task(self.api.send_queue.run(ws))
                         ping_task = asyncio.create_task(send_ping(ws))
 
-                        await asyncio.gather(on_message_task, sender_task, ping_task)
+                        try:
+                            await asyncio.gather(on_message_task, sender_task, ping_task)
+                        finally:
+                            sender_task.cancel()
+                            ping_task.cancel()
 
                 except websockets.ConnectionClosed as e:
                     global_value.websocket_is_connected = False
                     await self.on_close(e)
-                    # logger.warning("Trying another server")
-                    global_value.logger("Trying another server", "WARNING")
+                    logger.warning("Trying another server")
 
                 except Exception as e:
                     global_value.websocket_is_connected = False
@@ -121,22 +132,6 @@ class WebsocketClient(object):
 
         return True
 
-    async def send_message(self, message):
-        while global_value.websocket_is_connected is False:
-            await asyncio.sleep(0.1)
-
-        self.message = message
-
-        if global_value.websocket_is_connected and message is not None:
-            try:
-                await self.websocket.send(message)
-            except Exception as e:
-                # logger.warning(f"Error sending message: {e}")
-                global_value.logger("Error sending message: %s" % str(e), "WARNING")
-        elif message is not None:
-            # logger.warning("WebSocket not connected")
-            global_value.logger("WebSocket not connected", "WARNING")
-
     @staticmethod
     def dict_queue_add(self, dict, maxdict, key1, key2, key3, value):
         if key3 in dict[key1][key2]:
@@ -158,53 +153,9 @@ class WebsocketClient(object):
         """Method for processing websocket messages."""
 
         if type(message) is bytes:
-            message2 = message.decode('utf-8')
-            message = message.decode('utf-8')
-            message = json.loads(message)
-
-            if "balance" in message:
-                if "uid" in message:
-                    global_value.balance_id = message["uid"]
-                global_value.balance = message["balance"]
-                global_value.balance_type = message["isDemo"]
-
-            elif "requestId" in message and message["requestId"] == 'buy':
-                global_value.order_data = message
-                #global_value.open_orders.insert(0, message)
-
-            elif self.updateClosedDeals and isinstance(message, list):
-                global_value.closed_deals = message
-                self.updateClosedDeals = False
-
-            elif self.successcloseOrder and isinstance(message, dict):
-                self.api.order_async = message
-                #global_value.closed_orders.insert(0, message)
-                self.successcloseOrder = False
-
-            elif self.loadHistoryPeriod and isinstance(message, dict):
-                self.loadHistoryPeriod = False
-                self.api.history_data = message["data"]
-
-            elif self.updateStream and isinstance(message, list):
-                self.updateStream = False
-                if len(message[0]) == 3:
-                    self.api.time_sync.server_timestamp = message[0][1]
-                    if message[0][0] in global_value.pairs:
-                        if 'history' in global_value.pairs[message[0][0]]:
-                            h = {'time': message[0][1], 'price': message[0][2]}
-                            global_value.pairs[message[0][0]]['history'].append(h)
-
-            elif self.updateHistoryNew and isinstance(message, dict):
-                self.updateHistoryNew = False
-                self.api.history_new = message
-
-            elif '[[5,"#AAPL","Apple","stock' in message2:
-                global_value.PayoutData = message2
+            await self.dispatcher.feed_binary(message)
             return
 
-        else:
-            pass
-
         if message.startswith('0') and "sid" in message:
             await self.websocket.send("40")
 
@@ -214,43 +165,99 @@ class WebsocketClient(object):
         elif "40" and "sid" in message:
             await self.websocket.send(self.ssid)
 
-        elif message.startswith('451-['):
-            json_part = message.split("-", 1)[1]
-
-            message = json.loads(json_part)
-
-            if message[0] == "successauth":
-                await on_open()
-
-            elif message[0] == "successupdateBalance":
-                global_value.balance_updated = True
-            elif message[0] == "successopenOrder":
-                global_value.result = True
-
-            elif message[0] == "updateClosedDeals":
-                self.updateClosedDeals = True
-
-            elif message[0] == "successcloseOrder":
-                self.successcloseOrder = True
-
-            elif message[0] == "loadHistoryPeriod":
-                self.loadHistoryPeriod = True
-
-            elif message[0] == "updateStream":
-                self.updateStream = True
-
-            elif message[0] == "updateHistoryNew":
-                self.updateHistoryNew = True
-
         elif message.startswith("42") and "NotAuthorized" in message:
             # logging.error("User not Authorized: Please Change SSID for one valid")
-            global_value.logger("User not Authorized: Please Change SSID for one valid", "ERROR")
+            logger.error("User not Authorized: Please Change SSID for one valid")
             global_value.ssl_Mutual_exclusion = False
             await self.websocket.close()
 
+        elif message.startswith('4'):
+            await self.dispatcher.feed_text(message)
+
+    def register_handlers(self):
+        """Build the event name -> handler table used by the dispatcher."""
+        dispatcher = EventDispatcher(self.on_unrouted)
+        dispatcher.on("successauth", self.on_successauth)
+        dispatcher.on("successupdateBalance", self.on_balance)
+        dispatcher.on("successopenOrder", self.on_open_order)
+        dispatcher.on("failopenOrder", self.on_fail_order)
+        dispatcher.on("updateClosedDeals", self.on_closed_deals)
+        dispatcher.on("successcloseOrder", self.on_close_order)
+        dispatcher.on("loadHistoryPeriod", self.on_history_period)
+        dispatcher.on("updateStream", self.on_stream)
+        dispatcher.on("updateHistoryNew", self.on_history_new)
+        dispatcher.on("updateAssets", self.on_assets)
+        return dispatcher
+
+    async def on_successauth(self, data):
+        await on_open()
+        for callback in self.auth_callbacks:
+            callback()
+
+    def on_balance(self, data):
+        global_value.balance_updated = True
+        if isinstance(data, dict) and "balance" in data:
+            if "uid" in data:
+                global_value.balance_id = data["uid"]
+            global_value.balance = data["balance"]
+            global_value.balance_type = data["isDemo"]
+
+    def on_open_order(self, data):
+        global_value.result = True
+        if isinstance(data, dict):
+            global_value.order_data = data
+            self.api.pending.resolve("openOrder", data, data.get("requestId"))
+
+    def on_fail_order(self, data):
+        if isinstance(data, dict):
+            global_value.order_data = data
+            self.api.pending.resolve("openOrder", data, data.get("requestId"))
+
+    def on_closed_deals(self, data):
+        if isinstance(data, list):
+            global_value.closed_deals = data
+            self.api.settlement.settle(data)
+
+    def on_close_order(self, data):
+        if isinstance(data, dict):
+            self.api.order_async = data
+            self.api.settlement.settle(data.get("deals") or [])
+
+    def on_history_period(self, data):
+        if isinstance(data, dict):
+            self.api.history_data = data["data"]
+            self.api.pending.resolve("loadHistoryPeriod", data["data"], data.get("index"))
+
+    def on_stream(self, data):
+        if isinstance(data, list) and data and len(data[0]) == 3:
+            self.api.time_sync.server_timestamp = data[0][1]
+            for asset, tick_time, price in data:
+                if asset in global_value.pairs:
+                    pair = global_value.pairs[asset]
+                    if 'history' in pair:
+                        pair['history'].append(tick_time, price)
+                    if 'candles' in pair:
+                        pair['candles'].add_tick(tick_time, price)
+
+    def on_history_new(self, data):
+        if isinstance(data, dict):
+            self.api.history_new = data
+            self.api.pending.resolve("updateHistoryNew", data, data.get("asset"))
+
+    def on_assets(self, data):
+        global_value.PayoutData = json.dumps(data)
+
+    def on_unrouted(self, event, data, raw):
+        """Payloads of unknown events, matched on their content as before."""
+        if isinstance(data, dict) and "balance" in data:
+            self.on_balance(data)
+        elif isinstance(data, dict) and "requestId" in data:
+            self.on_open_order(data)
+        elif raw is not None and b'[[5,"#AAPL","Apple","stock' in raw:
+            global_value.PayoutData = raw.decode('utf-8')
+
     async def on_error(self, error):
-        # logger.error(error)
-        global_value.logger(str(error), "ERROR")
+        logger.error("%s", error)
         global_value.websocket_error_reason = str(error)
         global_value.check_websocket_if_error = True
 
@@ -0,0 +1,159 @@
+"""Socket.IO event decoding and dispatch for the websocket client."""
+import inspect
+import json
+import time
+from collections import defaultdict
+
+import pocketoptionapi.global_value as global_value
+
+
+class EventStats(object):
+    """Counters and timings for one event name."""
+
+    __slots__ = ('count', 'bytes', 'decode_time', 'handler_time', 'handler_max')
+
+    def __init__(self):
+        self.count = 0
+        self.bytes = 0
+        self.decode_time = 0.0
+        self.handler_time = 0.0
+        self.handler_max = 0.0
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'bytes': self.bytes,
+            'decode_avg': self.decode_time / self.count if self.count else 0.0,
+            'handler_avg': self.handler_time / self.count if self.count else 0.0,
+            'handler_max': self.handler_max,
+        }
+
+
+def parse_packet(message):
+    """Split a Socket.IO text packet into (type, attachments, args).
+
+    Handles EVENT (`42[...]`) and BINARY_EVENT (`45<n>-[...]`) packets with
+    an optional namespace and ack id. Returns None for anything else.
+    """
+    if len(message) < 2 or message[0] != '4' or message[1] not in '2356':
+        return None
+    packet_type = message[1]
+    i = 2
+    attachments = 0
+    if packet_type in '56':
+        dash = message.find('-', i)
+        if dash < 0:
+            return None
+        attachments = int(message[i:dash])
+        i = dash + 1
+    if message.startswith('/', i):
+        comma = message.find(',', i)
+        i = comma + 1 if comma >= 0 else len(message)
+    while i < len(message) and message[i].isdigit():
+        i += 1
+    try:
+        args = json.loads(message[i:])
+    except ValueError:
+        return None
+    return packet_type, attachments, args
+
+
+def _fill_placeholders(value, attachments):
+    if isinstance(value, dict):
+        if value.get('_placeholder') is True and 'num' in value:
+            return attachments[value['num']]
+        return {k: _fill_placeholders(v, attachments) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_fill_placeholders(v, attachments) for v in value]
+    return value
+
+
+class EventDispatcher(object):
+    """Pair Socket.IO binary placeholders with their payloads and route events.
+
+    A BINARY_EVENT text packet announces how many binary frames follow; the
+    frames are collected and substituted for the placeholders before the
+    registered handler for the event name runs, so a payload can no longer be
+    routed by whichever "next frame" flag happened to be set. Binary frames
+    without a pending event, and events without a handler, go to `fallback`.
+    """
+
+    def __init__(self, fallback=None):
+        self.handlers = {}
+        self.fallback = fallback
+        self.pending = None  # [event args, attachments expected, attachments received, decode time, bytes]
+        self.stats = defaultdict(EventStats)
+        self.unpaired = 0
+        self.dropped = 0
+
+    def on(self, event, handler):
+        """Register `handler(data)` for an event name."""
+        self.handlers[event] = handler
+
+    async def feed_text(self, message):
+        """Process a text packet. Returns False if it is not a Socket.IO event."""
+        t0 = time.perf_counter()
+        packet = parse_packet(message)
+        if packet is None:
+            return False
+        _, attachments, args = packet
+        if self.pending is not None:
+            self.dropped += 1
+            global_value.logger("Event %s dropped before its payload arrived", "WARNING", self.pending[0][0])
+            self.pending = None
+        if attachments:
+            self.pending = [args, attachments, [], time.perf_counter() - t0, len(message)]
+            return True
+        await self._dispatch(args, time.perf_counter() - t0, size=len(message))
+        return True
+
+    async def feed_binary(self, data):
+        """Process a binary frame, dispatching its event once all frames arrived."""
+        t0 = time.perf_counter()
+        payload = json.loads(data.decode('utf-8'))
+        if self.pending is None:
+            self.unpaired += 1
+            await self._run(None, payload, data, time.perf_counter() - t0, len(data))
+            return
+        pending = self.pending
+        pending[2].append(payload)
+        pending[3] += time.perf_counter() - t0
+        pending[4] += len(data)
+        if len(pending[2]) < pending[1]:
+            return
+        self.pending = None
+        t0 = time.perf_counter()
+        args = _fill_placeholders(pending[0], pending[2])
+        await self._dispatch(args, pending[3] + time.perf_counter() - t0, data, pending[4])
+
+    async def _dispatch(self, args, decode_time, raw=None, size=0):
+        if not isinstance(args, list) or not args:
+            return
+        event = args[0]
+        data = args[1] if len(args) > 1 else None
+        await self._run(event, data, raw, decode_time, size)
+
+    async def _run(self, event, data, raw, decode_time, size=0):
+        handler = self.handlers.get(event)
+        t0 = time.perf_counter()
+        if handler is not None:
+            result = handler(data)
+        elif self.fallback is not None:
+            result = self.fallback(event, data, raw)
+        else:
+            result = None
+        if inspect.isawaitable(result):
+            await result
+        elapsed = time.perf_counter() - t0
+
+        stats = self.stats[event]
+        stats.count += 1
+        stats.bytes += size
+        stats.decode_time += decode_time
+        stats.handler_time += elapsed
+        if elapsed > stats.handler_max:
+            stats.handler_max = elapsed
+
+    def timings(self):
+        """Per event counts, bytes received and average decode/handler time in seconds."""
+        return {str(event): stats.as_dict() for event, stats in self.stats.items()}
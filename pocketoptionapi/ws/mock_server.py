@@ -0,0 +1,373 @@
+"""Deterministic local stand-in for the PocketOption websocket server.
+
+Speaks the Engine.IO/Socket.IO framing WebsocketClient expects (`0{sid}`,
+`40`, `2`/`3` pings, `451-[event, placeholder]` followed by a binary JSON
+payload) and answers auth, changeSymbol, loadHistoryPeriod and openOrder.
+Ticks come from a recorded stream or a seeded synthetic one and are replayed
+at `speed` times their recorded pace (0: as fast as the client reads), so
+the client and bots can be benchmarked and races reproduced offline:
+
+    python -m pocketoptionapi.ws.mock_server --port 8765 --speed 10
+
+and set `global_value.ws_url = "ws://127.0.0.1:8765/socket.io/?EIO=4&transport=websocket"`.
+"""
+import argparse
+import asyncio
+import csv
+import heapq
+import itertools
+import json
+import math
+import os
+import threading
+import zlib
+
+from websockets.asyncio.server import serve
+
+from pocketoptionapi.candle_store import CandleStore
+
+PLACEHOLDER = {"_placeholder": True, "num": 0}
+# GetCandles asks for end_time + 7200; the reply ends 7200 seconds before `time`
+HISTORY_TIME_SHIFT = 7200
+DEFAULT_ASSETS = [(66, "EURUSD_otc"), (67, "GBPUSD_otc"), (68, "USDJPY_otc"), (5, "#AAPL_otc")]
+DEFAULT_START = 1_700_006_400
+
+
+def synthetic_price(asset, t, seed=0):
+    """Deterministic price of `asset` at time `t`: slow waves plus hashed noise."""
+    phase = zlib.crc32(("%s:%s" % (seed, asset)).encode()) / 2 ** 32 * 2 * math.pi
+    base = 1 + (zlib.crc32(asset.encode()) % 1000) / 1000
+    noise = zlib.crc32(("%s:%s:%r" % (seed, asset, t)).encode()) / 2 ** 32 - 0.5
+    return round(base * (1 + 0.002 * math.sin(2 * math.pi * t / 86400 + phase)
+                         + 0.0005 * math.sin(2 * math.pi * t / 3600 + 2 * phase)
+                         + 0.00005 * noise), 5)
+
+
+def synthetic_ticks(assets, start=DEFAULT_START, interval=1.0, seed=0, duration=None):
+    """(time, asset, price) for every asset every `interval` seconds from `start`, endless without `duration`."""
+    for k in itertools.count():
+        t = round(start + k * interval, 3)
+        if duration is not None and t >= start + duration:
+            return
+        for asset in assets:
+            yield t, asset, synthetic_price(asset, t, seed)
+
+
+def load_ticks(path):
+    """(time, asset, price) rows of a recorded tick CSV (asset,time,price; header optional), by time."""
+    ticks = []
+    with open(path, newline='') as f:
+        for row in csv.reader(f):
+            try:
+                ticks.append((float(row[1]), row[0], float(row[2])))
+            except (ValueError, IndexError):
+                continue
+    ticks.sort(key=lambda tick: tick[0])
+    return ticks
+
+
+class MockServer(object):
+    """Serve a tick stream, candle history and order fills to WebsocketClient connections.
+
+    Every connection gets the stream from its start once it authenticates,
+    so two runs with the same ticks (or seed) see the same prices in the
+    same order. `ticks` is a list of recorded (time, asset, price) rows; by
+    default a synthetic stream of `assets` is generated every `tick_interval`
+    seconds from `start` for `duration` seconds (endless if None). History
+    requests are answered from `history`/<asset id or name>/<period>
+    CandleStores when present, otherwise from the synthetic price. Orders
+    open at the asset's last price and close, at the price the stream has
+    reached by their expiry, with `payout` percent profit. An `ssid` session
+    id, when set, must be presented at auth.
+    """
+
+    def __init__(self, ticks=None, assets=None, speed=1.0, seed=0, start=DEFAULT_START, tick_interval=1.0,
+                 duration=None, payout=92, balance=10000.0, history=None, ping_interval=25, ssid=None,
+                 stream_all=False):
+        self.ticks = ticks
+        self.assets = list(assets or DEFAULT_ASSETS)
+        if ticks:
+            known = {name for _, name in self.assets}
+            extra = sorted({asset for _, asset, _ in ticks} - known)
+            self.assets += [(1000 + i, name) for i, name in enumerate(extra)]
+        self.speed = speed
+        self.seed = seed
+        self.start = ticks[0][0] if ticks else start
+        self.tick_interval = tick_interval
+        self.duration = duration
+        self.payout = payout
+        self.balance = balance
+        self.history = history
+        self.ping_interval = ping_interval
+        self.ssid = ssid
+        self.stream_all = stream_all
+        self.sessions = itertools.count(1)
+        self.server = None
+        self.loop = None
+        self.thread = None
+        self._stores = {}
+
+    @property
+    def url(self):
+        host, port = self.server.sockets[0].getsockname()[:2]
+        return "ws://%s:%d/socket.io/?EIO=4&transport=websocket" % (host, port)
+
+    def tick_source(self):
+        if self.ticks is not None:
+            return iter(self.ticks)
+        return synthetic_ticks([name for _, name in self.assets], self.start, self.tick_interval,
+                               self.seed, self.duration)
+
+    def _store(self, asset, period):
+        if self.history is None:
+            return None
+        key = (asset, period)
+        if key not in self._stores:
+            self._stores[key] = None
+            ids = [str(i) for i, name in self.assets if name == asset] + [asset]
+            for name in ids:
+                directory = os.path.join(self.history, name, str(period))
+                if os.path.isdir(directory):
+                    self._stores[key] = CandleStore(directory)
+                    break
+        return self._stores[key]
+
+    def candles(self, asset, period, since, until):
+        """Candle dicts of `asset` with since <= time < until."""
+        store = self._store(asset, period)
+        if store is not None:
+            records = store.read(since, until - 1)
+            return [{name: records[name][i].item() for name in records.dtype.names} for i in range(len(records))]
+        candles = []
+        for t in range(int(math.ceil(since / period)) * period, int(until), period):
+            samples = [synthetic_price(asset, t + k * period / 4, self.seed) for k in range(4)]
+            close = synthetic_price(asset, t + period - 1, self.seed)
+            candles.append({'time': t, 'open': samples[0], 'high': max(samples + [close]),
+                            'low': min(samples + [close]), 'close': close})
+        return candles
+
+    async def handler(self, ws):
+        await MockSession(self, ws, next(self.sessions)).run()
+
+    async def serve(self, host='127.0.0.1', port=0):
+        """Start listening on the running loop. Returns the websockets server."""
+        self.server = await serve(self.handler, host, port, max_size=None, compression=None)
+        return self.server
+
+    def start_in_thread(self, host='127.0.0.1', port=0):
+        """Serve from a background thread with its own loop. Returns the client URL."""
+        ready = threading.Event()
+
+        def run():
+            self.loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self.loop)
+            self.loop.run_until_complete(self.serve(host, port))
+            ready.set()
+            self.loop.run_forever()
+
+        self.thread = threading.Thread(target=run, name="mock-server", daemon=True)
+        self.thread.start()
+        ready.wait()
+        return self.url
+
+    def stop(self):
+        if self.loop is not None:
+            async def close():
+                self.server.close()
+                await self.server.wait_closed()
+            asyncio.run_coroutine_threadsafe(close(), self.loop).result()
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+
+
+class MockSession(object):
+    """One client connection: its subscriptions, balance, open orders and stream position."""
+
+    def __init__(self, server, ws, number):
+        self.server = server
+        self.ws = ws
+        self.sid = "mock%d" % number
+        self.uid = 1000 + number
+        self.balance = server.balance
+        self.subscribed = set()
+        self.prices = {}
+        self.recent = {}
+        self.clock = server.start
+        self.orders = []
+        self.order_ids = itertools.count(1)
+        self.tasks = []
+        self.streaming = False
+
+    async def run(self):
+        await self.ws.send('0' + json.dumps({"sid": self.sid, "upgrades": [],
+                                             "pingInterval": self.server.ping_interval * 1000,
+                                             "pingTimeout": 20000, "maxPayload": 1000000}))
+        if self.server.ping_interval:
+            self.tasks.append(asyncio.create_task(self.ping()))
+        try:
+            async for message in self.ws:
+                await self.on_message(message)
+        except Exception:
+            pass
+        finally:
+            for task in self.tasks:
+                task.cancel()
+
+    async def ping(self):
+        while True:
+            await asyncio.sleep(self.server.ping_interval)
+            await self.ws.send("2")
+
+    async def emit(self, event, data):
+        """Send an event the way the server does: placeholder packet, then the binary payload."""
+        await self.ws.send('451-' + json.dumps([event, PLACEHOLDER]))
+        await self.ws.send(json.dumps(data).encode())
+
+    async def on_message(self, message):
+        if message == "40":
+            await self.ws.send('40' + json.dumps({"sid": self.sid}))
+            return
+        if not isinstance(message, str) or not message.startswith('42'):
+            return
+        try:
+            event, *args = json.loads(message[2:])
+        except ValueError:
+            return
+        handler = getattr(self, 'on_' + str(event), None)
+        if handler is not None:
+            await handler(args[0] if args else None)
+
+    async def on_auth(self, data):
+        session = data.get("session") if isinstance(data, dict) else None
+        if self.server.ssid is not None and session != self.server.ssid:
+            await self.ws.send('42["NotAuthorized"]')
+            return
+        await self.emit("successauth", {"id": self.sid})
+        await self.emit("successupdateBalance", {"uid": self.uid, "balance": self.balance, "isDemo": 1})
+        await self.emit("updateAssets", [[asset_id, name, name.replace('_otc', ' OTC'), "currency", 2,
+                                          self.server.payout, 60, 30, 3, 1, 0, 0, [], 0, True]
+                                         for asset_id, name in self.server.assets])
+        if not self.streaming:
+            self.streaming = True
+            self.tasks.append(asyncio.create_task(self.stream()))
+
+    async def on_ps(self, data):
+        pass
+
+    async def on_changeSymbol(self, data):
+        asset, period = data["asset"], int(data["period"])
+        self.subscribed.add(asset)
+        candles = self.server.candles(asset, period, self.clock - 100 * period, self.clock)
+        await self.emit("updateHistoryNew", {
+            "asset": asset, "period": period,
+            "history": list(self.recent.get(asset, ())),
+            "candles": [[c['time'], c['open'], c['close'], c['high'], c['low']] for c in candles],
+        })
+
+    async def on_loadHistoryPeriod(self, data):
+        period = int(data["period"])
+        until = min(data["time"] - HISTORY_TIME_SHIFT, self.clock)
+        candles = self.server.candles(data["asset"], period, until - data["offset"], until)
+        await self.emit("loadHistoryPeriod", {"asset": data["asset"], "index": data["index"],
+                                              "period": period, "data": candles})
+
+    async def on_openOrder(self, data):
+        asset, amount = data.get("asset"), data.get("amount", 0)
+        price = self.prices.get(asset)
+        error = ("Asset not available" if price is None else
+                 "Invalid amount" if not amount or amount <= 0 else
+                 "Not enough money" if amount > self.balance else None)
+        if error is not None:
+            await self.emit("failopenOrder", {"error": error, "requestId": data.get("requestId")})
+            return
+        self.balance -= amount
+        deal = {
+            "id": "%s-%d" % (self.sid, next(self.order_ids)), "requestId": data.get("requestId"),
+            "uid": self.uid, "asset": asset, "amount": amount, "action": data.get("action"),
+            "command": 0 if data.get("action") == "call" else 1, "isDemo": 1,
+            "openTimestamp": self.clock, "closeTimestamp": self.clock + int(data.get("time", 60)),
+            "openPrice": price, "percentProfit": self.server.payout, "percentLoss": 100, "profit": 0,
+        }
+        heapq.heappush(self.orders, (deal["closeTimestamp"], deal["id"], deal))
+        await self.emit("successopenOrder", deal)
+        await self.emit("successupdateBalance", {"uid": self.uid, "balance": self.balance, "isDemo": 1})
+
+    async def settle(self, until):
+        """Close every order expiring at or before `until` at the stream's price."""
+        while self.orders and self.orders[0][0] <= until:
+            _, _, deal = heapq.heappop(self.orders)
+            close = self.prices[deal["asset"]]
+            if close == deal["openPrice"]:
+                profit = 0
+            elif (close > deal["openPrice"]) == (deal["command"] == 0):
+                profit = round(deal["amount"] * deal["percentProfit"] / 100, 2)
+            else:
+                profit = -deal["amount"]
+            deal = dict(deal, closePrice=close, profit=profit)
+            self.balance += deal["amount"] + profit
+            await self.emit("successcloseOrder", {"profit": profit, "deals": [deal]})
+            await self.emit("successupdateBalance", {"uid": self.uid, "balance": self.balance, "isDemo": 1})
+
+    async def stream(self):
+        """Replay the tick source, paced by its timestamps over `speed`."""
+        loop = asyncio.get_running_loop()
+        speed = self.server.speed
+        started = loop.time()
+        first = None
+        for t, asset, price in self.server.tick_source():
+            if first is None:
+                first = t
+            if speed:
+                delay = started + (t - first) / speed - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            else:
+                # Let the reader handle requests between ticks
+                await asyncio.sleep(0)
+            self.clock = t
+            self.prices[asset] = price
+            self.recent.setdefault(asset, []).append([t, price])
+            if len(self.recent[asset]) > 1000:
+                del self.recent[asset][:500]
+            if self.orders:
+                await self.settle(t)
+            if self.server.stream_all or asset in self.subscribed:
+                await self.emit("updateStream", [[asset, t, price]])
+        await self.settle(math.inf)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local PocketOption websocket stand-in")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--ticks', help='recorded ticks CSV (asset,time,price) to replay')
+    parser.add_argument('--speed', type=float, default=1.0, help='replay speed multiplier (0: as fast as possible)')
+    parser.add_argument('--seed', type=int, default=0, help='synthetic stream seed')
+    parser.add_argument('--assets', nargs='*', help='synthetic stream asset names')
+    parser.add_argument('--tick-interval', type=float, default=1.0, help='seconds between synthetic ticks')
+    parser.add_argument('--duration', type=float, help='seconds of synthetic stream (default: endless)')
+    parser.add_argument('--history', help='directory of <asset>/<period> candle stores for history requests')
+    parser.add_argument('--payout', type=float, default=92)
+    parser.add_argument('--ssid', help='only accept this auth session')
+    parser.add_argument('--stream-all', action='store_true', help='stream every asset without changeSymbol')
+    args = parser.parse_args()
+
+    server = MockServer(ticks=load_ticks(args.ticks) if args.ticks else None,
+                        assets=[(100 + i, name) for i, name in enumerate(args.assets)] if args.assets else None,
+                        speed=args.speed, seed=args.seed, tick_interval=args.tick_interval,
+                        duration=args.duration, payout=args.payout, history=args.history,
+                        ssid=args.ssid, stream_all=args.stream_all)
+
+    async def run():
+        await server.serve(args.host, args.port)
+        print(server.url)
+        await asyncio.Future()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
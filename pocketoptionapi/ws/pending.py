@@ -0,0 +1,72 @@
+"""Correlation of websocket requests with their replies."""
+import itertools
+import threading
+from collections import defaultdict
+from concurrent.futures import Future
+
+
+class PendingRequests(object):
+    """Registry of in-flight requests resolved by `WebsocketClient.on_message`.
+
+    Waiters are registered per event name with an optional key (requestId,
+    asset, history index, ...) *before* the request is sent. A reply resolves
+    the oldest waiter whose key matches; replies without a key, and waiters
+    registered without one, match in FIFO order. Each caller blocks on its own
+    `concurrent.futures.Future`, so many requests can be in flight at once.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.waiters = defaultdict(list)
+        self.counter = itertools.count(1)
+
+    def next_id(self, prefix=""):
+        return "%s%d" % (prefix, next(self.counter))
+
+    def register(self, event, key=None):
+        future = Future()
+        with self.lock:
+            self.waiters[event].append((key, future))
+        return future
+
+    def discard(self, event, future):
+        """Forget a waiter, e.g. after its caller timed out."""
+        with self.lock:
+            waiters = self.waiters.get(event, [])
+            for i, (_, f) in enumerate(waiters):
+                if f is future:
+                    del waiters[i]
+                    break
+
+    def _pop(self, event, key):
+        with self.lock:
+            waiters = self.waiters.get(event)
+            if not waiters:
+                return None
+            for i, (k, future) in enumerate(waiters):
+                if key is None or k is None or k == key:
+                    del waiters[i]
+                    return future
+        return None
+
+    def resolve(self, event, value, key=None):
+        """Hand `value` to the matching waiter. Returns False if none matched."""
+        future = self._pop(event, key)
+        if future is None:
+            return False
+        if not future.cancelled():
+            future.set_result(value)
+        return True
+
+    def fail(self, event, error, key=None):
+        future = self._pop(event, key)
+        if future is None:
+            return False
+        if not future.cancelled():
+            future.set_exception(error)
+        return True
+
+    def pending(self):
+        """Number of waiters per event."""
+        with self.lock:
+            return {event: len(waiters) for event, waiters in self.waiters.items() if waiters}
@@ -0,0 +1,206 @@
+"""Record websocket frames to a compact binary log and replay them into a client.
+
+A log starts with MAGIC and the wall clock and monotonic clock (ns) at which
+recording began; every frame follows as a 13 byte header (monotonic ns since
+the start, flags, payload length) and the payload. Text frames are stored
+UTF-8 encoded. A frame cut short by a crash ends the log.
+
+    global_value.ws_record = "frames.powslog"   # before the client connects
+    python -m pocketoptionapi.ws.recorder stats frames.powslog
+    python -m pocketoptionapi.ws.recorder replay frames.powslog --speed 0
+"""
+import argparse
+import asyncio
+import json
+import struct
+import threading
+import time
+from collections import Counter
+
+MAGIC = b'POWSLOG1'
+START = struct.Struct('<qq')
+FRAME = struct.Struct('<QBI')
+OUTBOUND = 1
+BINARY = 2
+
+
+class FrameRecorder(object):
+    """Write frames to a new log file (replacing `path`) through a large write buffer.
+
+    Recording a frame costs a header pack and a buffered write on the
+    websocket loop; the buffer reaches the disk when it fills, on `flush`
+    and on `close`. Once `max_bytes` have been written further frames are
+    counted in `dropped` instead, so a forgotten recorder cannot fill the
+    disk.
+    """
+
+    def __init__(self, path, max_bytes=None, buffering=1 << 20):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.file = open(path, 'wb', buffering=buffering)
+        self.origin = time.monotonic_ns()
+        self.frames = 0
+        self.dropped = 0
+        self.file.write(MAGIC + START.pack(time.time_ns(), self.origin))
+        self.size = len(MAGIC) + START.size
+
+    def record(self, message, outbound=False):
+        payload = message if isinstance(message, bytes) else message.encode('utf-8')
+        flags = (OUTBOUND if outbound else 0) | (BINARY if isinstance(message, bytes) else 0)
+        with self.lock:
+            if self.file.closed or (self.max_bytes is not None
+                                    and self.size + FRAME.size + len(payload) > self.max_bytes):
+                self.dropped += 1
+                return
+            self.file.write(FRAME.pack(time.monotonic_ns() - self.origin, flags, len(payload)))
+            self.file.write(payload)
+            self.size += FRAME.size + len(payload)
+            self.frames += 1
+
+    def wrap(self, ws):
+        """The connection `ws` with its sends recorded."""
+        return RecordingSocket(ws, self)
+
+    def flush(self):
+        with self.lock:
+            if not self.file.closed:
+                self.file.flush()
+
+    def close(self):
+        with self.lock:
+            if not self.file.closed:
+                self.file.close()
+
+
+class RecordingSocket(object):
+    """Websocket wrapper that records every frame sent through it."""
+
+    def __init__(self, ws, recorder):
+        self.ws = ws
+        self.recorder = recorder
+
+    async def send(self, message):
+        self.recorder.record(message, outbound=True)
+        await self.ws.send(message)
+
+    def __getattr__(self, name):
+        return getattr(self.ws, name)
+
+    def __aiter__(self):
+        return self.ws.__aiter__()
+
+
+def read_header(f):
+    """(wall ns, monotonic ns) at which the log at file `f` started."""
+    head = f.read(len(MAGIC) + START.size)
+    if len(head) < len(MAGIC) + START.size or not head.startswith(MAGIC):
+        raise ValueError("Not a websocket frame log")
+    return START.unpack_from(head, len(MAGIC))
+
+
+def read_frames(path):
+    """Yield (seconds since start, outbound, message) for every complete frame of a log."""
+    with open(path, 'rb') as f:
+        read_header(f)
+        while True:
+            header = f.read(FRAME.size)
+            if len(header) < FRAME.size:
+                return
+            offset, flags, length = FRAME.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length:
+                return
+            yield offset / 1e9, bool(flags & OUTBOUND), payload if flags & BINARY else payload.decode('utf-8')
+
+
+class ReplaySocket(object):
+    """Stands in for the connection while replaying; frames the client sends are only counted."""
+
+    def __init__(self):
+        self.sent = 0
+
+    async def send(self, message):
+        self.sent += 1
+
+    async def close(self):
+        pass
+
+
+async def replay(path, client, speed=1.0):
+    """Feed the inbound frames of a log into `client.on_message`.
+
+    Frames are paced by their recorded timestamps divided by `speed`; with
+    speed 0 they are fed back to back. `client.websocket` is replaced by a
+    ReplaySocket. Returns (frames replayed, seconds taken).
+    """
+    client.websocket = ReplaySocket()
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    first = None
+    frames = 0
+    for offset, outbound, message in read_frames(path):
+        if outbound:
+            continue
+        if first is None:
+            first = offset
+        if speed:
+            delay = started + (offset - first) / speed - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        await client.on_message(message)
+        frames += 1
+    return frames, loop.time() - started
+
+
+def event_name(message):
+    """Event of a Socket.IO text frame, the packet type of anything else."""
+    if isinstance(message, bytes):
+        return '<binary>'
+    if message.startswith('4') and '[' in message:
+        try:
+            return json.loads(message[message.index('['):])[0]
+        except (ValueError, IndexError):
+            pass
+    return message[:2]
+
+
+def stats(path):
+    """Print frame counts and bytes per direction and event."""
+    counts, sizes = Counter(), Counter()
+    first = last = None
+    for offset, outbound, message in read_frames(path):
+        key = ('out' if outbound else 'in', event_name(message))
+        counts[key] += 1
+        sizes[key] += len(message)
+        first = offset if first is None else first
+        last = offset
+    print(f"{'dir':<4} {'event':<24} {'frames':>9} {'bytes':>12}")
+    for key, count in counts.most_common():
+        print(f"{key[0]:<4} {str(key[1]):<24} {count:>9,} {sizes[key]:>12,}")
+    span = (last - first) if first is not None else 0
+    print(f"{sum(counts.values()):,} frames over {span:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or replay a websocket frame log")
+    parser.add_argument('command', choices=['stats', 'replay'])
+    parser.add_argument('log')
+    parser.add_argument('--speed', type=float, default=1.0, help='replay speed multiplier (0: as fast as possible)')
+    args = parser.parse_args()
+    if args.command == 'stats':
+        stats(args.log)
+        return
+
+    from pocketoptionapi.api import PocketOptionAPI
+    api = PocketOptionAPI()
+    frames, elapsed = asyncio.run(replay(args.log, api.websocket_client, args.speed))
+    print(f"{frames:,} inbound frames in {elapsed:.2f}s ({frames / elapsed if elapsed else 0:,.0f} frames/s)")
+    print(f"{'event':<24} {'count':>9} {'decode us':>10} {'handler us':>11} {'max us':>9}")
+    for event, t in sorted(api.websocket_client.dispatcher.timings().items(), key=lambda item: -item[1]['count']):
+        print(f"{event:<24} {t['count']:>9,} {t['decode_avg'] * 1e6:>10.1f} "
+              f"{t['handler_avg'] * 1e6:>11.1f} {t['handler_max'] * 1e6:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""Thread safe outbound message queue for the websocket client."""
+import asyncio
+import threading
+import time
+from collections import deque
+
+import pocketoptionapi.global_value as global_value
+
+
+class SendQueue(object):
+    """Outbound frames drained by a single writer task on the websocket loop.
+
+    Any thread can `put` a frame: it is appended to a deque and the writer is
+    woken with `call_soon_threadsafe`, so sending costs an append and a wakeup
+    instead of a new event loop. At most `maxsize` frames may be waiting; when
+    the queue is full `put` blocks up to `timeout` seconds (backpressure) and
+    then drops the frame. `put` must not block on a full queue from the
+    websocket loop itself, so loop-side callers should pass `timeout=0`.
+    Frames queued while disconnected are sent once the next writer starts,
+    except frames put with `expires` (orders): those are dropped once they
+    are older than that, when their send fails and when the connection they
+    were queued for goes down, so an order its caller gave up on is never
+    placed later.
+    """
+
+    def __init__(self, maxsize=1000, history=1000):
+        self.slots = threading.BoundedSemaphore(maxsize)
+        self.buffer = deque()
+        self.loop = None
+        self.event = None
+        self.lock = threading.Lock()
+        self.sent = 0
+        self.dropped = 0
+        self.expired = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.latencies = deque(maxlen=history)
+
+    def put(self, data, timeout=5, expires=None, on_drop=None):
+        """Queue a frame for sending. Returns False if it was dropped.
+
+        A frame with `expires` is only sent within that many seconds, and
+        never resent on another connection; `on_drop()` is called if it is
+        dropped unsent.
+        """
+        if not self.slots.acquire(timeout=timeout):
+            self.dropped += 1
+            global_value.logger("Send queue full, dropping message", "WARNING")
+            return False
+        now = time.perf_counter()
+        with self.lock:
+            self.buffer.append((now, data, now + expires if expires is not None else None, on_drop))
+        loop = self.loop
+        if loop is not None:
+            try:
+                loop.call_soon_threadsafe(self._wake)
+            except RuntimeError:
+                # Loop closed between the check and the call; the next writer sends it
+                pass
+        return True
+
+    def _wake(self):
+        if self.event is not None:
+            self.event.set()
+
+    async def run(self, ws):
+        """Writer task: send queued frames on `ws` until cancelled or closed."""
+        self.event = asyncio.Event()
+        self.loop = asyncio.get_running_loop()
+        try:
+            while True:
+                self.event.clear()
+                while self.buffer:
+                    with self.lock:
+                        entry = self.buffer.popleft()
+                    enqueued, data, deadline, on_drop = entry
+                    if deadline is not None and time.perf_counter() > deadline:
+                        self._expire(entry)
+                        continue
+                    try:
+                        await ws.send(data)
+                    except BaseException:
+                        if deadline is None:
+                            with self.lock:
+                                self.buffer.appendleft(entry)
+                        else:
+                            # It may have reached the server; never send it twice
+                            self._expire(entry)
+                        raise
+                    self.slots.release()
+                    self._record(time.perf_counter() - enqueued)
+                await self.event.wait()
+        finally:
+            self.loop = None
+            self.event = None
+            # Expiring frames queued for this connection are not replayed on the next one
+            with self.lock:
+                expiring = [entry for entry in self.buffer if entry[2] is not None]
+                if expiring:
+                    self.buffer = deque(entry for entry in self.buffer if entry[2] is None)
+            for entry in expiring:
+                self._expire(entry)
+
+    def _expire(self, entry):
+        self.slots.release()
+        self.expired += 1
+        global_value.logger("Dropping unsent frame: %s", "WARNING", entry[1])
+        if entry[3] is not None:
+            try:
+                entry[3]()
+            except Exception as e:
+                global_value.logger("Send queue drop callback failed: %s", "ERROR", e)
+
+    def _record(self, latency):
+        self.sent += 1
+        self.latency_total += latency
+        self.latency_max = max(self.latency_max, latency)
+        self.latencies.append(latency)
+
+    def stats(self):
+        """Queue depth and enqueue-to-send latency (seconds) of sent frames."""
+        recent = sorted(self.latencies)
+        return {
+            'queued': len(self.buffer),
+            'sent': self.sent,
+            'dropped': self.dropped,
+            'expired': self.expired,
+            'latency_avg': self.latency_total / self.sent if self.sent else 0.0,
+            'latency_max': self.latency_max,
+            'latency_p50': recent[len(recent) // 2] if recent else 0.0,
+            'latency_p99': recent[int(len(recent) * 0.99)] if recent else 0.0,
+        }
@@ -0,0 +1,109 @@
+"""Central tracking of open orders until the server settles them."""
+import heapq
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class SettlementTimeout(Exception):
+    """Raised on an order future when no close arrived before its deadline."""
+
+
+def deal_status(deal):
+    """Map a closed deal to (profit, "win" / "loose") like check_win does."""
+    profit = deal.get("profit")
+    if profit is None:
+        return None, "unknown"
+    return profit, "win" if profit > 0 else "loose"
+
+
+class SettlementTracker(object):
+    """Open orders indexed by id, resolved from the server's close pushes.
+
+    `WebsocketClient` feeds every `successcloseOrder` / `updateClosedDeals`
+    batch to `settle` once; each deal in it resolves the future of the order
+    with the same id. Deals that close before anyone watches them are kept in
+    a small recent cache. Deadlines are kept in a heap and expired by a
+    single timer thread, so open trades cost no thread or polling each. An
+    order keeps the first deadline it was watched with, so polling `watch`
+    for the same order does not grow the heap.
+    """
+
+    def __init__(self, keep_closed=1000):
+        self.lock = threading.Lock()
+        self.open = {}
+        self.closed = OrderedDict()
+        self.keep_closed = keep_closed
+        self.deadlines = []
+        self.deadline_of = {}
+        self.wakeup = threading.Condition(self.lock)
+        self.sweeper = None
+
+    def watch(self, order_id, timeout=None):
+        """Return a Future resolved with the closed deal dict for `order_id`."""
+        with self.lock:
+            if order_id in self.closed:
+                future = Future()
+                future.set_result(self.closed[order_id])
+                return future
+            future = self.open.get(order_id)
+            if future is None:
+                future = self.open[order_id] = Future()
+            if timeout is not None and order_id not in self.deadline_of:
+                deadline = self.deadline_of[order_id] = time.monotonic() + timeout
+                heapq.heappush(self.deadlines, (deadline, order_id))
+                self._start_sweeper()
+                self.wakeup.notify()
+            return future
+
+    def settle(self, deals):
+        """Resolve every watched order found in a batch of closed deals."""
+        resolved = []
+        with self.lock:
+            for deal in deals:
+                order_id = deal.get("id") if isinstance(deal, dict) else None
+                if order_id is None:
+                    continue
+                self.closed[order_id] = deal
+                self.deadline_of.pop(order_id, None)
+                future = self.open.pop(order_id, None)
+                if future is not None:
+                    resolved.append((future, deal))
+            while len(self.closed) > self.keep_closed:
+                self.closed.popitem(last=False)
+        for future, deal in resolved:
+            if not future.done():
+                future.set_result(deal)
+        return len(resolved)
+
+    def pending(self):
+        with self.lock:
+            return len(self.open)
+
+    def _start_sweeper(self):
+        if self.sweeper is None:
+            self.sweeper = threading.Thread(target=self._sweep, daemon=True)
+            self.sweeper.start()
+
+    def _sweep(self):
+        while True:
+            expired = []
+            with self.lock:
+                while not self.deadlines:
+                    self.wakeup.wait()
+                deadline, order_id = self.deadlines[0]
+                delay = deadline - time.monotonic()
+                if delay > 0:
+                    self.wakeup.wait(delay)
+                    continue
+                heapq.heappop(self.deadlines)
+                if self.deadline_of.get(order_id) != deadline:
+                    continue
+                del self.deadline_of[order_id]
+                future = self.open.pop(order_id, None)
+                if future is not None:
+                    expired.append((future, order_id))
+            for future, order_id in expired:
+                if not future.done():
+                    future.set_exception(SettlementTimeout("No close received for order %s" % str(order_id)))
@@ -0,0 +1,139 @@
+"""Multi-asset stream subscriptions for the websocket client."""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures import as_completed
+
+import pocketoptionapi.global_value as global_value
+from pocketoptionapi.candle_builder import CandleBuilder
+from pocketoptionapi.tick_store import TickStore
+
+
+def parse_history_new(his):
+    """Split an updateHistoryNew payload into (candles, ticks) dict lists."""
+    candles = [{'time': c[0], 'open': c[1], 'high': c[3], 'low': c[4], 'close': c[2]}
+               for c in his.get('candles') or []]
+    ticks = [{'time': h[0], 'price': h[1]} for h in his.get('history') or []]
+    return candles, ticks
+
+
+def store_pair_history(active, period, candles, ticks):
+    """Install a TickStore and CandleBuilder for `active` in global_value.pairs.
+
+    `ticks` may also contain loadHistoryPeriod candle rows; those are merged
+    into the candles instead of the tick history.
+    """
+    if active not in global_value.pairs:
+        return False
+    candles = list(candles) + [t for t in ticks if 'price' not in t and 'open' in t]
+    ticks = sorted((t for t in ticks if 'price' in t), key=lambda x: x["time"])
+
+    history = TickStore(global_value.tick_capacity, global_value.tick_retention)
+    history.extend([h['time'] for h in ticks], [h['price'] for h in ticks])
+    builder = CandleBuilder(period)
+    builder.seed(candles, history.times(), history.prices())
+    global_value.pairs[active]['history'] = history
+    global_value.pairs[active]['candles'] = builder
+    return True
+
+
+class RateBudget(object):
+    """Token bucket limiting how fast subscription requests are sent."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.stamp = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self):
+        """Block until a token is available."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+                self.stamp = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class SubscriptionManager(object):
+    """Keep a set of assets subscribed and their candle history loaded.
+
+    `subscribe` sends `changeSymbol` for every asset as fast as the rate
+    budget allows, without waiting for each reply, and then collects the
+    updateHistoryNew replies as they arrive. At most `max_assets` assets are
+    kept; the least recently subscribed are dropped first. After a reconnect
+    (successauth) every live asset is subscribed again in the background.
+    """
+
+    def __init__(self, api, period, max_assets=None, rate=5.0, burst=10, timeout=30):
+        self.api = api
+        self.period = period
+        self.max_assets = max_assets
+        self.budget = RateBudget(rate, burst)
+        self.timeout = timeout
+        self.assets = OrderedDict()
+        self.lock = threading.Lock()
+        api.websocket_client.auth_callbacks.append(self.on_reconnect)
+
+    def subscribe(self, actives):
+        """Subscribe and load history for `actives`. Returns {asset: loaded}."""
+        with self.lock:
+            for active in actives:
+                self.assets[active] = False
+                self.assets.move_to_end(active)
+            while self.max_assets is not None and len(self.assets) > self.max_assets:
+                self.assets.popitem(last=False)
+            actives = [a for a in actives if a in self.assets]
+
+        futures = {}
+        for active in actives:
+            self.budget.take()
+            future = self.api.pending.register("updateHistoryNew", active)
+            futures[future] = active
+            self.api.change_symbol(active, self.period)
+
+        results = dict.fromkeys(actives, False)
+        try:
+            for future in as_completed(futures, timeout=self.timeout):
+                active = futures[future]
+                candles, ticks = parse_history_new(future.result())
+                results[active] = store_pair_history(active, self.period, candles, ticks)
+        except FutureTimeout:
+            global_value.logger("Subscription timeout, %s of %s assets loaded", "WARNING",
+                                sum(results.values()), len(results))
+        finally:
+            for future in futures:
+                self.api.pending.discard("updateHistoryNew", future)
+
+        with self.lock:
+            for active, loaded in results.items():
+                if active in self.assets:
+                    self.assets[active] = loaded
+        return results
+
+    def close(self):
+        """Stop resubscribing after reconnects."""
+        if self.on_reconnect in self.api.websocket_client.auth_callbacks:
+            self.api.websocket_client.auth_callbacks.remove(self.on_reconnect)
+
+    def unsubscribe(self, active):
+        with self.lock:
+            self.assets.pop(active, None)
+
+    def live(self):
+        with self.lock:
+            return [a for a, loaded in self.assets.items() if loaded]
+
+    def on_reconnect(self):
+        with self.lock:
+            actives = list(self.assets)
+        if actives:
+            # The replies arrive on the websocket loop, so never wait on it
+            threading.Thread(target=self.subscribe, args=(actives,), daemon=True).start()
@@ -4,18 +4,74 @@ import sqlite3
 import threading
 import time
 from datetime import datetime
+from contextlib import contextmanager
 from typing import Dict, List, Optional, Any
 import queue
 
 class BotStateManager:
-    def __init__(self, db_path: str = "bot_state.db"):
+    """SQLite backed bot state shared between the bot and the dashboard.
+
+    Up to `pool_size` long-lived WAL mode connections are shared by all
+    threads through a queue, so readers never block the writer, no call pays
+    for opening the database and short-lived threads (one per dashboard
+    request) leave nothing behind. A call waits for a free connection when
+    all are in use. Writes are still serialized by `lock`; batches go
+    through a single `executemany` transaction.
+    """
+
+    def __init__(self, db_path: str = "bot_state.db", pool_size: int = 4):
         self.db_path = db_path
         self.lock = threading.Lock()
+        self.pool_size = pool_size
+        self.pool = queue.LifoQueue()
+        self.opened = 0
+        self.pool_lock = threading.Lock()
         self.init_database()
         
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+        
+    @contextmanager
+    def _connection(self):
+        """Borrow a pooled connection, opening one while fewer than pool_size exist"""
+        try:
+            conn = self.pool.get_nowait()
+        except queue.Empty:
+            with self.pool_lock:
+                grow = self.opened < self.pool_size
+                if grow:
+                    self.opened += 1
+            if grow:
+                try:
+                    conn = self._open()
+                except Exception:
+                    with self.pool_lock:
+                        self.opened -= 1
+                    raise
+            else:
+                conn = self.pool.get()
+        try:
+            yield conn
+        finally:
+            self.pool.put(conn)
+        
+    def close(self):
+        """Close the idle pooled connections (call once no thread is using the manager)"""
+        while True:
+            try:
+                conn = self.pool.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self.pool_lock:
+                self.opened -= 1
+        
     def init_database(self):
         """Initialize the database with required tables"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connection() as conn, self.lock, conn:
             conn.execute('''
                 CREATE TABLE IF NOT EXISTS bot_status (
                     id INTEGER PRIMARY KEY,
@@ -53,116 +109,141 @@ class BotStateManager:
                 )
             ''')
             
+            # Recent-first and per-symbol queries read these instead of sorting the table
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_trades_timestamp ON trades (timestamp)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_trades_symbol_timestamp ON trades (symbol, timestamp)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_signals_timestamp ON signals (timestamp)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_signals_symbol_timestamp ON signals (symbol, timestamp)')
+            
     def update_bot_status(self, status_data: Dict[str, Any]):
         """Update bot status in database"""
-        with self.lock:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute('''
-                    INSERT OR REPLACE INTO bot_status 
-                    (id, timestamp, status, balance, positions, last_signal, pnl, trades_today)
-                    VALUES (1, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    datetime.now().isoformat(),
-                    status_data.get('status', 'unknown'),
-                    status_data.get('balance', 0),
-                    json.dumps(status_data.get('positions', [])),
-                    status_data.get('last_signal', ''),
-                    status_data.get('pnl', 0),
-                    status_data.get('trades_today', 0)
-                ))
+        with self._connection() as conn, self.lock, conn:
+            conn.execute('''
+                INSERT OR REPLACE INTO bot_status 
+                (id, timestamp, status, balance, positions, last_signal, pnl, trades_today)
+                VALUES (1, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                datetime.now().isoformat(),
+                status_data.get('status', 'unknown'),
+                status_data.get('balance', 0),
+                json.dumps(status_data.get('positions', [])),
+                status_data.get('last_signal', ''),
+                status_data.get('pnl', 0),
+                status_data.get('trades_today', 0)
+            ))
                 
     def add_trade(self, trade_data: Dict[str, Any]):
         """Add a new trade to database"""
-        with self.lock:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute('''
-                    INSERT INTO trades (timestamp, symbol, side, size, price, pnl, status)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    datetime.now().isoformat(),
-                    trade_data.get('symbol'),
-                    trade_data.get('side'),
-                    trade_data.get('size'),
-                    trade_data.get('price'),
-                    trade_data.get('pnl', 0),
-                    trade_data.get('status', 'pending')
-                ))
+        self.add_trades([trade_data])
+        
+    def add_trades(self, trades: List[Dict[str, Any]]):
+        """Add a batch of trades in one transaction"""
+        now = datetime.now().isoformat()
+        rows = [(
+            trade_data.get('timestamp') or now,
+            trade_data.get('symbol'),
+            trade_data.get('side'),
+            trade_data.get('size'),
+            trade_data.get('price'),
+            trade_data.get('pnl', 0),
+            trade_data.get('status', 'pending')
+        ) for trade_data in trades]
+        with self._connection() as conn, self.lock, conn:
+            conn.executemany('''
+                INSERT INTO trades (timestamp, symbol, side, size, price, pnl, status)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
                 
     def add_signal(self, signal_data: Dict[str, Any]):
         """Add a new signal to database"""
-        with self.lock:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute('''
-                    INSERT INTO signals (timestamp, symbol, signal_type, price, confidence)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (
-                    datetime.now().isoformat(),
-                    signal_data.get('symbol'),
-                    signal_data.get('signal_type'),
-                    signal_data.get('price'),
-                    signal_data.get('confidence', 0)
-                ))
+        self.add_signals([signal_data])
+        
+    def add_signals(self, signals: List[Dict[str, Any]]):
+        """Add a batch of signals in one transaction"""
+        now = datetime.now().isoformat()
+        rows = [(
+            signal_data.get('timestamp') or now,
+            signal_data.get('symbol'),
+            signal_data.get('signal_type'),
+            signal_data.get('price'),
+            signal_data.get('confidence', 0)
+        ) for signal_data in signals]
+        with self._connection() as conn, self.lock, conn:
+            conn.executemany('''
+                INSERT INTO signals (timestamp, symbol, signal_type, price, confidence)
+                VALUES (?, ?, ?, ?, ?)
+            ''', rows)
                 
     def get_bot_status(self) -> Optional[Dict[str, Any]]:
         """Get current bot status"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute('SELECT * FROM bot_status WHERE id = 1')
-            row = cursor.fetchone()
-            if row:
-                return {
-                    'timestamp': row[1],
-                    'status': row[2],
-                    'balance': row[3],
-                    'positions': json.loads(row[4]) if row[4] else [],
-                    'last_signal': row[5],
-                    'pnl': row[6],
-                    'trades_today': row[7]
-                }
+        with self._connection() as conn:
+            row = conn.execute('SELECT * FROM bot_status WHERE id = 1').fetchone()
+        if row:
+            return {
+                'timestamp': row[1],
+                'status': row[2],
+                'balance': row[3],
+                'positions': json.loads(row[4]) if row[4] else [],
+                'last_signal': row[5],
+                'pnl': row[6],
+                'trades_today': row[7]
+            }
         return None
         
+    @staticmethod
+    def _trade_dict(row) -> Dict[str, Any]:
+        return {
+            'id': row[0],
+            'timestamp': row[1],
+            'symbol': row[2],
+            'side': row[3],
+            'size': row[4],
+            'price': row[5],
+            'pnl': row[6],
+            'status': row[7]
+        }
+        
+    @staticmethod
+    def _signal_dict(row) -> Dict[str, Any]:
+        return {
+            'id': row[0],
+            'timestamp': row[1],
+            'symbol': row[2],
+            'signal_type': row[3],
+            'price': row[4],
+            'confidence': row[5]
+        }
+        
     def get_recent_trades(self, limit: int = 50) -> List[Dict[str, Any]]:
         """Get recent trades"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute('''
+        with self._connection() as conn:
+            rows = conn.execute('''
                 SELECT * FROM trades 
                 ORDER BY timestamp DESC 
                 LIMIT ?
-            ''', (limit,))
-            
-            trades = []
-            for row in cursor.fetchall():
-                trades.append({
-                    'id': row[0],
-                    'timestamp': row[1],
-                    'symbol': row[2],
-                    'side': row[3],
-                    'size': row[4],
-                    'price': row[5],
-                    'pnl': row[6],
-                    'status': row[7]
-                })
-            return trades
+            ''', (limit,)).fetchall()
+        return [self._trade_dict(row) for row in rows]
+        
+    def get_symbol_trades(self, symbol: str, since: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Get the most recent trades of one symbol, optionally only those after `since`"""
+        with self._connection() as conn:
+            rows = conn.execute('''
+                SELECT * FROM trades 
+                WHERE symbol = ? AND timestamp >= ?
+                ORDER BY timestamp DESC 
+                LIMIT ?
+            ''', (symbol, since or '', limit)).fetchall()
+        return [self._trade_dict(row) for row in rows]
             
     def get_recent_signals(self, limit: int = 100) -> List[Dict[str, Any]]:
         """Get recent signals"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute('''
+        with self._connection() as conn:
+            rows = conn.execute('''
                 SELECT * FROM signals 
                 ORDER BY timestamp DESC 
                 LIMIT ?
-            ''', (limit,))
-            
-            signals = []
-            for row in cursor.fetchall():
-                signals.append({
-                    'id': row[0],
-                    'timestamp': row[1],
-                    'symbol': row[2],
-                    'signal_type': row[3],
-                    'price': row[4],
-                    'confidence': row[5]
-                })
-            return signals
+            ''', (limit,)).fetchall()
+        return [self._signal_dict(row) for row in rows]
 
 # bot_integration.py - Integration layer for your fractal_fcb_bot.py
 class BotIntegration:
@@ -0,0 +1,546 @@
+# strategies.py - Signal functions shared by the bots and the backtester
+import numpy as np
+import pandas as pd
+import talib.abstract as ta
+from numpy.lib.stride_tricks import sliding_window_view
+
+import pocketoptionapi.global_value as global_value
+from indicator_cache import INDICATORS, IndicatorCache
+from indicators import FractalTracker, fractal_flags, supertrend_arrays
+
+try:
+    import freqtrade.vendor.qtpylib.indicators as qtpylib
+except ImportError:
+    qtpylib = None  # Only the claude_strat strategies need it
+
+# Strategy settings of the enhanced FCB bots (see FCB_CONFIG there)
+FCB_DEFAULTS = {
+    'fractal_period': 5,          # Period for fractal calculation
+    'chaos_period': 13,           # Period for chaos oscillator
+    'band_multiplier': 1.5,       # Multiplier for band width
+    'confirmation_bars': 2,       # Bars for signal confirmation
+    'volatility_filter': True,    # Enable volatility filtering
+    'trend_filter': True,         # Enable trend filtering
+    'min_volatility': 0.0001,     # Minimum volatility threshold
+}
+
+
+def _window_mean(values, width):
+    """Mean of every `width` window, summed left to right like the cached series do."""
+    windows = sliding_window_view(values, width)
+    total = windows[:, 0].copy()
+    for k in range(1, width):
+        total += windows[:, k]
+    return total / width
+
+
+def _series(name, params, highs, lows, closes):
+    """Run one cached indicator's recurrence over whole columns."""
+    init, step, _ = INDICATORS[name]
+    state = init(*params)
+    values = np.empty(len(closes))
+    for i, bar in enumerate(zip(highs.tolist(), lows.tolist(), closes.tolist())):
+        state, values[i] = step(state, params, *bar)
+    return values
+
+
+def _window_series(name, params, values, highs, lows, closes, first_row, rows):
+    """Overwrite `values` at `rows` with the indicator re-seeded at each row's frame head."""
+    run = INDICATORS[name][2]
+    for i in rows.tolist():
+        head = first_row[i]
+        values[i] = run(params, highs[head:i + 1], lows[head:i + 1], closes[head:i + 1])[-1]
+    return values
+
+
+def _chaos_series(highs, lows, fast=5, slow=34, signal=5):
+    """AO - AC for every bar, as the 'ao' and 'ac' cached series compute them."""
+    ao = np.full(len(highs), np.nan)
+    ac = np.full(len(highs), np.nan)
+    if len(highs) >= slow:
+        medians = (highs + lows) / 2
+        ao[slow - 1:] = _window_mean(medians[slow - fast:], fast) - _window_mean(medians, slow)
+    if len(highs) >= slow + signal - 1:
+        ac[slow + signal - 2:] = ao[slow + signal - 2:] - _window_mean(ao[slow - 1:], signal)
+    return ao - ac
+
+
+def _last_confirmed(flags, period):
+    """Index of the latest flagged fractal whose right hand window is complete at each bar, or -1."""
+    latest = np.maximum.accumulate(np.where(flags, np.arange(len(flags)), -1))
+    confirmed = np.full(len(flags), -1)
+    confirmed[period:] = latest[:len(flags) - period]
+    return confirmed
+
+
+def _memo(cache, key, compute):
+    """compute() once per key when a cache dict is given."""
+    if cache is None:
+        return compute()
+    if key not in cache:
+        cache[key] = compute()
+    return cache[key]
+
+
+def fcb_arrays(df, fractal_period, window=None, start=0, cache=None):
+    """The config independent arrays behind FCBStrategy.signals for one fractal period.
+
+    Returns a dict of per row arrays: close, upper and lower fractal levels,
+    live (rows the strategy evaluates), chaos, volatility, adx and
+    volume_confirmation. `cache` is a dict kept for one frame, window and
+    start; the columns, each period's fractal levels and the indicator series
+    of each seed row are then computed once and shared between calls.
+    """
+    def columns():
+        return {name: df[name].to_numpy(dtype=np.float64) for name in ('open', 'high', 'low', 'close')}
+
+    cols = _memo(cache, ('columns',), columns)
+    highs, lows, closes = cols['high'], cols['low'], cols['close']
+    n = len(closes)
+    rows = np.arange(n)
+    first_row = np.zeros(n, dtype=np.int64) if window is None else np.maximum(0, rows + 1 - window)
+
+    def levels():
+        # Latest fractal confirmed by each bar, dropped once its left side leaves the frame
+        is_high, is_low = fractal_flags(highs, lows, fractal_period)
+        upper_at = _last_confirmed(is_high, fractal_period)
+        lower_at = _last_confirmed(is_low, fractal_period)
+        upper = np.where(upper_at >= first_row + fractal_period, highs[upper_at], np.nan)
+        lower = np.where(lower_at >= first_row + fractal_period, lows[lower_at], np.nan)
+        live = (rows >= start) & (rows - first_row + 1 >= 50) & ~np.isnan(upper) & ~np.isnan(lower)
+        return upper, lower, live
+
+    upper, lower, live = _memo(cache, ('fractals', fractal_period), levels)
+    # The cached indicators are seeded from the frame of the first call that reaches them;
+    # ATR and ADX are re-seeded at the frame head on every call after the window slid
+    seed = int(first_row[np.argmax(live)]) if live.any() else n
+
+    def indicators():
+        chaos = np.full(n, np.nan)
+        atr = np.full(n, np.nan)
+        adx = np.full(n, np.nan)
+        chaos[seed:] = _chaos_series(highs[seed:], lows[seed:])
+        atr[seed:] = _series('atr', (14,), highs[seed:], lows[seed:], closes[seed:])
+        adx[seed:] = _series('adx', (20,), highs[seed:], lows[seed:], closes[seed:])
+        slid = np.flatnonzero(live & (first_row != seed))
+        _window_series('atr', (14,), atr, highs, lows, closes, first_row, slid)
+        _window_series('adx', (20,), adx, highs, lows, closes, first_row, slid)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            volatility = np.where(closes > 0, atr / closes, 0)
+        return chaos, volatility, adx
+
+    chaos, volatility, adx = _memo(cache, ('indicators', seed), indicators)
+
+    def volume_confirmation():
+        body = np.abs(closes - cols['open'])
+        confirmed = np.zeros(n, dtype=bool)
+        confirmed[1:] = body[1:] > body[:-1]
+        return confirmed
+
+    return {'close': closes, 'upper': upper, 'lower': lower, 'live': live, 'chaos': chaos,
+            'volatility': volatility, 'adx': adx,
+            'volume_confirmation': _memo(cache, ('volume_confirmation',), volume_confirmation)}
+
+
+class FCBStrategy:
+    """Enhanced Fractal Chaos Bands strategy: `strategy(df, pair)` -> (signal, strategy_data).
+
+    Fractal levels and the AO/AC/ATR/ADX series are kept per pair, so the
+    instance is called with the pair's growing (or sliding) candle frame each
+    cycle; see IndicatorCache for what a new bar costs. Pickling keeps only
+    the config; a copy in a worker process starts with empty caches, which
+    StrategyExecutor's process mode then keeps for the life of the worker.
+    """
+
+    def __init__(self, config=None):
+        self.config = dict(FCB_DEFAULTS, **(config or {}))
+        self.fractal_trackers = {}
+        self.indicator_cache = IndicatorCache()
+
+    def __getstate__(self):
+        return {'config': self.config}
+
+    def __setstate__(self, state):
+        self.__init__(state['config'])
+
+    def signals(self, df, window=None, start=0, cache=None):
+        """Full-series mode: the signal of every row of `df` in one vectorized pass.
+
+        Returns an int8 array (1 call, -1 put, 0 none) where row i holds what
+        the per-bar path returns for `df.iloc[max(0, i + 1 - window):i + 1]`
+        (`df.iloc[:i + 1]` without a window) when a fresh instance is called
+        once per row from `start` on. Rows before `start` are 0. `cache` is
+        handed to fcb_arrays to share its arrays between configs.
+        """
+        config = self.config
+        arrays = fcb_arrays(df, config['fractal_period'], window, start, cache)
+        closes, upper, lower = arrays['close'], arrays['upper'], arrays['lower']
+        n = len(closes)
+        out = np.zeros(n, dtype=np.int8)
+        if not arrays['live'].any():
+            return out
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            volatility = arrays['volatility']
+            band_width = (upper - lower) * config['band_multiplier']
+            upper_band = upper + (band_width * volatility * 10)
+            lower_band = lower - (band_width * volatility * 10)
+
+            volatility_ok = volatility >= config['min_volatility'] if config['volatility_filter'] else True
+            trend_ok = arrays['adx'] >= 25 if config['trend_filter'] else True
+            common = arrays['live'] & volatility_ok & trend_ok & arrays['volume_confirmation']
+            call = common & (closes > upper_band) & (arrays['chaos'] > 0)
+            put = common & ~call & (closes < lower_band) & (arrays['chaos'] < 0)
+
+            # Sustained breakout: the last confirmation_bars closes beyond the fractal level
+            for k in range(config['confirmation_bars']):
+                past = np.full(n, np.nan)
+                past[k:] = closes[:n - k]
+                call &= past > upper
+                put &= past < lower
+
+        out[call] = 1
+        out[put] = -1
+        return out
+
+    def fractal_tracker(self, pair):
+        """Get the incremental fractal tracker for a pair"""
+        tracker = self.fractal_trackers.get(pair)
+        if tracker is None or tracker.period != self.config['fractal_period']:
+            tracker = FractalTracker(self.config['fractal_period'])
+            self.fractal_trackers[pair] = tracker
+        return tracker
+
+    def chaos_oscillator(self, df, period=13, pair=None):
+        """Calculate Chaos Oscillator (AO - AC)"""
+        try:
+            if pair is not None:
+                # Cached per pair, advanced one closed bar at a time
+                return self.indicator_cache.get(pair, 'ao', df) - self.indicator_cache.get(pair, 'ac', df)
+
+            # Awesome Oscillator
+            ao = ta.AO(df)
+
+            # Accelerator Oscillator (AC)
+            ac = ao - ta.SMA(ao, timeperiod=5)
+
+            # Chaos Oscillator
+            chaos_osc = ao.iloc[-1] - ac.iloc[-1] if len(ao) > 0 and len(ac) > 0 else 0
+
+            return chaos_osc
+        except:
+            return 0
+
+    def volatility(self, df, period=14, pair=None):
+        """Calculate normalized volatility using ATR"""
+        try:
+            if pair is not None:
+                atr = self.indicator_cache.get(pair, 'atr', df, period)
+            else:
+                atr = ta.ATR(df, timeperiod=period).iloc[-1]
+            current_price = df['close'].iloc[-1]
+            volatility = atr / current_price if current_price > 0 else 0
+            return volatility
+        except:
+            return 0
+
+    def trend_strength(self, df, period=20, pair=None):
+        """Calculate trend strength using ADX"""
+        try:
+            if pair is not None:
+                return self.indicator_cache.get(pair, 'adx', df, period)
+
+            adx = ta.ADX(df, timeperiod=period)
+            return adx.iloc[-1] if len(adx) > 0 else 0
+        except:
+            return 0
+
+    def __call__(self, df, pair):
+        """Enhanced Fractal Chaos Bands strategy with multiple confirmations"""
+        config = self.config
+        if len(df) < 50:  # Need sufficient data
+            return None, {}
+
+        try:
+            # Calculate fractal levels (only newly closed bars are scanned)
+            fractal_upper, fractal_lower = self.fractal_tracker(pair).sync(df)
+
+            if np.isnan(fractal_upper) or np.isnan(fractal_lower):
+                return None, {}
+
+            # Calculate Chaos Oscillator
+            chaos_osc = self.chaos_oscillator(df, config['chaos_period'], pair)
+
+            # Calculate volatility
+            volatility = self.volatility(df, pair=pair)
+
+            # Calculate trend strength
+            trend_strength = self.trend_strength(df, pair=pair)
+
+            # Current price data
+            current = df.iloc[-1]
+            previous = df.iloc[-2] if len(df) > 1 else current
+
+            # Create dynamic bands based on volatility
+            band_width = (fractal_upper - fractal_lower) * config['band_multiplier']
+            upper_band = fractal_upper + (band_width * volatility * 10)
+            lower_band = fractal_lower - (band_width * volatility * 10)
+
+            # Strategy data for logging
+            strategy_data = {
+                'fractal_upper': round(fractal_upper, 5),
+                'fractal_lower': round(fractal_lower, 5),
+                'chaos_osc': round(chaos_osc, 5),
+                'volatility': round(volatility, 6),
+                'trend_strength': round(trend_strength, 2),
+                'upper_band': round(upper_band, 5),
+                'lower_band': round(lower_band, 5)
+            }
+
+            # Signal generation with multiple confirmations
+            signal = None
+
+            # Primary condition: Price breakout
+            price_above_upper = current['close'] > upper_band
+            price_below_lower = current['close'] < lower_band
+
+            # Confirmation filters
+            volatility_ok = volatility >= config['min_volatility'] if config['volatility_filter'] else True
+            trend_ok = trend_strength >= 25 if config['trend_filter'] else True
+
+            # Momentum confirmation using Chaos Oscillator
+            momentum_bullish = chaos_osc > 0
+            momentum_bearish = chaos_osc < 0
+
+            # Volume-like confirmation using price action
+            volume_confirmation = abs(current['close'] - current['open']) > abs(previous['close'] - previous['open'])
+
+            # Signal logic with confirmations
+            if (price_above_upper and momentum_bullish and volatility_ok and
+                trend_ok and volume_confirmation):
+                signal = "call"
+            elif (price_below_lower and momentum_bearish and volatility_ok and
+                  trend_ok and volume_confirmation):
+                signal = "put"
+
+            # Additional confirmation: Check for false breakouts
+            if signal:
+                # Look for sustained breakout over confirmation bars
+                confirmation_count = 0
+                for i in range(1, min(config['confirmation_bars'] + 1, len(df))):
+                    past_candle = df.iloc[-i]
+                    if signal == "call" and past_candle['close'] > fractal_upper:
+                        confirmation_count += 1
+                    elif signal == "put" and past_candle['close'] < fractal_lower:
+                        confirmation_count += 1
+
+                if confirmation_count < config['confirmation_bars']:
+                    signal = None  # Not enough confirmation
+
+            return signal, strategy_data
+
+        except Exception as e:
+            global_value.logger(f"Error in enhanced FCB strategy for {pair}: {e}", "ERROR")
+            return None, {}
+
+
+def accelerator_oscillator(dataframe, fastPeriod=5, slowPeriod=34, smoothPeriod=5):
+    ao = ta.SMA(dataframe["hl2"], timeperiod=fastPeriod) - ta.SMA(dataframe["hl2"], timeperiod=slowPeriod)
+    ac = ta.SMA(ao, timeperiod=smoothPeriod)
+    return ac
+
+def DeMarker(dataframe, Period=14):
+    dataframe['dem_high'] = dataframe['high'] - dataframe['high'].shift(1)
+    dataframe['dem_low'] = dataframe['low'].shift(1) - dataframe['low']
+    dataframe.loc[(dataframe['dem_high'] < 0), 'dem_high'] = 0
+    dataframe.loc[(dataframe['dem_low'] < 0), 'dem_low'] = 0
+
+    dem = ta.SMA(dataframe['dem_high'], Period) / (ta.SMA(dataframe['dem_high'], Period) + ta.SMA(dataframe['dem_low'], Period))
+    return dem
+
+def vortex_indicator(dataframe, Period=14):
+    vm_plus = abs(dataframe['high'] - dataframe['low'].shift(1))
+    vm_minus = abs(dataframe['low'] - dataframe['high'].shift(1))
+
+    tr1 = dataframe['high'] - dataframe['low']
+    tr2 = abs(dataframe['high'] - dataframe['close'].shift(1))
+    tr3 = abs(dataframe['low'] - dataframe['close'].shift(1))
+    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
+
+    sum_vm_plus = vm_plus.rolling(window=Period).sum()
+    sum_vm_minus = vm_minus.rolling(window=Period).sum()
+    sum_tr = tr.rolling(window=Period).sum()
+
+    vi_plus = sum_vm_plus / sum_tr
+    vi_minus = sum_vm_minus / sum_tr
+
+    return vi_plus, vi_minus
+
+def supertrend(df, multiplier, period):
+    df['TR'] = ta.TRANGE(df)
+    df['ATR'] = ta.SMA(df['TR'], period)
+
+    st = 'ST'
+    stx = 'STX'
+
+    # Compute final bands and the Supertrend value on contiguous arrays
+    _, _, df[st] = supertrend_arrays(df['high'].values, df['low'].values, df['close'].values,
+                                     df['ATR'].values, multiplier, period)
+
+    # Mark the trend direction up/down
+    df[stx] = np.where((df[st] > 0.00), np.where((df['close'] < df[st]), 'down',  'up'), 'nan')
+
+    df.fillna(0, inplace=True)
+
+    return df
+
+
+def _heikinashi(df, cache=None):
+    heikinashi = _memo(cache, ('heikinashi',), lambda: qtpylib.heikinashi(df))
+    df['open'] = heikinashi['open']
+    df['close'] = heikinashi['close']
+    df['high'] = heikinashi['high']
+    df['low'] = heikinashi['low']
+
+
+def strategy_9(df, ema_fast=16, ema_slow=165, st_multiplier=1.3, st_period=13, cache=None):
+    # Strategy 9, period: 30
+    _heikinashi(df, cache)
+    trend = _memo(cache, ('supertrend', st_multiplier, st_period),
+                  lambda: supertrend(df[['open', 'high', 'low', 'close']].copy(), st_multiplier, st_period))
+    df['ST'], df['STX'] = trend['ST'], trend['STX']
+    df['ma1'] = _memo(cache, ('ema', ema_fast), lambda: ta.EMA(df["close"], timeperiod=ema_fast))
+    df['ma2'] = _memo(cache, ('ema', ema_slow), lambda: ta.EMA(df["close"], timeperiod=ema_slow))
+    df['buy'], df['cross'] = 0, 0
+    df.loc[(qtpylib.crossed_above(df['ST'], df['ma1'])), 'cross'] = 1
+    df.loc[(qtpylib.crossed_below(df['ST'], df['ma1'])), 'cross'] = -1
+    df.loc[(
+            (df['STX'] == "up") &
+            (df['ma1'] > df['ma2']) &
+            (df['cross'] == 1)
+        ), 'buy'] = 1
+    df.loc[(
+            (df['STX'] == "down") &
+            (df['ma1'] < df['ma2']) &
+            (df['cross'] == -1)
+        ), 'buy'] = -1
+    return df
+
+def strategy_8(df, ma_fast=7, ma_mid=9, ma_slow=14, cache=None):
+    # Strategy 8, period: 15
+    df['ma1'] = _memo(cache, ('sma', ma_fast), lambda: ta.SMA(df["close"], timeperiod=ma_fast))
+    df['ma2'] = _memo(cache, ('sma', ma_mid), lambda: ta.SMA(df["close"], timeperiod=ma_mid))
+    df['ma3'] = _memo(cache, ('sma', ma_slow), lambda: ta.SMA(df["close"], timeperiod=ma_slow))
+    df['buy'], df['ma13c'], df['ma23c'] = 0, 0, 0
+    df.loc[(qtpylib.crossed_above(df['ma1'], df['ma3'])), 'ma13c'] = 1
+    df.loc[(qtpylib.crossed_below(df['ma1'], df['ma3'])), 'ma13c'] = -1
+    df.loc[(qtpylib.crossed_above(df['ma2'], df['ma3'])), 'ma23c'] = 1
+    df.loc[(qtpylib.crossed_below(df['ma2'], df['ma3'])), 'ma23c'] = -1
+    df.loc[(
+            (df['ma23c'] == 1) &
+            (
+                (df['ma13c'] == 1) |
+                (df['ma13c'].shift(1) == 1)
+            )
+        ), 'buy'] = 1
+    df.loc[(
+            (df['ma23c'] == -1) &
+            (
+                (df['ma13c'] == -1) |
+                (df['ma13c'].shift(1) == -1)
+            )
+        ), 'buy'] = -1
+    return df
+
+def strategy_5(df, bb_window=6, bb_stds=1.3, macd_fast=6, macd_slow=19, macd_signal=6, cache=None):
+    # Strategy 5, period: 120
+    _heikinashi(df, cache)
+    bollinger = _memo(cache, ('bollinger', bb_window, bb_stds),
+                      lambda: qtpylib.bollinger_bands(qtpylib.typical_price(df), window=bb_window, stds=bb_stds))
+    df['bb_low'] = bollinger['lower']
+    df['bb_mid'] = bollinger['mid']
+    df['bb_up'] = bollinger['upper']
+    df['macd'], df['macdsignal'], df['macdhist'] = _memo(
+        cache, ('macd', macd_fast, macd_slow, macd_signal),
+        lambda: ta.MACD(df['close'], macd_fast, macd_slow, macd_signal))
+    df['macd_cross'], df['hist_cross'], df['buy'] = 0, 0, 0
+    df.loc[(
+            (df['macd'].shift(1) < df['macdsignal'].shift(1)) &
+            (df['macd'] > df['macdsignal'])
+        ), 'macd_cross'] = 1
+    df.loc[(
+            (df['macd'].shift(1) > df['macdsignal'].shift(1)) &
+            (df['macd'] < df['macdsignal'])
+        ), 'macd_cross'] = -1
+    df.loc[(
+            (df['macdhist'].shift(1) < 0) &
+            (df['macdhist'] > 0)
+        ), 'hist_cross'] = 1
+    df.loc[(
+            (df['macdhist'].shift(1) > 0) &
+            (df['macdhist'] < 0)
+        ), 'hist_cross'] = -1
+    df.loc[(
+            (df['close'] > df['bb_up']) &
+            (
+                (df['macd_cross'] == 1) |
+                (df['macd_cross'].shift(1) == 1) |
+                (df['macd_cross'].shift(2) == 1)
+            ) &
+            (
+                (df['hist_cross'] == 1) |
+                (df['hist_cross'].shift(1) == 1) |
+                (df['hist_cross'].shift(2) == 1)
+            )
+        ), 'buy'] = 1
+    df.loc[(
+            (df['close'] < df['bb_low']) &
+            (
+                (df['macd_cross'] == -1) |
+                (df['macd_cross'].shift(1) == -1) |
+                (df['macd_cross'].shift(2) == -1)
+            ) &
+            (
+                (df['hist_cross'] == -1) |
+                (df['hist_cross'].shift(1) == -1) |
+                (df['hist_cross'].shift(2) == -1)
+            )
+        ), 'buy'] = -1
+    return df
+
+# Add more strategies as needed...
+CLAUDE_STRATEGIES = {9: strategy_9, 8: strategy_8, 5: strategy_5}
+
+# Tunable periods of the numbered strategies, as claude_strat runs them
+CLAUDE_DEFAULTS = {
+    9: {'ema_fast': 16, 'ema_slow': 165, 'st_multiplier': 1.3, 'st_period': 13},
+    8: {'ma_fast': 7, 'ma_mid': 9, 'ma_slow': 14},
+    5: {'bb_window': 6, 'bb_stds': 1.3, 'macd_fast': 6, 'macd_slow': 19, 'macd_signal': 6},
+}
+
+
+def claude_signal(df, strategy_num):
+    """Signal of the numbered claude_strat strategy on the last bar of `df`: 'call', 'put' or None."""
+    if qtpylib is None:
+        raise ImportError("claude_strat strategies need freqtrade's qtpylib")
+    df = CLAUDE_STRATEGIES[strategy_num](df.reset_index(drop=True))
+    buy = df['buy'].iat[-1]
+    if buy != 0:
+        return "call" if buy == 1 else "put"
+    return None
+
+
+def claude_signals(df, strategy_num, params=None, cache=None):
+    """Full-series mode of claude_signal: int8 array (1 call, -1 put, 0 none) for every row.
+
+    The numbered strategies only use causal indicators, so row i equals
+    claude_signal on `df.iloc[:i + 1]`. On a sliding frame the live path
+    restarts its EMAs and Heikin Ashi at the head of every frame, which this
+    pass does not reproduce. `params` overrides the strategy's periods (see
+    CLAUDE_DEFAULTS); a `cache` dict kept for one frame and strategy shares
+    the indicator columns between parameter sets.
+    """
+    if qtpylib is None:
+        raise ImportError("claude_strat strategies need freqtrade's qtpylib")
+    buy = CLAUDE_STRATEGIES[strategy_num](df.reset_index(drop=True), cache=cache, **(params or {}))['buy']
+    return np.sign(buy.to_numpy(dtype=np.float64)).astype(np.int8)
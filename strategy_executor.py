@@ -0,0 +1,157 @@
+# strategy_executor.py - Fan per-pair strategy evaluation out over a worker pool
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ('time', 'open', 'high', 'low', 'close')
+
+_worker_strategy = None  # The strategy instance of a worker process, kept across cycles
+
+
+def _timed(strategy, df, pair):
+    start = time.perf_counter()
+    result = strategy(df, pair)
+    return result, time.perf_counter() - start
+
+
+def _init_worker(strategy):
+    global _worker_strategy
+    _worker_strategy = strategy
+
+
+def _evaluate_shared(shm_name, offset, rows, pair):
+    """Worker side: rebuild the pair's frame from shared memory and evaluate it."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        block = np.ndarray((len(COLUMNS), rows), dtype=np.float64, buffer=shm.buf,
+                           offset=offset * 8 * len(COLUMNS))
+        df = pd.DataFrame({name: block[i].copy() for i, name in enumerate(COLUMNS)})
+        del block
+    finally:
+        shm.close()
+    df['time'] = pd.to_datetime(df['time'], unit='s')
+    return _timed(_worker_strategy, df, pair)
+
+
+def _unlink_when_done(shm, futures):
+    """Unlink `shm` once none of `futures` can still attach to it."""
+    pending = [future for future in futures if not future.done()]
+    if not pending:
+        shm.unlink()
+        return
+    lock = threading.Lock()
+    remaining = [len(pending)]
+
+    def finished(_):
+        with lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last:
+            shm.unlink()
+
+    for future in pending:
+        future.add_done_callback(finished)
+
+
+class StrategyExecutor:
+    """Evaluate `strategy(df, pair)` for many pairs in parallel before a deadline.
+
+    In 'thread' mode frames are handed to a thread pool as they are, which
+    suits GIL releasing TA-Lib/NumPy heavy strategies. In 'process' mode the
+    OHLC columns of all pairs are packed into one shared memory block per
+    cycle and workers rebuild their frames from it; the strategy must then be
+    picklable and importable without side effects. Each worker unpickles it
+    once at start up and keeps that instance, so per-pair caches of a
+    strategy object (FCBStrategy) persist in the workers across cycles; a
+    pair evaluated by another worker than last time is rebuilt from its
+    frame. Results that are not back by the deadline are reported as
+    missed; a missed evaluation that had already started cannot be stopped,
+    so its pair is skipped (reported as busy) until it finishes, and the
+    cycle's shared memory block is only unlinked once every worker that may
+    read it is done.
+    """
+
+    def __init__(self, strategy, mode='thread', workers=None):
+        if mode not in ('thread', 'process'):
+            raise ValueError(f"Unknown executor mode: {mode}")
+        self.strategy = strategy
+        self.mode = mode
+        if mode == 'thread':
+            self.pool = ThreadPoolExecutor(max_workers=workers)
+        else:
+            self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                            initargs=(strategy,))
+        self.running = {}  # pair -> future of an evaluation still running past its deadline
+
+    def evaluate(self, frames, deadline):
+        """Evaluate {pair: df} and return (results, report).
+
+        `deadline` is an epoch timestamp. `results` maps each pair that
+        finished in time to its strategy result; `report` holds per-pair
+        latency (seconds spent inside the strategy), the missed pairs, the
+        busy pairs (skipped while an earlier evaluation is still running) and
+        the wall time of the whole fan out.
+        """
+        start = time.perf_counter()
+        self.running = {pair: f for pair, f in self.running.items() if not f.done()}
+        busy = sorted(pair for pair in frames if pair in self.running)
+        frames = {pair: df for pair, df in frames.items() if pair not in self.running}
+        shm = None
+        if self.mode == 'process':
+            shm, futures = self._submit_shared(frames)
+        else:
+            futures = {self.pool.submit(_timed, self.strategy, df, pair): pair
+                       for pair, df in frames.items()}
+
+        try:
+            done, not_done = wait(futures, timeout=max(0.0, deadline - time.time()))
+            for future in not_done:
+                if not future.cancel():
+                    self.running[futures[future]] = future
+        finally:
+            if shm is not None:
+                shm.close()
+                _unlink_when_done(shm, futures)
+
+        results, latency, errors = {}, {}, {}
+        for future in done:
+            pair = futures[future]
+            try:
+                results[pair], latency[pair] = future.result()
+            except Exception as e:
+                errors[pair] = str(e)
+
+        report = {
+            'latency': latency,
+            'missed': sorted(futures[f] for f in not_done),
+            'busy': busy,
+            'errors': errors,
+            'elapsed': time.perf_counter() - start,
+        }
+        return results, report
+
+    def _submit_shared(self, frames):
+        rows = {pair: len(df) for pair, df in frames.items()}
+        total = max(1, sum(rows.values()))
+        shm = shared_memory.SharedMemory(create=True, size=total * 8 * len(COLUMNS))
+
+        futures = {}
+        offset = 0
+        for pair, df in frames.items():
+            n = rows[pair]
+            block = np.ndarray((len(COLUMNS), n), dtype=np.float64, buffer=shm.buf,
+                               offset=offset * 8 * len(COLUMNS))
+            block[0] = df['time'].values.astype('datetime64[s]').astype(np.int64)
+            for i, name in enumerate(COLUMNS[1:], start=1):
+                block[i] = df[name].values
+            del block
+            futures[self.pool.submit(_evaluate_shared, shm.name, offset, n, pair)] = pair
+            offset += n
+        return shm, futures
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,208 @@
+# sweep.py - Grid search over strategy parameters on stored candle history
+import argparse
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from backtest import STRATEGIES, add_job_arguments, build_jobs, load_job, make_strategy, trade_bars
+from strategies import CLAUDE_DEFAULTS, FCB_DEFAULTS, FCBStrategy, claude_signals
+
+# Searched when no --param is given: around the values the bots ship with
+DEFAULT_GRIDS = {
+    'fcb': {
+        'fractal_period': [3, 5, 7],
+        'band_multiplier': [1.0, 1.25, 1.5, 1.75, 2.0],
+        'confirmation_bars': [1, 2, 3],
+        'min_volatility': [0.00005, 0.0001, 0.0002],
+        'volatility_filter': [True, False],
+        'trend_filter': [True, False],
+    },
+    'claude9': {
+        'ema_fast': [8, 12, 16, 20, 24],
+        'ema_slow': [100, 135, 165, 200],
+        'st_multiplier': [1.0, 1.3, 1.6, 2.0],
+        'st_period': [7, 10, 13, 16],
+    },
+    'claude8': {
+        'ma_fast': [5, 7, 9],
+        'ma_mid': [9, 11, 13],
+        'ma_slow': [14, 20, 30],
+    },
+    'claude5': {
+        'bb_window': [6, 10, 20],
+        'bb_stds': [1.3, 2.0],
+        'macd_fast': [6, 12],
+        'macd_slow': [19, 26],
+        'macd_signal': [6, 9],
+    },
+}
+
+
+def parse_value(text):
+    if text.lower() in ('true', 'false'):
+        return text.lower() == 'true'
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def parse_param(spec):
+    """'name=v1,v2,...' or 'name=lo:hi:step' (hi included) -> (name, [values])."""
+    name, _, values = spec.partition('=')
+    if not name or not values:
+        raise ValueError(f"Expected name=values, got {spec!r}")
+    if values.count(':') == 2:
+        lo, hi, step = (parse_value(v) for v in values.split(':'))
+        count = int(np.floor((hi - lo) / step + 1e-9)) + 1
+        grid = [lo + k * step for k in range(count)]
+        if not all(isinstance(v, int) for v in (lo, hi, step)):
+            grid = [round(v, 10) for v in grid]
+        return name, grid
+    return name, [parse_value(v) for v in values.split(',')]
+
+
+def strategy_defaults(name):
+    return FCB_DEFAULTS if name == 'fcb' else CLAUDE_DEFAULTS[int(name[6:])]
+
+
+def combinations(name, grid):
+    """Every parameter set of the grid, as full configs of strategy `name`."""
+    defaults = strategy_defaults(name)
+    unknown = set(grid) - set(defaults)
+    if unknown:
+        raise ValueError(f"{name} has no parameters {sorted(unknown)}; known: {sorted(defaults)}")
+    keys = sorted(grid)
+    return [dict(defaults, **dict(zip(keys, values))) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def sweep_job(job):
+    """Trade every parameter set of a job's grid on its candles.
+
+    The indicator arrays that do not depend on a parameter set (fractal
+    levels per period, AO/AC/ATR/ADX, Heikin Ashi, each EMA or MACD
+    setting) are computed once for the job and shared by all of them.
+    Returns, per parameter set, the entry times and pnl of its settled
+    trades and its count of unsettled ones. Signals come from full mode, so
+    the claude strategies are scored as on a frame growing from the job's
+    first bar rather than on a sliding --window (see backtest.full_signals).
+    """
+    records, frame, first, stop = load_job(job)
+    times = records['time']
+    closes = records['close']
+    name = job['strategy']
+    cache = {}
+    results = []
+    for params in job['grid']:
+        if name == 'fcb':
+            signals = FCBStrategy(params).signals(frame, job['window'], first, cache)
+        else:
+            signals = claude_signals(frame, int(name[6:]), params, cache)
+        bars, exits = trade_bars(signals, times, first, stop, job['period'], job['expiration'], job['cooldown'])
+        settled = exits >= 0
+        bars, exits = bars[settled], exits[settled]
+        move = closes[exits] - closes[bars]
+        won = (move > 0) == (signals[bars] > 0)
+        pnl = np.where(move == 0, 0.0, np.where(won, job['amount'] * job['payout'] / 100, -job['amount']))
+        results.append((times[bars] + job['period'], pnl, int(np.count_nonzero(~settled))))
+    return results
+
+
+def score(parts):
+    """Metrics of one parameter set from its per job (entry times, pnl, unsettled)."""
+    entry_times = np.concatenate([p[0] for p in parts])
+    pnl = np.concatenate([p[1] for p in parts])[np.argsort(entry_times, kind='stable')]
+    trades = len(pnl)
+    # Largest fall of the running balance from its high, assets traded side by side
+    balance = np.concatenate([[0.0], np.cumsum(pnl)])
+    wins = int(np.count_nonzero(pnl > 0))
+    return {
+        'trades': trades, 'wins': wins, 'losses': int(np.count_nonzero(pnl < 0)),
+        'ties': int(np.count_nonzero(pnl == 0)), 'unsettled': sum(p[2] for p in parts),
+        'win_rate': wins / trades if trades else 0.0,
+        'expectancy': float(pnl.sum()) / trades if trades else 0.0,
+        'pnl': float(pnl.sum()),
+        'max_drawdown': float(np.max(np.maximum.accumulate(balance) - balance)),
+    }
+
+
+def rank(rows, key, min_trades):
+    """Best first by `key`; parameter sets with fewer than `min_trades` trades go last."""
+    descending = key != 'max_drawdown'
+    return sorted(rows, key=lambda r: (r['trades'] < min_trades, -r[key] if descending else r[key]))
+
+
+def write_table(rows, path):
+    """Write the ranked rows to a columnar file. Returns the path written.
+
+    Parquet when pandas has an engine for it (pyarrow or fastparquet),
+    otherwise one array per column in an .npz archive.
+    """
+    table = pd.DataFrame(rows)
+    if not path.endswith('.npz'):
+        try:
+            table.to_parquet(path, index=False)
+            return path
+        except ImportError:
+            path = os.path.splitext(path)[0] + '.npz'
+    np.savez(path, **{column: table[column].to_numpy() for column in table.columns})
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grid search strategy parameters on stored candle history")
+    parser.add_argument('--strategy', choices=STRATEGIES, default='fcb')
+    parser.add_argument('--param', action='append', default=[], metavar='NAME=VALUES',
+                        help='values to search: v1,v2,... or lo:hi:step (repeatable, default: DEFAULT_GRIDS)')
+    add_job_arguments(parser)
+    parser.add_argument('--rank-by', choices=['expectancy', 'win_rate', 'pnl', 'max_drawdown'],
+                        default='expectancy')
+    parser.add_argument('--min-trades', type=int, default=30, help='rank sets with fewer trades last')
+    parser.add_argument('--top', type=int, default=20, help='rows to print')
+    parser.add_argument('--out', default='sweep.parquet', help='results table (.parquet, or .npz)')
+    args = parser.parse_args()
+    try:
+        make_strategy(args.strategy)
+        grid = dict(parse_param(spec) for spec in args.param) or DEFAULT_GRIDS[args.strategy]
+        grid_sets = combinations(args.strategy, grid)
+    except (ImportError, ValueError) as e:
+        parser.error(str(e))
+
+    args.strategy, args.mode = [args.strategy], 'full'
+    jobs = build_jobs(args)
+    if not jobs:
+        print(f"No candle history for period {args.period} under {args.history}")
+        return
+    for job in jobs:
+        job['grid'] = grid_sets
+
+    parts = [[] for _ in grid_sets]
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(sweep_job, job) for job in jobs]
+        for future in as_completed(futures):
+            for k, result in enumerate(future.result()):
+                parts[k].append(result)
+    wall = time.perf_counter() - started
+
+    keys = sorted(grid)
+    rows = [dict({key: params[key] for key in keys}, **score(parts[k])) for k, params in enumerate(grid_sets)]
+    rows = rank(rows, args.rank_by, args.min_trades)
+    path = write_table(rows, args.out)
+
+    print(' '.join(f"{key:>14}" for key in keys + ['trades', 'win %', 'expectancy', 'pnl', 'max dd']))
+    for row in rows[:args.top]:
+        print(' '.join(f"{row[key]!s:>14}" for key in keys) +
+              f" {row['trades']:>14,} {100 * row['win_rate']:>14.1f} {row['expectancy']:>14.4f}"
+              f" {row['pnl']:>14,.2f} {row['max_drawdown']:>14,.2f}")
+    bars = sum(max(0, job['end'] - job['start']) // args.period for job in jobs)
+    print(f"{len(grid_sets):,} parameter sets x {len(jobs)} jobs ({bars:,} bars) in {wall:.1f}s wall "
+          f"({len(grid_sets) * bars / wall if wall else 0:,.0f} set-bars/s); results in {path}")
+
+
+if __name__ == '__main__':
+    main()
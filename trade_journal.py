@@ -0,0 +1,260 @@
+# trade_journal.py - Batched, single writer trade journal (CSV plus a columnar binary log)
+import atexit
+import csv
+import json
+import os
+import queue
+import struct
+import threading
+import time
+
+import numpy as np
+
+import pocketoptionapi.global_value as global_value
+from log_segments import SegmentedLog
+
+BINARY_MAGIC = b'TJNL'
+BLOCK_MAGIC = b'TJB1'
+_FILE_HEADER = struct.Struct('<4sI')      # magic, field list length
+_BLOCK_HEADER = struct.Struct('<4sII')    # magic, rows, payload length
+
+
+def _is_number(value):
+    return isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, bool)
+
+
+def encode_block(rows, fieldnames):
+    """Pack rows column by column: float64 arrays for numbers, length prefixed UTF-8 otherwise."""
+    parts = []
+    for name in fieldnames:
+        values = [row.get(name) for row in rows]
+        if all(_is_number(v) for v in values):
+            parts.append(b'd')
+            parts.append(np.asarray(values, dtype='<f8').tobytes())
+        else:
+            encoded = [('' if v is None else str(v)).encode('utf-8') for v in values]
+            parts.append(b's')
+            parts.append(np.asarray([len(e) for e in encoded], dtype='<u4').tobytes())
+            parts.append(b''.join(encoded))
+    payload = b''.join(parts)
+    return _BLOCK_HEADER.pack(BLOCK_MAGIC, len(rows), len(payload)) + payload
+
+
+def decode_block(payload, rows, fieldnames):
+    columns = {}
+    pos = 0
+    for name in fieldnames:
+        kind = payload[pos:pos + 1]
+        pos += 1
+        if kind == b'd':
+            columns[name] = np.frombuffer(payload, dtype='<f8', count=rows, offset=pos)
+            pos += rows * 8
+        else:
+            lengths = np.frombuffer(payload, dtype='<u4', count=rows, offset=pos)
+            pos += rows * 4
+            values = []
+            for length in lengths.tolist():
+                values.append(payload[pos:pos + length].decode('utf-8'))
+                pos += length
+            columns[name] = values
+    return columns
+
+
+def read_binary_journal(path):
+    """Read a binary journal back into a list of column dicts, one per block.
+
+    A block cut short by a crash mid-write is ignored.
+    """
+    blocks = []
+    with open(path, 'rb') as file:
+        header = file.read(_FILE_HEADER.size)
+        if len(header) < _FILE_HEADER.size:
+            return blocks
+        magic, size = _FILE_HEADER.unpack(header)
+        if magic != BINARY_MAGIC:
+            raise ValueError(f"{path} is not a trade journal")
+        fieldnames = json.loads(file.read(size).decode('utf-8'))
+        while True:
+            header = file.read(_BLOCK_HEADER.size)
+            if len(header) < _BLOCK_HEADER.size:
+                break
+            magic, rows, length = _BLOCK_HEADER.unpack(header)
+            payload = file.read(length)
+            if magic != BLOCK_MAGIC or len(payload) < length:
+                break
+            blocks.append(decode_block(payload, rows, fieldnames))
+    return blocks
+
+
+class TradeJournal:
+    """Append trade rows from any thread; a single writer thread persists them.
+
+    `write` only enqueues the row. The writer drains the queue in batches of
+    up to `batch_size` rows, appends them to the CSV file (or to the day
+    segment of each row when `path` is a SegmentedLog) and to the columnar
+    binary journal when `binary_path` is set (a file, or a SegmentedLog to
+    keep one `<day>.tjb` segment per day), and flushes them to the OS at
+    least every `flush_interval` seconds, so a crash of the bot loses at most
+    that much. The files are fsynced every `fsync_interval` seconds, which
+    bounds what a power loss can take (0 fsyncs every batch).
+    """
+
+    def __init__(self, path, fieldnames, binary_path=None, batch_size=100,
+                 flush_interval=1.0, fsync_interval=5.0, maxsize=10000):
+        self.path = path
+        self.fieldnames = list(fieldnames)
+        self.binary_path = binary_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.queue = queue.Queue(maxsize)
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.closed = False
+        self.csv_file = None
+        self.csv_writer = None
+        self.csv_day = None
+        self.binary_file = None
+        self.binary_day = None
+        self.thread = threading.Thread(target=self._run, name='trade-journal', daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def write(self, row, timeout=1.0):
+        """Queue a row dict. Returns False if the journal is closed or full."""
+        if self.closed:
+            return False
+        try:
+            self.queue.put(row, timeout=timeout)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            global_value.logger(f"Trade journal full, dropping row for {row.get('pair')}", "ERROR")
+            return False
+
+    def flush(self, timeout=None):
+        """Block until every row queued so far has been written and synced."""
+        done = threading.Event()
+        self.queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout=5.0):
+        if self.closed:
+            return
+        self.flush(timeout)
+        self.closed = True
+        self.queue.put(None)
+        self.thread.join(timeout)
+
+    def stats(self):
+        return {
+            'queued': self.queue.qsize(),
+            'written': self.written,
+            'dropped': self.dropped,
+            'batches': self.batches,
+        }
+
+    def _writer_for(self, row):
+        """CSV writer for the file `row` goes to, rolling over to a new day segment."""
+        day = self.path.day_of(row) if isinstance(self.path, SegmentedLog) else None
+        if self.csv_file is not None and day == self.csv_day:
+            return self.csv_writer
+        self._close_csv()
+        if day is not None:
+            self.csv_file, self.csv_writer = self.path.open_writer(day, self.fieldnames)
+        else:
+            new_csv = not os.path.isfile(self.path) or os.path.getsize(self.path) == 0
+            self.csv_file = open(self.path, 'a', newline='')
+            self.csv_writer = csv.DictWriter(self.csv_file, fieldnames=self.fieldnames, extrasaction='ignore')
+            if new_csv:
+                self.csv_writer.writeheader()
+        self.csv_day = day
+        return self.csv_writer
+
+    def _close_csv(self):
+        if self.csv_file is not None:
+            self.csv_file.flush()
+            os.fsync(self.csv_file.fileno())
+            self.csv_file.close()
+            self.csv_file = None
+
+    def _binary_for(self, row):
+        """Binary journal file `row` goes to, rolling over to a new day segment."""
+        segmented = isinstance(self.binary_path, SegmentedLog)
+        day = self.binary_path.day_of(row) if segmented else None
+        if self.binary_file is not None and day == self.binary_day:
+            return self.binary_file
+        self._close_binary()
+        path = self.binary_path.journal_path(day) if segmented else self.binary_path
+        new_binary = not os.path.isfile(path) or os.path.getsize(path) == 0
+        self.binary_file = open(path, 'ab')
+        if new_binary:
+            names = json.dumps(self.fieldnames).encode('utf-8')
+            self.binary_file.write(_FILE_HEADER.pack(BINARY_MAGIC, len(names)) + names)
+        self.binary_day = day
+        return self.binary_file
+
+    def _close_binary(self):
+        if self.binary_file is not None:
+            self.binary_file.flush()
+            os.fsync(self.binary_file.fileno())
+            self.binary_file.close()
+            self.binary_file = None
+
+    def _run(self):
+        last_flush = last_sync = time.monotonic()
+        dirty = False
+        running = True
+        try:
+            while running:
+                batch, waiters = [], []
+                timeout = self.flush_interval if dirty else None
+                try:
+                    item = self.queue.get(timeout=timeout)
+                    while True:
+                        if item is None:
+                            running = False
+                        elif isinstance(item, threading.Event):
+                            waiters.append(item)
+                        else:
+                            batch.append(item)
+                        if len(batch) >= self.batch_size or not running:
+                            break
+                        item = self.queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+                if batch:
+                    for row in batch:
+                        self._writer_for(row).writerow(row)
+                    if self.binary_path:
+                        segmented = isinstance(self.binary_path, SegmentedLog)
+                        by_day = {}
+                        for row in batch:
+                            by_day.setdefault(self.binary_path.day_of(row) if segmented else None, []).append(row)
+                        for rows in by_day.values():
+                            self._binary_for(rows[0]).write(encode_block(rows, self.fieldnames))
+                    self.written += len(batch)
+                    self.batches += 1
+                    dirty = True
+
+                now = time.monotonic()
+                files = [f for f in (self.csv_file, self.binary_file) if f is not None]
+                if dirty and (waiters or not running or now - last_flush >= self.flush_interval
+                              or self.queue.empty()):
+                    for f in files:
+                        f.flush()
+                    last_flush = now
+                    if waiters or not running or now - last_sync >= self.fsync_interval:
+                        for f in files:
+                            os.fsync(f.fileno())
+                        last_sync = now
+                        dirty = False
+                for waiter in waiters:
+                    waiter.set()
+        except Exception as e:
+            global_value.logger(f"Trade journal writer stopped: {e}", "ERROR")
+        finally:
+            self._close_csv()
+            self._close_binary()